@@ -1,7 +1,7 @@
 import os
 from flask import Flask
 from .config import config  # Import the config dictionary
-from .extensions import db, migrate, login_manager, socketio, celery # Import from a dedicated extensions file
+from .extensions import db, migrate, login_manager, socketio, celery, frame_pipeline, log_writer, evidence_writer # Import from a dedicated extensions file
 
 def create_app(config_name=os.getenv('FLASK_CONFIG') or 'default'):
     """
@@ -23,6 +23,13 @@ def create_app(config_name=os.getenv('FLASK_CONFIG') or 'default'):
     migrate.init_app(app, db)
     login_manager.init_app(app)
     socketio.init_app(app)
+    # Exit handlers run in reverse: the pipeline finishes its queued jobs
+    # first, then their evidence is written, then their log rows
+    log_writer.init_app(app)
+    evidence_writer.init_app(app)
+    frame_pipeline.init_app(app)
+    # Log rows get their clip path once the clip has been written
+    evidence_writer.log_writer = log_writer
 
     # The login manager needs to know the endpoint for the login route.
     # 'auth.login' means the 'login' function inside the 'auth' blueprint.
@@ -50,6 +57,14 @@ def create_app(config_name=os.getenv('FLASK_CONFIG') or 'default'):
     app.register_blueprint(exam_bp, url_prefix='/exam')
     app.register_blueprint(api_bp, url_prefix='/api')
 
+    # --- Stage Timing ---
+    # Imported here: ml_models imports from app at package level
+    from ml_models.cheating_detection.stage_timing import stage_timer
+    stage_timer.enable(app.config.get('STAGE_METRICS_ENABLED', False))
+    frame_pipeline.timer = stage_timer
+    log_writer.timer = stage_timer
+    evidence_writer.timer = stage_timer
+
     # --- CRITICAL: Add the User Loader ---
     from .models.user import User
     
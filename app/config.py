@@ -1,4 +1,5 @@
 import os
+from datetime import timedelta
 
 # Find the base directory of the project to create absolute paths
 basedir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
@@ -15,6 +16,102 @@ class Config:
     
     # Uploads
     UPLOAD_FOLDER = os.path.join(basedir, 'app', 'static', 'uploads')
+    
+    # Monitoring
+    CHEATING_CONFIDENCE_THRESHOLD = 0.7
+    ABSENCE_DURATION_THRESHOLD = 10  # seconds
+    OBJECT_DETECTION_MODEL = os.environ.get(
+        'OBJECT_DETECTION_MODEL', os.path.join(basedir, 'ml_models', 'yolov5', 'yolov5s.pt')
+    )
+    # 'torch' (torch.hub YOLOv5) or 'onnx' (exported model on ONNX Runtime)
+    OBJECT_DETECTOR_BACKEND = os.environ.get('OBJECT_DETECTOR_BACKEND', 'torch')
+    OBJECT_DETECTION_ONNX_MODEL = os.environ.get(
+        'OBJECT_DETECTION_ONNX_MODEL', os.path.join(basedir, 'ml_models', 'yolov5', 'yolov5s.onnx')
+    )
+    # 'fp32' or 'int8'; int8 runs the quantised ONNX models built by
+    # ml_models.cheating_detection.quantize on ONNX Runtime
+    DETECTOR_PRECISION = os.environ.get('DETECTOR_PRECISION', 'fp32')
+    OBJECT_DETECTION_INT8_MODEL = os.environ.get(
+        'OBJECT_DETECTION_INT8_MODEL', os.path.join(basedir, 'ml_models', 'yolov5', 'yolov5s.int8.onnx')
+    )
+    # ONNX exports of the res10 SSD face model; unset FACE_DNN_MODEL uses the Caffe weights
+    FACE_DNN_MODEL = os.environ.get('FACE_DNN_MODEL')
+    FACE_DNN_INT8_MODEL = os.environ.get(
+        'FACE_DNN_INT8_MODEL', os.path.join(basedir, 'ml_models', 'weights', 'res10_300x300_ssd.int8.onnx')
+    )
+    # Micro-batch object detection across sessions (1 disables batching).
+    # Frames only reach the batcher from frame workers, one each, so at
+    # least OBJECT_BATCH_SIZE workers are started whatever FRAME_WORKERS says
+    OBJECT_BATCH_SIZE = int(os.environ.get('OBJECT_BATCH_SIZE', 1))
+    OBJECT_BATCH_WINDOW_MS = int(os.environ.get('OBJECT_BATCH_WINDOW_MS', 50))
+    # Asynchronous frame analysis: video frames kept per session (audio
+    # chunks are never dropped) and worker threads (raised to
+    # OBJECT_BATCH_SIZE when that is larger)
+    FRAME_QUEUE_SIZE = int(os.environ.get('FRAME_QUEUE_SIZE', 1))
+    FRAME_WORKERS = int(os.environ.get('FRAME_WORKERS', 2))
+    # Reuse detections while the scene is unchanged (0 disables the gate);
+    # detectors still run at least every MOTION_GATE_MAX_INTERVAL frames.
+    # Off by default: at 4.0 benchmarks.bench_motion_gate --stub keeps all
+    # 20 phone alerts of its synthetic clip with 81% less CPU, but recall on
+    # recorded exam footage is still unmeasured
+    MOTION_GATE_THRESHOLD = float(os.environ.get('MOTION_GATE_THRESHOLD', 0))
+    MOTION_GATE_MAX_INTERVAL = int(os.environ.get('MOTION_GATE_MAX_INTERVAL', 5))
+    # Face detection: 'mtcnn', 'dlib', 'opencv_dnn', 'haar' or 'cascade';
+    # cascade escalates to MTCNN for scores between FACE_CASCADE_LOW and _HIGH
+    FACE_DETECTOR_METHOD = os.environ.get('FACE_DETECTOR_METHOD', 'mtcnn')
+    FACE_CASCADE_LOW = float(os.environ.get('FACE_CASCADE_LOW', 0.3))
+    FACE_CASCADE_HIGH = float(os.environ.get('FACE_CASCADE_HIGH', 0.8))
+    # Run full face detection every N frames and track faces in between (1 disables)
+    FACE_TRACK_INTERVAL = int(os.environ.get('FACE_TRACK_INTERVAL', 1))
+    # Inference resolution (longest side, pixels) per detector; 0 keeps the
+    # native frame size. Boxes are mapped back to original frame coordinates.
+    FACE_INPUT_SIZE = int(os.environ.get('FACE_INPUT_SIZE', 0))
+    OBJECT_INPUT_SIZE = int(os.environ.get('OBJECT_INPUT_SIZE', 640))
+    # Compute gaze landmarks on a crop around the face grown by this fraction (0 = full frame)
+    GAZE_ROI_MARGIN = float(os.environ.get('GAZE_ROI_MARGIN', 0.25))
+    # MonitoringLog rows are buffered and bulk inserted once this many are
+    # pending or LOG_FLUSH_INTERVAL seconds have passed
+    LOG_BATCH_SIZE = int(os.environ.get('LOG_BATCH_SIZE', 200))
+    LOG_FLUSH_INTERVAL = float(os.environ.get('LOG_FLUSH_INTERVAL', 1.0))
+    # Rows whose write hit a transient database error (lost connection,
+    # lock timeout) are retried on later flushes for this long, then dropped
+    LOG_RETRY_SECONDS = float(os.environ.get('LOG_RETRY_SECONDS', 300))
+    # Evidence frames are written by EVIDENCE_WORKERS threads; frames beyond
+    # EVIDENCE_QUEUE_SIZE pending writes are dropped
+    EVIDENCE_QUEUE_SIZE = int(os.environ.get('EVIDENCE_QUEUE_SIZE', 256))
+    EVIDENCE_WORKERS = int(os.environ.get('EVIDENCE_WORKERS', 2))
+    # Evidence frames within this many bits (of 64) of the difference hash of
+    # the last frame stored for the same session and activity type reuse it
+    # (0 keeps only exact duplicates). Sensor noise moves about 1 bit, a
+    # phone coming into view 3 to 5 (benchmarks.bench_evidence_store)
+    EVIDENCE_DHASH_DISTANCE = int(os.environ.get('EVIDENCE_DHASH_DISTANCE', 2))
+    # Each session keeps its last EVIDENCE_RING_FRAMES frames (at most
+    # EVIDENCE_RING_BYTES) as JPEG bytes; events of the listed types save a
+    # clip from EVIDENCE_CLIP_PRE_SECONDS before to _POST_SECONDS after
+    EVIDENCE_RING_FRAMES = int(os.environ.get('EVIDENCE_RING_FRAMES', 15))
+    EVIDENCE_RING_BYTES = int(os.environ.get('EVIDENCE_RING_BYTES', 4 * 1024 * 1024))
+    EVIDENCE_CLIP_ACTIVITIES = [a for a in os.environ.get(
+        'EVIDENCE_CLIP_ACTIVITIES', 'phone_detected,unauthorized_material').split(',') if a]
+    EVIDENCE_CLIP_PRE_SECONDS = float(os.environ.get('EVIDENCE_CLIP_PRE_SECONDS', 6.0))
+    EVIDENCE_CLIP_POST_SECONDS = float(os.environ.get('EVIDENCE_CLIP_POST_SECONDS', 6.0))
+    # Raw MonitoringLog events older than this are purged in chunks of
+    # RETENTION_CHUNK_SIZE rows; per-minute rollups stay until the session is removed
+    MONITORING_RAW_RETENTION_DAYS = int(os.environ.get('MONITORING_RAW_RETENTION_DAYS', 30))
+    RETENTION_CHUNK_SIZE = int(os.environ.get('RETENTION_CHUNK_SIZE', 5000))
+    # Celery beat (celery -A celery_worker.celery beat) runs the purge every
+    # MONITORING_PURGE_INTERVAL_HOURS; with 0 it has to be started by hand
+    MONITORING_PURGE_INTERVAL_HOURS = float(os.environ.get('MONITORING_PURGE_INTERVAL_HOURS', 24))
+    CELERYBEAT_SCHEDULE = {
+        'purge-raw-monitoring-logs': {
+            'task': 'app.tasks.purge_raw_monitoring_logs',
+            'schedule': timedelta(hours=MONITORING_PURGE_INTERVAL_HOURS),
+        },
+    } if MONITORING_PURGE_INTERVAL_HOURS > 0 else {}
+    # Sessions that ended this long ago are removed, SESSION_CLEANUP_CHUNK_SIZE per transaction
+    SESSION_RETENTION_DAYS = int(os.environ.get('SESSION_RETENTION_DAYS', 30))
+    SESSION_CLEANUP_CHUNK_SIZE = int(os.environ.get('SESSION_CLEANUP_CHUNK_SIZE', 200))
+    # Record per-stage latency histograms, served at /admin/metrics
+    STAGE_METRICS_ENABLED = os.environ.get('STAGE_METRICS_ENABLED', 'false').lower() in ['true', 'on', '1']
 
 class DevelopmentConfig(Config):
     """Development configuration."""
@@ -0,0 +1,429 @@
+import atexit
+import hashlib
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from collections import OrderedDict, deque
+from datetime import timedelta
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+# Content-addressed evidence images live under this prefix of the evidence folder
+BLOB_PREFIX = 'blobs/'
+
+
+def blob_path(sha256):
+    """Path of the blob with the given hex digest, relative to the evidence folder
+
+    Blobs are sharded on the first two bytes of the hash so no single
+    directory grows without bound.
+    """
+    return f'{BLOB_PREFIX}{sha256[:2]}/{sha256[2:4]}/{sha256}.jpg'
+
+
+def blob_sha(path):
+    """Hex digest of a blob path, or None for other evidence files"""
+    if not path or not path.startswith(BLOB_PREFIX):
+        return None
+    return os.path.splitext(os.path.basename(path))[0]
+
+
+def dhash(frame, hash_size=8):
+    """64-bit difference hash of a BGR or grayscale frame
+
+    Each bit says whether a pixel of a (hash_size + 1) x hash_size
+    grayscale thumbnail is brighter than its right neighbour; frames that
+    look alike differ in only a few bits.
+    """
+    import cv2
+
+    # Sample a grid first; area-averaging the full frame costs milliseconds
+    grid = cv2.resize(frame, ((hash_size + 1) * 8, hash_size * 8), interpolation=cv2.INTER_NEAREST)
+    gray = cv2.cvtColor(grid, cv2.COLOR_BGR2GRAY) if grid.ndim == 3 else grid
+    thumb = cv2.resize(gray, (hash_size + 1, hash_size), interpolation=cv2.INTER_AREA)
+    bits = (thumb[:, 1:] > thumb[:, :-1]).flatten()
+    return int.from_bytes(np.packbits(bits).tobytes(), 'big')
+
+
+def evidence_path(exam_id, session_id, activity_type, timestamp):
+    """Evidence file path relative to the evidence folder
+
+    Files are sharded into one directory per exam and session so no
+    single directory grows without bound.
+    """
+    exam = f'exam_{exam_id}' if exam_id is not None else 'exam_unknown'
+    name = f"{activity_type}_{timestamp.strftime('%Y%m%d_%H%M%S_%f')}.jpg"
+    return f'{exam}/session_{session_id}/{name}'
+
+
+def clip_manifest_path(exam_id, session_id, activity_type, timestamp):
+    """Manifest path of an evidence clip, relative to the evidence folder
+
+    Each clip gets its own directory next to the session's evidence frames,
+    holding the frames and a manifest.json describing them.
+    """
+    directory = evidence_path(exam_id, session_id, f'clip_{activity_type}', timestamp)[:-len('.jpg')]
+    return f'{directory}/manifest.json'
+
+
+class EvidenceWriter:
+    """Writes evidence frames to disk from a bounded queue on worker threads.
+
+    Frames are stored once under the SHA-256 of their JPEG bytes. save()
+    returns the blob path straight away and a worker writes the file later
+    unless it already exists; if that write fails, log_writer clears the
+    path from the rows given it. The client's original JPEG bytes are stored
+    as they are; only decoded frames without bytes are encoded. A frame
+    whose difference hash is within EVIDENCE_DHASH_DISTANCE bits of the
+    last frame stored for the same session and activity type reuses that
+    blob instead, so a phone held up for a minute is stored once. When
+    EVIDENCE_QUEUE_SIZE writes are already pending the frame is dropped and
+    save() returns None.
+
+    start_clip() records a short clip around an event instead: frames from
+    the session's frame buffer before the event, then the frames passed to
+    add_clip_frame() until EVIDENCE_CLIP_POST_SECONDS have passed. The
+    finished clip is written as a frame sequence with a manifest, and only
+    then do the events' MonitoringLog rows get its path, through log_writer.
+    end_session() writes a session's clips early; clips of a session that
+    stops sending frames are written once another session's frames show
+    they are EVIDENCE_CLIP_POST_SECONDS overdue.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self.root = None
+        self.queue_size = 256
+        self.num_workers = 2
+        self.clip_activities = ()
+        self.clip_pre_seconds = 6.0
+        self.clip_post_seconds = 6.0
+        self.dhash_distance = 2
+        # Most (session, activity type) pairs whose last frame is remembered
+        self.recent_size = 1024
+        # Optional StageTimer that receives write times
+        self.timer = None
+        # Optional MonitoringLogWriter told about written clips and failed blobs
+        self.log_writer = None
+
+        self._queue = None
+        self._workers = []
+        self._lock = threading.Lock()
+        # Clips still collecting frames after their event, by session
+        self._clips = {}
+        self._clip_lock = threading.Lock()
+        # Difference hash and path of the last frame stored per
+        # (session, activity type), least recently used first
+        self._recent = OrderedDict()
+        self._recent_lock = threading.Lock()
+
+        self.written = 0
+        self.reencoded = 0
+        self.dropped = 0
+        self.failed = 0
+        self.bytes_written = 0
+        self.deduplicated = 0
+        self.near_duplicates = 0
+        self.bytes_saved = 0
+        self.clips_written = 0
+        self.clips_dropped = 0
+        self.latencies = deque(maxlen=1000)
+
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.root = os.path.join(app.config['UPLOAD_FOLDER'], 'evidence')
+        self.queue_size = app.config.get('EVIDENCE_QUEUE_SIZE', 256)
+        self.num_workers = app.config.get('EVIDENCE_WORKERS', 2)
+        self.clip_activities = tuple(app.config.get('EVIDENCE_CLIP_ACTIVITIES', ()))
+        self.clip_pre_seconds = app.config.get('EVIDENCE_CLIP_PRE_SECONDS', 6.0)
+        self.clip_post_seconds = app.config.get('EVIDENCE_CLIP_POST_SECONDS', 6.0)
+        self.dhash_distance = app.config.get('EVIDENCE_DHASH_DISTANCE', 2)
+        self._queue = queue.Queue(maxsize=self.queue_size)
+        app.extensions['evidence_writer'] = self
+        atexit.register(self.shutdown)
+
+    def save(self, session_id, jpeg_bytes=None, frame=None, activity_type=None):
+        """Store an evidence frame for an event; returns its blob path or None if dropped"""
+        if jpeg_bytes is None and frame is None:
+            return None
+        if jpeg_bytes is None:
+            import cv2
+            ok, encoded = cv2.imencode('.jpg', frame)
+            if not ok:
+                self.failed += 1
+                return None
+            jpeg_bytes = encoded.tobytes()
+            self.reencoded += 1
+
+        # Near-duplicate of the last frame stored for this session and activity
+        key = (session_id, activity_type)
+        frame_hash = None
+        if self.dhash_distance > 0:
+            frame_hash = self._frame_hash(jpeg_bytes, frame)
+            with self._recent_lock:
+                recent = self._recent.get(key)
+            if frame_hash is not None and recent is not None \
+                    and bin(frame_hash ^ recent[0]).count('1') <= self.dhash_distance:
+                self.near_duplicates += 1
+                self.bytes_saved += len(jpeg_bytes)
+                return recent[1]
+
+        path = blob_path(hashlib.sha256(jpeg_bytes).hexdigest())
+        if os.path.exists(os.path.join(self.root, path)):
+            self.deduplicated += 1
+            self.bytes_saved += len(jpeg_bytes)
+        else:
+            self._ensure_workers()
+            try:
+                self._queue.put_nowait((time.perf_counter(), path, jpeg_bytes, None))
+            except queue.Full:
+                self.dropped += 1
+                logger.warning(f"Evidence queue full, dropped frame for session {session_id}")
+                return None
+
+        if frame_hash is not None:
+            with self._recent_lock:
+                self._recent[key] = (frame_hash, path)
+                self._recent.move_to_end(key)
+                if len(self._recent) > self.recent_size:
+                    self._recent.popitem(last=False)
+        return path
+
+    def end_session(self, session_id):
+        """Write the session's open clips and forget its last stored frames"""
+        with self._recent_lock:
+            for key in [key for key in self._recent if key[0] == session_id]:
+                del self._recent[key]
+        self.finish_clips(session_id)
+
+    def _frame_hash(self, jpeg_bytes, frame):
+        if frame is None:
+            # A reduced decode is enough for a 9x8 thumbnail
+            import cv2
+            frame = cv2.imdecode(np.frombuffer(jpeg_bytes, np.uint8), cv2.IMREAD_REDUCED_GRAYSCALE_8)
+            if frame is None:
+                return None
+        return dhash(frame)
+
+    def start_clip(self, exam_id, session_id, activity_type, timestamp, frame_buffer):
+        """Start a clip around an event; returns its manifest path
+
+        Returns None when clips aren't recorded for ``activity_type`` or the
+        frame buffer is empty. Repeated events of the same type while a clip
+        is still collecting frames share that clip. The event's log row
+        should already be queued; it gets the path when the clip is written.
+        """
+        if activity_type not in self.clip_activities or not len(frame_buffer):
+            return None
+        with self._clip_lock:
+            pending = self._clips.setdefault(session_id, [])
+            for clip in pending:
+                if clip['activity_type'] == activity_type:
+                    clip['events'].append(timestamp)
+                    return clip['path']
+            clip = {
+                'path': clip_manifest_path(exam_id, session_id, activity_type, timestamp),
+                'exam_id': exam_id,
+                'session_id': session_id,
+                'activity_type': activity_type,
+                'event_time': timestamp,
+                'until': timestamp + timedelta(seconds=self.clip_post_seconds),
+                'frames': frame_buffer.since(timestamp - timedelta(seconds=self.clip_pre_seconds)),
+                # Timestamps of the events sharing the clip
+                'events': [timestamp],
+            }
+            pending.append(clip)
+        return clip['path']
+
+    def add_clip_frame(self, session_id, timestamp, jpeg_bytes):
+        """Add a frame to the session's open clips, queueing finished ones
+
+        Other sessions' clips more than EVIDENCE_CLIP_POST_SECONDS past
+        their end are queued too.
+        """
+        overdue = timestamp - timedelta(seconds=self.clip_post_seconds)
+        finished = []
+        with self._clip_lock:
+            for clip_session, pending in list(self._clips.items()):
+                for clip in list(pending):
+                    if clip_session == session_id:
+                        if timestamp > clip['event_time']:
+                            clip['frames'].append((timestamp, jpeg_bytes))
+                        done = timestamp >= clip['until']
+                    else:
+                        done = overdue >= clip['until']
+                    if done:
+                        pending.remove(clip)
+                        finished.append(clip)
+                if not pending:
+                    del self._clips[clip_session]
+        for clip in finished:
+            self._queue_clip(clip)
+
+    def finish_clips(self, session_id):
+        """Queue the session's open clips with the frames they have so far"""
+        with self._clip_lock:
+            pending = self._clips.pop(session_id, [])
+        for clip in pending:
+            self._queue_clip(clip)
+
+    def _queue_clip(self, clip):
+        self._ensure_workers()
+        try:
+            self._queue.put_nowait((time.perf_counter(), clip['path'], None, clip))
+        except queue.Full:
+            self.clips_dropped += 1
+            logger.warning(f"Evidence queue full, dropped clip for session {clip['session_id']}")
+
+    def pending_clip_stats(self):
+        with self._clip_lock:
+            clips = [clip for pending in self._clips.values() for clip in pending]
+        return {
+            'pending_clips': len(clips),
+            'pending_clip_bytes': sum(len(data) for clip in clips for _, data in clip['frames']),
+        }
+
+    def get_stats(self):
+        latencies = np.asarray(self.latencies, dtype=np.float64) * 1000.0
+        stats = {
+            'queue_depth': self._queue.qsize() if self._queue is not None else 0,
+            'queue_size': self.queue_size,
+            'written': self.written,
+            'reencoded': self.reencoded,
+            'dropped': self.dropped,
+            'failed': self.failed,
+            'bytes_written': self.bytes_written,
+            'deduplicated': self.deduplicated,
+            'near_duplicates': self.near_duplicates,
+            'bytes_saved': self.bytes_saved,
+            'clips_written': self.clips_written,
+            'clips_dropped': self.clips_dropped,
+        }
+        stats.update(self.pending_clip_stats())
+        for p in (50, 95, 99):
+            stats[f'write_p{p}_ms'] = round(float(np.percentile(latencies, p)), 2) if len(latencies) else None
+        return stats
+
+    def shutdown(self, timeout=5.0):
+        """Stop the workers once the queued frames and open clips are written"""
+        with self._clip_lock:
+            sessions = list(self._clips)
+        for session_id in sessions:
+            self.finish_clips(session_id)
+        with self._lock:
+            workers, self._workers = self._workers, []
+        for _ in workers:
+            self._queue.put(None)
+        for worker in workers:
+            worker.join(timeout)
+
+    def _ensure_workers(self):
+        if self._workers:
+            return
+        with self._lock:
+            if self._workers:
+                return
+            for i in range(self.num_workers):
+                worker = threading.Thread(
+                    target=self._run, name=f'evidence-writer-{i}', daemon=True
+                )
+                worker.start()
+                self._workers.append(worker)
+
+    def _write(self, path, jpeg_bytes):
+        """Write a blob unless it exists; returns the bytes written"""
+        full_path = os.path.join(self.root, path)
+        if os.path.exists(full_path):
+            # Same content queued twice before the first write landed
+            self.deduplicated += 1
+            self.bytes_saved += len(jpeg_bytes)
+            return 0
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        # Write under a temporary name so a blob is never seen half written
+        temp_path = f'{full_path}.{threading.get_ident()}.tmp'
+        with open(temp_path, 'wb') as f:
+            f.write(jpeg_bytes)
+        os.replace(temp_path, full_path)
+        return len(jpeg_bytes)
+
+    def _blob_failed(self, path):
+        """Take back a blob path whose write failed"""
+        if os.path.exists(os.path.join(self.root, path)):
+            # Another write of the same bytes landed
+            return
+        with self._recent_lock:
+            for key in [key for key, (_, p) in self._recent.items() if p == path]:
+                del self._recent[key]
+        if self.log_writer is not None:
+            self.log_writer.clear_evidence(path)
+
+    def _write_clip(self, path, clip):
+        """Write a clip's frames and its manifest; returns the bytes written"""
+        full_path = os.path.join(self.root, path)
+        directory = os.path.dirname(full_path)
+        os.makedirs(directory, exist_ok=True)
+
+        event_time = clip['event_time']
+        frames = []
+        size = 0
+        for i, (timestamp, jpeg_bytes) in enumerate(clip['frames']):
+            name = f'frame_{i:03d}.jpg'
+            with open(os.path.join(directory, name), 'wb') as f:
+                f.write(jpeg_bytes)
+            size += len(jpeg_bytes)
+            frames.append({
+                'file': name,
+                'timestamp': timestamp.isoformat(),
+                'offset': round((timestamp - event_time).total_seconds(), 3),
+            })
+
+        manifest = {
+            'exam_id': clip['exam_id'],
+            'session_id': clip['session_id'],
+            'activity_type': clip['activity_type'],
+            'event_time': event_time.isoformat(),
+            'frames': frames,
+        }
+        with open(full_path, 'w') as f:
+            json.dump(manifest, f)
+        return size
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            queued_at, path, jpeg_bytes, clip = item
+            try:
+                if clip is not None:
+                    size = self._write_clip(path, clip)
+                    self.clips_written += 1
+                    if self.log_writer is not None:
+                        self.log_writer.attach_clip(clip['session_id'], clip['activity_type'],
+                                                    clip['events'], path)
+                else:
+                    size = self._write(path, jpeg_bytes)
+                    if size:
+                        self.written += 1
+            except Exception as e:
+                self.failed += 1
+                logger.error(f"Failed to save evidence {path}: {str(e)}")
+                if clip is None:
+                    self._blob_failed(path)
+                continue
+
+            # Latency covers the time queued as well as the write
+            latency = time.perf_counter() - queued_at
+            self.latencies.append(latency)
+            self.bytes_written += size
+            if self.timer is not None:
+                self.timer.observe('evidence_write', latency)
@@ -3,9 +3,15 @@ from flask_migrate import Migrate
 from flask_login import LoginManager
 from flask_socketio import SocketIO
 from celery import Celery
+from .pipeline import FramePipeline
+from .log_writer import MonitoringLogWriter
+from .evidence import EvidenceWriter
 
 db = SQLAlchemy()
 migrate = Migrate()
 login_manager = LoginManager()
 socketio = SocketIO()
-celery = Celery(__name__, broker='redis://localhost:6379/0', backend='redis://localhost:6379/0')
\ No newline at end of file
+celery = Celery(__name__, broker='redis://localhost:6379/0', backend='redis://localhost:6379/0')
+frame_pipeline = FramePipeline()
+log_writer = MonitoringLogWriter()
+evidence_writer = EvidenceWriter()
\ No newline at end of file
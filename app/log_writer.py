@@ -0,0 +1,426 @@
+import atexit
+import logging
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+import sqlalchemy as sa
+
+logger = logging.getLogger(__name__)
+
+
+def _greater(new, current):
+    """SQL expression picking the larger of two nullable values"""
+    return sa.case((new.is_(None), current), (current.is_(None), new),
+                   (new > current, new), else_=current)
+
+
+def _fold_max(entry, column, value):
+    if value is not None and (entry[column] is None or value > entry[column]):
+        entry[column] = value
+
+
+def rollup_rows(rows):
+    """Per (session, minute, activity type) counts for a batch of log rows"""
+    rollups = {}
+    for row in rows:
+        if row['session_id'] is None:
+            continue
+        minute = row['timestamp'].replace(second=0, microsecond=0)
+        key = (row['session_id'], minute, row['activity_type'])
+        entry = rollups.get(key)
+        if entry is None:
+            entry = rollups[key] = {
+                'session_id': row['session_id'],
+                'minute': minute,
+                'activity_type': row['activity_type'],
+                'event_count': 0,
+                'max_confidence': None,
+            }
+        entry['event_count'] += 1
+        _fold_max(entry, 'max_confidence', row.get('confidence_score'))
+    return list(rollups.values())
+
+
+def aggregate_rows(rows):
+    """Per (session, activity type) totals for a batch of log rows"""
+    from ml_models.cheating_detection.activity_monitor import ACTIVITY_WEIGHTS
+
+    aggregates = {}
+    for row in rows:
+        if row['session_id'] is None:
+            continue
+        key = (row['session_id'], row['activity_type'])
+        entry = aggregates.get(key)
+        if entry is None:
+            entry = aggregates[key] = {
+                'session_id': row['session_id'],
+                'activity_type': row['activity_type'],
+                'event_count': 0,
+                'weighted_score': 0.0,
+                'max_confidence': None,
+                'last_event_at': None,
+            }
+        entry['event_count'] += 1
+        entry['weighted_score'] += ACTIVITY_WEIGHTS.get(row['activity_type'], 1)
+        _fold_max(entry, 'max_confidence', row.get('confidence_score'))
+        _fold_max(entry, 'last_event_at', row['timestamp'])
+    return list(aggregates.values())
+
+
+def blob_rows(rows):
+    """EvidenceBlob reference counts added by a batch of log rows"""
+    from .evidence import blob_sha
+
+    blobs = {}
+    for row in rows:
+        sha256 = blob_sha(row.get('video_frame_path'))
+        if sha256 is None:
+            continue
+        entry = blobs.get(sha256)
+        if entry is None:
+            entry = blobs[sha256] = {
+                'sha256': sha256,
+                'path': row['video_frame_path'],
+                'refcount': 0,
+                'created_at': row['timestamp'],
+            }
+        entry['refcount'] += 1
+    return list(blobs.values())
+
+
+def upsert_totals(session, table, keys, entries, sums, maxima):
+    """Add entries to running totals in table, creating missing rows
+
+    Rows are matched on the unique ``keys`` columns; ``sums`` columns are
+    added to and ``maxima`` columns keep the larger value.
+    """
+
+    if not entries:
+        return
+    dialect = session.get_bind().dialect.name
+    if dialect in ('sqlite', 'postgresql'):
+        if dialect == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert
+        stmt = insert(table)
+        updates = {c: table.c[c] + stmt.excluded[c] for c in sums}
+        updates.update({c: _greater(stmt.excluded[c], table.c[c]) for c in maxima})
+        session.execute(stmt.on_conflict_do_update(index_elements=keys, set_=updates), entries)
+        return
+
+    # Other databases: update existing rows and insert the rest
+    for entry in entries:
+        match = sa.and_(*(table.c[k] == entry[k] for k in keys))
+        existing = session.execute(
+            sa.select(table.c.id).where(match).with_for_update()
+        ).first()
+        if existing is None:
+            session.execute(table.insert(), entry)
+            continue
+        updates = {c: table.c[c] + entry[c] for c in sums}
+        updates.update({c: _greater(sa.literal(entry[c]), table.c[c])
+                        for c in maxima if entry[c] is not None})
+        session.execute(table.update().where(table.c.id == existing.id).values(**updates))
+
+
+def is_transient(error):
+    """Whether a failed write is worth retrying: lost connections, timeouts, locks"""
+    if isinstance(error, sa.exc.DBAPIError) and error.connection_invalidated:
+        return True
+    return isinstance(error, (sa.exc.OperationalError, sa.exc.TimeoutError))
+
+
+def upsert_rollups(session, rollups):
+    """Add per-minute counts to MonitoringRollup"""
+    from .models.monitoring import MonitoringRollup
+
+    upsert_totals(session, MonitoringRollup.__table__,
+                  ['session_id', 'minute', 'activity_type'], rollups,
+                  sums=['event_count'], maxima=['max_confidence'])
+
+
+def upsert_blobs(session, blobs):
+    """Add references to EvidenceBlob, creating rows for new blobs"""
+    from .models.monitoring import EvidenceBlob
+
+    upsert_totals(session, EvidenceBlob.__table__, ['sha256'], blobs,
+                  sums=['refcount'], maxima=[])
+
+
+def upsert_aggregates(session, aggregates):
+    """Add per-session totals to SessionActivityAggregate"""
+    from .models.monitoring import SessionActivityAggregate
+
+    upsert_totals(session, SessionActivityAggregate.__table__,
+                  ['session_id', 'activity_type'], aggregates,
+                  sums=['event_count', 'weighted_score'],
+                  maxima=['max_confidence', 'last_event_at'])
+
+
+class MonitoringLogWriter:
+    """Buffers MonitoringLog rows and writes them with bulk inserts.
+
+    Rows are queued in memory by add() and written by a background thread
+    in one transaction once LOG_BATCH_SIZE rows are pending or
+    LOG_FLUSH_INTERVAL seconds have passed; the same transaction folds
+    them into the per-minute MonitoringRollup counts, the per-session
+    SessionActivityAggregate totals and the EvidenceBlob reference
+    counts. flush() writes
+    everything pending before returning; it is called when an exam session
+    ends and at interpreter exit so no rows are lost on a clean shutdown.
+
+    A batch that fails is split in halves and retried, so one bad row only
+    costs itself. Batches that hit a transient database error are kept and
+    retried on later flushes for up to LOG_RETRY_SECONDS.
+
+    attach_clip() sets the clip manifest path of rows once their evidence
+    clip has been written, and clear_evidence() drops an evidence path whose
+    file could not be written; both change rows not yet written in memory
+    and the rest with an UPDATE on the next flush.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self.batch_size = 200
+        self.flush_interval = 1.0
+        self.retry_seconds = 300.0
+        # Optional StageTimer that receives flush times
+        self.timer = None
+
+        self._rows = []
+        # (first failure time, rows) for batches waiting to be retried
+        self._retry = []
+        # Rows taken by the flush in progress
+        self._writing = []
+        # Changes to rows already written: clip paths to set, evidence to clear
+        self._updates = []
+        # Recently cleared evidence paths, for rows added after the failure
+        self._cleared = OrderedDict()
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopping = False
+        self._thread = None
+
+        self.rows_written = 0
+        self.rows_failed = 0
+        self.rows_retried = 0
+        self.flushes = 0
+        self.flush_time = 0.0
+
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.batch_size = app.config.get('LOG_BATCH_SIZE', 200)
+        self.flush_interval = app.config.get('LOG_FLUSH_INTERVAL', 1.0)
+        self.retry_seconds = app.config.get('LOG_RETRY_SECONDS', 300.0)
+        app.extensions['log_writer'] = self
+        atexit.register(self.close)
+
+    def add(self, session_id, activity_type, confidence_score=None, details=None,
+            video_frame_path=None, timestamp=None, clip_manifest_path=None):
+        """Queue one MonitoringLog row"""
+        if video_frame_path is not None and video_frame_path in self._cleared:
+            video_frame_path = None
+        row = {
+            'session_id': session_id,
+            'activity_type': activity_type,
+            'confidence_score': confidence_score,
+            'details': details,
+            'video_frame_path': video_frame_path,
+            'clip_manifest_path': clip_manifest_path,
+            'timestamp': timestamp or datetime.utcnow(),
+        }
+        self._ensure_thread()
+        with self._lock:
+            self._rows.append(row)
+            pending = len(self._rows)
+        if pending >= self.batch_size:
+            self._wakeup.set()
+
+    def attach_clip(self, session_id, activity_type, timestamps, path):
+        """Point the rows of the given events at their written clip's manifest"""
+        events = set(timestamps)
+        with self._lock:
+            for row in self._buffered():
+                if row['session_id'] == session_id and row['activity_type'] == activity_type \
+                        and row['timestamp'] in events:
+                    row['clip_manifest_path'] = path
+            # Rows written before now are updated by the next flush
+            self._updates.append({'kind': 'clip', 'session_id': session_id,
+                                  'activity_type': activity_type,
+                                  'timestamps': sorted(events), 'path': path})
+
+    def clear_evidence(self, path):
+        """Drop an evidence path whose file was never written from every row"""
+        with self._lock:
+            self._cleared[path] = True
+            if len(self._cleared) > 1024:
+                self._cleared.popitem(last=False)
+            for row in self._buffered():
+                if row['video_frame_path'] == path:
+                    row['video_frame_path'] = None
+            self._updates.append({'kind': 'evidence', 'path': path})
+
+    def _buffered(self):
+        """Rows not yet committed; call with _lock held"""
+        return self._rows + self._writing + [row for _, batch in self._retry for row in batch]
+
+    def flush(self):
+        """Write every pending row now; returns the number written"""
+        with self._write_lock:
+            with self._lock:
+                rows, self._rows = self._rows, []
+                retry, self._retry = self._retry, []
+                updates, self._updates = self._updates, []
+                self._writing = rows + [row for _, batch in retry for row in batch]
+            written = 0
+            try:
+                # Rows kept from earlier failed flushes go first
+                for failed_at, batch in retry:
+                    written += self._write(batch, failed_at)
+                if rows:
+                    written += self._write(rows)
+            finally:
+                with self._lock:
+                    self._writing = []
+            if updates:
+                self._apply_updates(updates)
+            return written
+
+    def pending(self):
+        with self._lock:
+            return len(self._rows) + sum(len(batch) for _, batch in self._retry)
+
+    def get_stats(self):
+        return {
+            'pending': self.pending(),
+            'rows_written': self.rows_written,
+            'rows_failed': self.rows_failed,
+            'rows_retried': self.rows_retried,
+            'flushes': self.flushes,
+            'avg_batch': round(self.rows_written / self.flushes, 1) if self.flushes else 0.0,
+            'avg_flush_ms': round(self.flush_time / self.flushes * 1000.0, 2) if self.flushes else 0.0,
+        }
+
+    def close(self):
+        """Stop the background thread and write what is left"""
+        self._stopping = True
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(5.0)
+        if self.app is not None:
+            self.flush()
+            if self.pending():
+                logger.error(f"Monitoring log writer closed with {self.pending()} rows unwritten")
+
+    def _write(self, rows, failed_at=None):
+        from .extensions import db
+
+        start = time.perf_counter()
+        with self.app.app_context():
+            written = self._write_batch(db.session, rows, failed_at)
+        elapsed = time.perf_counter() - start
+
+        self.rows_written += written
+        self.flushes += 1
+        self.flush_time += elapsed
+        if self.timer is not None:
+            self.timer.observe('db_flush', elapsed)
+        return written
+
+    def _apply_updates(self, updates):
+        """Change written rows, keeping the changes on transient errors"""
+        from .evidence import blob_sha
+        from .extensions import db
+        from .models.monitoring import MonitoringLog, EvidenceBlob
+
+        logs = MonitoringLog.__table__
+        blobs = EvidenceBlob.__table__
+        with self.app.app_context():
+            try:
+                for update in updates:
+                    if update['kind'] == 'clip':
+                        db.session.execute(
+                            logs.update().where(
+                                logs.c.session_id == update['session_id'],
+                                logs.c.activity_type == update['activity_type'],
+                                logs.c.timestamp.in_(update['timestamps'])
+                            ).values(clip_manifest_path=update['path'])
+                        )
+                    else:
+                        # No row keeps the path, so the blob has no references
+                        db.session.execute(
+                            logs.update().where(logs.c.video_frame_path == update['path'])
+                            .values(video_frame_path=None)
+                        )
+                        db.session.execute(
+                            blobs.delete().where(blobs.c.sha256 == blob_sha(update['path']))
+                        )
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                if is_transient(e):
+                    with self._lock:
+                        self._updates.extend(updates)
+                    logger.warning(f"Monitoring log update failed, will retry: {str(e)}")
+                else:
+                    logger.error(f"Dropped {len(updates)} monitoring log updates: {str(e)}")
+
+    def _write_batch(self, session, rows, failed_at):
+        """Write rows with their totals in one transaction, splitting it on errors"""
+        from .models.monitoring import MonitoringLog
+
+        try:
+            session.execute(sa.insert(MonitoringLog), rows)
+            upsert_rollups(session, rollup_rows(rows))
+            upsert_aggregates(session, aggregate_rows(rows))
+            upsert_blobs(session, blob_rows(rows))
+            session.commit()
+            return len(rows)
+        except Exception as e:
+            session.rollback()
+            error = e
+
+        now = time.monotonic()
+        if is_transient(error) and (failed_at is None or now - failed_at < self.retry_seconds):
+            # Keep the rows for a later flush; the database may be back by then
+            with self._lock:
+                self._retry.append((failed_at or now, rows))
+            self.rows_retried += len(rows)
+            logger.warning(f"Monitoring log write failed, will retry {len(rows)} rows: {str(error)}")
+            return 0
+        if len(rows) == 1:
+            self.rows_failed += 1
+            logger.error(f"Dropped monitoring log row {rows[0]!r}: {str(error)}")
+            return 0
+
+        # Find the bad rows by halves; the rest are still written
+        middle = len(rows) // 2
+        return (self._write_batch(session, rows[:middle], failed_at)
+                + self._write_batch(session, rows[middle:], failed_at))
+
+    def _ensure_thread(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(
+                target=self._run, name='monitoring-log-writer', daemon=True
+            )
+            self._thread.start()
+
+    def _run(self):
+        while not self._stopping:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Monitoring log flush failed")
@@ -52,6 +52,8 @@ class ExamSession(db.Model):
     student = db.relationship("app.models.user.User", back_populates="exam_sessions")
     answers = db.relationship("app.models.exam.Answer", back_populates="session", cascade="all, delete-orphan")
     monitoring_logs = db.relationship("app.models.monitoring.MonitoringLog", back_populates="session", cascade="all, delete-orphan")
+    monitoring_rollups = db.relationship("app.models.monitoring.MonitoringRollup", cascade="all, delete-orphan")
+    activity_aggregates = db.relationship("app.models.monitoring.SessionActivityAggregate", cascade="all, delete-orphan")
 
 class Answer(db.Model):
     __tablename__ = 'answers'
@@ -3,13 +3,72 @@ from datetime import datetime
 
 class MonitoringLog(db.Model):
     __tablename__ = 'monitoring_logs'
+    __table_args__ = (
+        # Session timelines: filter_by(session_id).order_by(timestamp)
+        db.Index('ix_monitoring_logs_session_timestamp', 'session_id', 'timestamp'),
+        # Dashboard time ranges: timestamp >= today
+        db.Index('ix_monitoring_logs_timestamp', 'timestamp'),
+        # Per-session counts by activity type
+        db.Index('ix_monitoring_logs_session_activity', 'session_id', 'activity_type'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     session_id = db.Column(db.Integer, db.ForeignKey('exam_sessions.id'))
     timestamp = db.Column(db.DateTime, default=datetime.utcnow)
     activity_type = db.Column(db.String(50))
+    confidence_score = db.Column(db.Float)
+    details = db.Column(db.Text) # JSON encoded
+    video_frame_path = db.Column(db.String(255)) # Evidence file, an EvidenceBlob path for new rows
+    clip_manifest_path = db.Column(db.String(255)) # Manifest of the evidence clip, if any
     
     # --- RELATIONSHIP ---
     session = db.relationship("app.models.exam.ExamSession", back_populates="monitoring_logs")
 
-# Your SystemLog model would go here if needed
\ No newline at end of file
+class MonitoringRollup(db.Model):
+    """Per-minute activity counts for a session, maintained as logs are written"""
+    __tablename__ = 'monitoring_rollups'
+    __table_args__ = (
+        # Also serves per-session scans in minute order
+        db.UniqueConstraint('session_id', 'minute', 'activity_type',
+                            name='uq_monitoring_rollups_session_minute_activity'),
+        db.Index('ix_monitoring_rollups_minute', 'minute'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    session_id = db.Column(db.Integer, db.ForeignKey('exam_sessions.id'))
+    minute = db.Column(db.DateTime, nullable=False) # Start of the minute
+    activity_type = db.Column(db.String(50), nullable=False)
+    event_count = db.Column(db.Integer, default=0, nullable=False)
+    max_confidence = db.Column(db.Float)
+
+class SessionActivityAggregate(db.Model):
+    """Running totals per session and activity type, maintained as logs are written"""
+    __tablename__ = 'session_activity_aggregates'
+    __table_args__ = (
+        db.UniqueConstraint('session_id', 'activity_type',
+                            name='uq_session_activity_aggregates_session_activity'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    session_id = db.Column(db.Integer, db.ForeignKey('exam_sessions.id'), nullable=False)
+    activity_type = db.Column(db.String(50), nullable=False)
+    event_count = db.Column(db.Integer, default=0, nullable=False)
+    weighted_score = db.Column(db.Float, default=0.0, nullable=False)
+    max_confidence = db.Column(db.Float)
+    last_event_at = db.Column(db.DateTime)
+
+class EvidenceBlob(db.Model):
+    """Evidence image stored once under its content hash
+    
+    refcount is the number of MonitoringLog rows whose video_frame_path
+    points at the blob; the file is removed when it drops to zero.
+    """
+    __tablename__ = 'evidence_blobs'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    sha256 = db.Column(db.String(64), unique=True, nullable=False)
+    path = db.Column(db.String(255), nullable=False) # Relative to the evidence folder
+    refcount = db.Column(db.Integer, default=0, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+# Your SystemLog model would go here if needed
@@ -0,0 +1,222 @@
+import atexit
+import logging
+import queue
+import threading
+import time
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+
+class SessionQueue:
+    """Per-session queue; when bounded it keeps only the newest items"""
+
+    def __init__(self, maxlen):
+        self.items = deque(maxlen=maxlen)
+        self.scheduled = False
+        # Set while nothing is queued or running, for drain()
+        self.idle = threading.Event()
+        self.idle.set()
+
+        # Statistics
+        self.submitted = 0
+        self.processed = 0
+        self.dropped = 0
+        self.errors = 0
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+        self.total_lag = 0.0
+
+    def get_stats(self):
+        return {
+            'queued': len(self.items),
+            'submitted': self.submitted,
+            'processed': self.processed,
+            'dropped': self.dropped,
+            'errors': self.errors,
+            'last_lag_ms': round(self.last_lag * 1000.0, 1),
+            'max_lag_ms': round(self.max_lag * 1000.0, 1),
+            'avg_lag_ms': round(self.total_lag / self.processed * 1000.0, 1) if self.processed else 0.0,
+        }
+
+
+class FramePipeline:
+    """Run frame analysis off the request path.
+
+    Each session has a bounded queue; when a session falls behind its
+    oldest frames are dropped so analysis always works on recent data.
+    Lossless queues, used for audio, are unbounded FIFOs instead: every
+    chunk is analysed in order, however far behind.
+    A pool of worker threads processes sessions, never more than one
+    frame of the same session at a time, inside an application context.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self.handler = None
+        self.queue_size = 1
+        self.num_workers = 2
+        # Optional StageTimer that receives queue wait times
+        self.timer = None
+
+        self._sessions = {}
+        self._ready = queue.Queue()
+        self._lock = threading.Lock()
+        self._workers = []
+
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.queue_size = app.config.get('FRAME_QUEUE_SIZE', 1)
+        self.num_workers = app.config.get('FRAME_WORKERS', 2)
+
+        # Each worker has at most one frame in flight, so a detector batch
+        # can only fill up when there are at least as many workers
+        batch_size = app.config.get('OBJECT_BATCH_SIZE', 1)
+        if batch_size > self.num_workers:
+            logger.warning(f"OBJECT_BATCH_SIZE={batch_size} exceeds FRAME_WORKERS={self.num_workers}; "
+                           f"starting {batch_size} frame workers")
+            self.num_workers = batch_size
+        app.extensions['frame_pipeline'] = self
+        atexit.register(self.shutdown)
+
+    def set_handler(self, handler):
+        """Set the callable invoked as handler(session_id, item) for each item"""
+        self.handler = handler
+
+    def submit(self, session_id, item, lossless=False):
+        """Queue an item for a session; returns the session's stats
+
+        ``session_id`` is only used as a queue key, so one exam session can
+        own several independent queues (e.g. video and audio). ``lossless``
+        makes a new queue unbounded so none of its items are dropped.
+        """
+        self._ensure_workers()
+        with self._lock:
+            session_queue = self._sessions.get(session_id)
+            if session_queue is None:
+                session_queue = SessionQueue(None if lossless else self.queue_size)
+                self._sessions[session_id] = session_queue
+
+            if len(session_queue.items) == session_queue.items.maxlen:
+                # deque evicts the oldest item on append
+                session_queue.dropped += 1
+            session_queue.items.append((time.monotonic(), item))
+            session_queue.submitted += 1
+
+            if not session_queue.scheduled:
+                session_queue.scheduled = True
+                session_queue.idle.clear()
+                self._ready.put(session_id)
+
+            return session_queue.get_stats()
+
+    def drain(self, session_ids, timeout=5.0):
+        """Wait until the given queues have nothing queued or running
+
+        Returns False if one was still busy after ``timeout`` seconds.
+        """
+        deadline = time.monotonic() + timeout
+        for session_id in session_ids:
+            with self._lock:
+                session_queue = self._sessions.get(session_id)
+            if session_queue is None:
+                continue
+            if not session_queue.idle.wait(max(0.0, deadline - time.monotonic())):
+                return False
+        return True
+
+    def remove_session(self, session_id):
+        """Forget a session and discard its pending items
+
+        Call drain() first so the items already submitted are handled.
+        """
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def get_stats(self):
+        """Per-session queue depth, lag and drop counts"""
+        with self._lock:
+            sessions = {str(key): q.get_stats() for key, q in self._sessions.items()}
+        return {
+            'workers': len(self._workers),
+            'queue_size': self.queue_size,
+            'ready_sessions': self._ready.qsize(),
+            'sessions': sessions,
+        }
+
+    def shutdown(self, timeout=5.0):
+        """Stop the workers once the items already queued are handled"""
+        with self._lock:
+            session_ids = list(self._sessions)
+        if not self.drain(session_ids, timeout):
+            logger.warning("Frame pipeline stopped with items still queued")
+        with self._lock:
+            workers, self._workers = self._workers, []
+        for _ in workers:
+            self._ready.put(None)
+        for worker in workers:
+            worker.join(timeout)
+
+    def _ensure_workers(self):
+        if self._workers:
+            return
+        with self._lock:
+            if self._workers:
+                return
+            for i in range(self.num_workers):
+                worker = threading.Thread(
+                    target=self._run, name=f'frame-pipeline-{i}', daemon=True
+                )
+                worker.start()
+                self._workers.append(worker)
+
+    def _next_item(self, session_id):
+        with self._lock:
+            session_queue = self._sessions.get(session_id)
+            if session_queue is None or not session_queue.items:
+                if session_queue is not None:
+                    session_queue.scheduled = False
+                    session_queue.idle.set()
+                return None, None
+            received_at, item = session_queue.items.popleft()
+            lag = time.monotonic() - received_at
+            session_queue.last_lag = lag
+            session_queue.max_lag = max(session_queue.max_lag, lag)
+            session_queue.total_lag += lag
+            if self.timer is not None:
+                self.timer.observe('queue_wait', lag)
+            return session_queue, item
+
+    def _finish(self, session_id, session_queue, ok):
+        with self._lock:
+            if ok:
+                session_queue.processed += 1
+            else:
+                session_queue.errors += 1
+            if session_queue.items and self._sessions.get(session_id) is session_queue:
+                self._ready.put(session_id)
+            else:
+                session_queue.scheduled = False
+                session_queue.idle.set()
+
+    def _run(self):
+        while True:
+            session_id = self._ready.get()
+            if session_id is None:
+                return
+            session_queue, item = self._next_item(session_id)
+            if session_queue is None:
+                continue
+
+            ok = True
+            try:
+                with self.app.app_context():
+                    self.handler(session_id, item)
+            except Exception as e:
+                ok = False
+                logger.error(f"Frame pipeline error for session {session_id}: {str(e)}")
+            finally:
+                self._finish(session_id, session_queue, ok)
@@ -1,9 +1,10 @@
-from flask import Blueprint, render_template, jsonify
+from flask import Blueprint, render_template, jsonify, Response
 from flask_login import login_required, current_user
-from app import db
+from app import db, log_writer
 from app.models.exam import ExamSession, Exam
-from app.models.monitoring import MonitoringLog
+from app.models.monitoring import MonitoringLog, MonitoringRollup
 from app.models.user import User
+from ml_models.cheating_detection.stage_timing import stage_timer
 from datetime import datetime, timedelta
 from functools import wraps
 
@@ -26,9 +27,10 @@ def dashboard():
     stats = {
         'active_exams': Exam.query.filter_by(is_active=True).count(),
         'students_online': ExamSession.query.filter_by(status='in_progress').count(),
-        'warnings_today': MonitoringLog.query.filter(
-            MonitoringLog.timestamp >= datetime.utcnow().date()
-        ).count(),
+        # Read from the per-minute rollups so the dashboard never scans raw events
+        'warnings_today': db.session.query(
+            db.func.coalesce(db.func.sum(MonitoringRollup.event_count), 0)
+        ).filter(MonitoringRollup.minute >= datetime.utcnow().date()).scalar(),
         'average_score': db.session.query(db.func.avg(ExamSession.total_score)).scalar() or 0
     }
     
@@ -37,9 +39,17 @@ def dashboard():
         ExamSession.start_time.desc()
     ).limit(20).all()
     
+    # Logged events per listed session
+    event_counts = dict(db.session.query(
+        MonitoringRollup.session_id, db.func.sum(MonitoringRollup.event_count)
+    ).filter(
+        MonitoringRollup.session_id.in_([s.id for s in recent_sessions])
+    ).group_by(MonitoringRollup.session_id).all())
+    
     return render_template('admin/dashboard.html', 
                          stats=stats, 
-                         recent_sessions=recent_sessions)
+                         recent_sessions=recent_sessions,
+                         event_counts=event_counts)
 
 @admin_bp.route('/session/<int:session_id>')
 @login_required
@@ -47,6 +57,7 @@ def dashboard():
 def review_session(session_id):
     """Review specific exam session"""
     session = ExamSession.query.get_or_404(session_id)
+    log_writer.flush()
     monitoring_logs = MonitoringLog.query.filter_by(
         session_id=session_id
     ).order_by(MonitoringLog.timestamp).all()
@@ -54,3 +65,11 @@ def review_session(session_id):
     return render_template('admin/review_session.html',
                          session=session,
                          monitoring_logs=monitoring_logs)
+
+@admin_bp.route('/metrics')
+@login_required
+@admin_required
+def metrics():
+    """Per-stage monitoring latency in Prometheus text format"""
+    return Response(stage_timer.prometheus(),
+                    mimetype='text/plain; version=0.0.4')
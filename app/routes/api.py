@@ -1,10 +1,11 @@
 from flask import Blueprint, request, jsonify, current_app
 from flask_login import login_required, current_user
-from app import db, socketio
+from app import db, socketio, frame_pipeline, log_writer, evidence_writer
 from app.models.exam import ExamSession, Question, Answer
-from app.models.monitoring import MonitoringLog
+from app.models.monitoring import MonitoringLog, SessionActivityAggregate
 from app.models.user import User
 from ml_models.cheating_detection.activity_monitor import ActivityMonitor
+from ml_models.cheating_detection.stage_timing import stage_timer
 from ml_models.nlp_grading.scoring_engine import ScoringEngine
 import base64
 import cv2
@@ -12,12 +13,30 @@ import numpy as np
 from datetime import datetime
 import json
 import os
+import time
 
 api_bp = Blueprint('api', __name__)
 
 # Store active monitoring sessions
 active_monitors = {}
 
+# Exam of each monitored session, used to shard evidence files
+session_exams = {}
+
+# Student of each monitored session, checked before queuing their frames
+session_students = {}
+
+# Audio streamed over Socket.IO is resampled to the analyzer's rate and
+# analyzed in chunks of this many samples
+AUDIO_SAMPLE_RATE = 16000
+AUDIO_CHUNK_SAMPLES = AUDIO_SAMPLE_RATE
+# Client sample rates outside this range are rejected
+AUDIO_MIN_SAMPLE_RATE = 8000
+AUDIO_MAX_SAMPLE_RATE = 192000
+
+# Audio messages received over Socket.IO, for /api/pipeline/stats
+audio_stats = {'messages': 0, 'bytes': 0, 'chunks': 0, 'since': None}
+
 @api_bp.route('/start_session', methods=['POST'])
 @login_required
 def start_session():
@@ -39,74 +58,258 @@ def start_session():
     config = current_app.config
     monitor = ActivityMonitor(config)
     active_monitors[session.id] = monitor
+    session_exams[session.id] = exam_id
+    session_students[session.id] = current_user.id
     
     return jsonify({
         'session_id': session.id,
         'status': 'started'
     })
 
-@api_bp.route('/submit_frame', methods=['POST'])
-@login_required
-def submit_frame():
-    """Process video frame for monitoring"""
-    data = request.get_json()
-    session_id = data.get('session_id')
-    frame_data = data.get('frame')
+def _decode_frame(buffer):
+    """Decode an encoded image buffer without copying it first"""
+    with stage_timer.span('decode'):
+        nparr = np.frombuffer(buffer, np.uint8)
+        return cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+
+def _process_frame(session_id, frame, student_id, student_name, frame_bytes=None):
+    """Run monitoring on a decoded frame and record suspicious activities"""
+    # Analyze frame
+    monitor = active_monitors[session_id]
+    with stage_timer.span('analyze_frame'):
+        activities = monitor.analyze_frame(frame, jpeg_bytes=frame_bytes)
     
+    _record_activities(session_id, monitor, activities, student_id, student_name,
+                       frame=frame, frame_bytes=frame_bytes)
+    
+    # Frames after an event go to the clips still being recorded; the ring
+    # is empty when the frame alone exceeds its limits
+    if frame_bytes is not None:
+        latest = monitor.frame_buffer.latest()
+        timestamp = latest[0] if latest is not None else datetime.now()
+        evidence_writer.add_clip_frame(session_id, timestamp, frame_bytes)
+    
+    return activities
+
+def _owns_session(session_id):
+    """Whether the session is monitored and belongs to the current user"""
     if session_id not in active_monitors:
-        return jsonify({'error': 'Invalid session'}), 400
+        return False
+    if session_id not in session_students:
+        session = db.session.get(ExamSession, session_id)
+        session_students[session_id] = session.student_id if session else None
+    return session_students[session_id] == current_user.id
+
+def _exam_id(session_id):
+    if session_id not in session_exams:
+        session = db.session.get(ExamSession, session_id)
+        session_exams[session_id] = session.exam_id if session else None
+    return session_exams[session_id]
+
+def _record_activities(session_id, monitor, activities, student_id, student_name,
+                       frame=None, frame_bytes=None):
+    """Log activities over threshold and notify the student and admins
     
-    try:
-        # Decode frame
-        frame_bytes = base64.b64decode(frame_data.split(',')[1])
-        nparr = np.frombuffer(frame_bytes, np.uint8)
-        frame = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-        
-        # Analyze frame
-        monitor = active_monitors[session_id]
-        activities = monitor.analyze_frame(frame)
-        
-        # Log suspicious activities
-        for activity in activities:
-            if activity['confidence'] > current_app.config['CHEATING_CONFIDENCE_THRESHOLD']:
-                log = MonitoringLog(
-                    session_id=session_id,
-                    activity_type=activity['type'],
-                    confidence_score=activity['confidence'],
-                    details=json.dumps(activity['details']),
-                    timestamp=activity['timestamp']
+    When the analysed frame is given, high confidence activities get it
+    stored as an evidence blob, preferably from the JPEG bytes the client sent, and
+    activity types listed in EVIDENCE_CLIP_ACTIVITIES also get a clip from
+    the session's frame buffer. The clip's path is set on the log row once
+    the clip has been written.
+    """
+    for activity in activities:
+        if activity['confidence'] > current_app.config['CHEATING_CONFIDENCE_THRESHOLD']:
+            # Identical frames share one blob; near-duplicates only within an activity type
+            video_frame_path = None
+            with_evidence = activity['confidence'] > 0.8 and (frame is not None or frame_bytes is not None)
+            if with_evidence:
+                video_frame_path = evidence_writer.save(
+                    session_id, jpeg_bytes=frame_bytes, frame=frame,
+                    activity_type=activity['type']
                 )
-                
-                # Save evidence frame
-                if activity['confidence'] > 0.8:
-                    filename = monitor.save_evidence(session_id, activity)
-                    if filename:
-                        log.video_frame_path = filename
-                
-                db.session.add(log)
-                db.session.commit()
-                
+            
+            log_writer.add(
+                session_id=session_id,
+                activity_type=activity['type'],
+                confidence_score=activity['confidence'],
+                details=json.dumps(activity['details']),
+                video_frame_path=video_frame_path,
+                timestamp=activity['timestamp']
+            )
+            if with_evidence:
+                evidence_writer.start_clip(
+                    _exam_id(session_id), session_id, activity['type'],
+                    activity['timestamp'], monitor.frame_buffer
+                )
+            
+            with stage_timer.span('socket_emit'):
                 # Emit warning to student
                 socketio.emit('warning', {
                     'type': activity['type'],
                     'message': f"Warning: {activity['details']}"
-                }, room=f'student_{current_user.id}')
+                }, room=f'student_{student_id}')
                 
                 # Notify admin
                 socketio.emit('monitoring_alert', {
                     'session_id': session_id,
-                    'student_name': current_user.username,
+                    'student_name': student_name,
                     'activity_type': activity['type'],
                     'details': activity['details'],
                     'confidence': activity['confidence'],
                     'timestamp': activity['timestamp'].isoformat()
                 }, room='admins')
-        
-        return jsonify({'status': 'processed', 'activities': len(activities)})
+
+def _analyze_frame_job(session_id, job):
+    """Frame pipeline handler: decode and analyze a queued frame"""
+    if session_id not in active_monitors:
+        return
+    
+    frame = _decode_frame(job['frame_bytes'])
+    if frame is None:
+        current_app.logger.warning(f"Undecodable frame for session {session_id}")
+        return
+    
+    _process_frame(session_id, frame, job['student_id'], job['student_name'],
+                   frame_bytes=job['frame_bytes'])
+
+def _analyze_audio_job(session_id, job):
+    """Frame pipeline handler: analyze a queued chunk of PCM audio"""
+    monitor = active_monitors.get(session_id)
+    if monitor is None:
+        return
+    
+    activities = monitor.analyze_audio(job['audio'], final=job.get('final', False))
+    _record_activities(session_id, monitor, activities,
+                       job['student_id'], job['student_name'])
+
+def _analyze_job(key, job):
+    if job['kind'] == 'audio':
+        _analyze_audio_job(job['session_id'], job)
+    else:
+        _analyze_frame_job(job['session_id'], job)
+
+frame_pipeline.set_handler(_analyze_job)
+
+def end_session_streams(session_id, timeout=5.0, finished=False):
+    """Wind down a session's analysis once its queued jobs have run
+    
+    Waits for the session's video and audio queues to drain, then drops
+    them from the pipeline, writes the clips still waiting for frames
+    after their event and empties the monitor's frame buffer. A
+    ``finished`` session (exam submitted) also loses its monitor; after a
+    disconnect the student may reconnect, so the monitor is kept.
+    """
+    keys = (session_id, f'{session_id}:audio')
+    if not frame_pipeline.drain(keys, timeout):
+        current_app.logger.warning(f"Analysis for session {session_id} still queued at session end")
+    for key in keys:
+        frame_pipeline.remove_session(key)
+    evidence_writer.end_session(session_id)
     
+    if finished:
+        monitor = active_monitors.pop(session_id, None)
+        session_exams.pop(session_id, None)
+        session_students.pop(session_id, None)
+    else:
+        monitor = active_monitors.get(session_id)
+    if monitor is not None:
+        monitor.frame_buffer.clear()
+
+def _queue_frame(session_id, frame_bytes):
+    """Hand a frame to the analysis pipeline and answer immediately"""
+    stats = frame_pipeline.submit(session_id, {
+        'kind': 'frame',
+        'session_id': session_id,
+        'frame_bytes': frame_bytes,
+        'student_id': current_user.id,
+        'student_name': current_user.username
+    })
+    
+    return jsonify({
+        'status': 'queued',
+        'queued': stats['queued'],
+        'dropped': stats['dropped']
+    }), 202
+
+@api_bp.route('/submit_frame', methods=['POST'])
+@login_required
+def submit_frame():
+    """Queue video frame for monitoring"""
+    data = request.get_json()
+    session_id = data.get('session_id')
+    frame_data = data.get('frame')
+    
+    if not _owns_session(session_id):
+        return jsonify({'error': 'Invalid session'}), 400
+    
+    try:
+        frame_bytes = base64.b64decode(frame_data.split(',')[1])
     except Exception as e:
-        current_app.logger.error(f"Frame processing error: {str(e)}")
-        return jsonify({'error': 'Processing failed'}), 500
+        current_app.logger.error(f"Frame decoding error: {str(e)}")
+        return jsonify({'error': 'Invalid frame'}), 400
+    
+    return _queue_frame(session_id, frame_bytes)
+
+@api_bp.route('/submit_frame/binary', methods=['POST'])
+@login_required
+def submit_frame_binary():
+    """Queue a binary video frame for monitoring
+    
+    Accepts either a raw ``image/jpeg`` body or a ``multipart/form-data``
+    upload with the image in a ``frame`` part. The session id is read from
+    the ``X-Session-Id`` header (or a ``session_id`` form field).
+    """
+    session_id = request.headers.get('X-Session-Id', type=int)
+    
+    if request.mimetype in ('image/jpeg', 'application/octet-stream'):
+        # Raw body, decoded straight from the request buffer
+        frame_bytes = request.get_data(cache=False)
+    elif request.mimetype == 'multipart/form-data':
+        if session_id is None:
+            session_id = request.form.get('session_id', type=int)
+        upload = request.files.get('frame')
+        if upload is None:
+            return jsonify({'error': 'Missing frame'}), 400
+        frame_bytes = upload.read()
+    else:
+        return jsonify({'error': 'Unsupported content type'}), 415
+    
+    if not _owns_session(session_id):
+        return jsonify({'error': 'Invalid session'}), 400
+    
+    if not frame_bytes:
+        return jsonify({'error': 'Empty frame'}), 400
+    
+    return _queue_frame(session_id, frame_bytes)
+
+@api_bp.route('/pipeline/stats', methods=['GET'])
+@login_required
+def pipeline_stats():
+    """Per-session analysis lag and dropped frame counts, plus writer queues"""
+    if not current_user.is_instructor():
+        return jsonify({'error': 'Unauthorized'}), 403
+    
+    stats = frame_pipeline.get_stats()
+    stats['log_writer'] = log_writer.get_stats()
+    stats['evidence'] = evidence_writer.get_stats()
+    
+    # Memory held by the per-session frame buffers
+    buffers = [monitor.frame_buffer.get_stats() for monitor in list(active_monitors.values())]
+    stats['frame_buffers'] = {
+        'sessions': len(buffers),
+        'frames': sum(b['frames'] for b in buffers),
+        'bytes': sum(b['bytes'] for b in buffers),
+        'max_bytes_per_session': current_app.config['EVIDENCE_RING_BYTES'],
+    }
+    
+    elapsed = time.monotonic() - audio_stats['since'] if audio_stats['since'] else None
+    stats['audio'] = {
+        'messages': audio_stats['messages'],
+        'bytes': audio_stats['bytes'],
+        'chunks': audio_stats['chunks'],
+        'messages_per_s': round(audio_stats['messages'] / elapsed, 1) if elapsed else None,
+        'students': len(socket_sessions),
+    }
+    return jsonify(stats)
 
 @api_bp.route('/submit_audio', methods=['POST'])
 @login_required
@@ -116,19 +319,20 @@ def submit_audio():
     session_id = data.get('session_id')
     audio_level = data.get('audio_level')
     
-    # Simple voice detection based on audio level
-    if audio_level > 50:  # Threshold for voice activity
-        log = MonitoringLog(
+    _record_audio_level(session_id, audio_level)
+    
+    return jsonify({'status': 'processed'})
+
+def _record_audio_level(session_id, audio_level):
+    """Simple voice detection based on the client's audio level"""
+    if audio_level is not None and audio_level > 50:  # Threshold for voice activity
+        log_writer.add(
             session_id=session_id,
             activity_type='voice_detected',
             confidence_score=0.7,
             details=json.dumps({'audio_level': audio_level}),
             timestamp=datetime.utcnow()
         )
-        db.session.add(log)
-        db.session.commit()
-    
-    return jsonify({'status': 'processed'})
 
 @api_bp.route('/grade_exam', methods=['POST'])
 @login_required
@@ -183,27 +387,32 @@ def get_session_report(session_id):
     if session_id in active_monitors:
         monitor_summary = active_monitors[session_id].get_summary()
     else:
-        # Recreate summary from logs
-        logs = MonitoringLog.query.filter_by(session_id=session_id).all()
+        # Summary from the stored per-session totals, including rows not yet written
+        log_writer.flush()
+        aggregates = SessionActivityAggregate.query.filter_by(session_id=session_id).all()
         monitor_summary = {
-            'activity_counts': {},
-            'suspicion_score': 0,
+            'activity_counts': {a.activity_type: a.event_count for a in aggregates},
+            'suspicion_score': sum(a.weighted_score for a in aggregates),
+            'max_confidence': {a.activity_type: a.max_confidence for a in aggregates},
+            'last_event': {
+                a.activity_type: a.last_event_at.isoformat() if a.last_event_at else None
+                for a in aggregates
+            },
             'high_confidence_alerts': []
         }
         
-        for log in logs:
-            activity_type = log.activity_type
-            if activity_type not in monitor_summary['activity_counts']:
-                monitor_summary['activity_counts'][activity_type] = 0
-            monitor_summary['activity_counts'][activity_type] += 1
-            
-            if log.confidence_score > 0.7:
-                monitor_summary['high_confidence_alerts'].append({
-                    'type': log.activity_type,
-                    'confidence': log.confidence_score,
-                    'timestamp': log.timestamp.isoformat(),
-                    'details': log.details
-                })
+        # Most recent alerts only; the totals above cover the whole session
+        recent = MonitoringLog.query.filter(
+            MonitoringLog.session_id == session_id,
+            MonitoringLog.confidence_score > 0.7
+        ).order_by(MonitoringLog.timestamp.desc()).limit(100).all()
+        for log in reversed(recent):
+            monitor_summary['high_confidence_alerts'].append({
+                'type': log.activity_type,
+                'confidence': log.confidence_score,
+                'timestamp': log.timestamp.isoformat(),
+                'details': log.details
+            })
     
     # Get grading results
     questions = Question.query.filter_by(exam_id=session.exam_id).all()
@@ -243,10 +452,34 @@ def get_session_report(session_id):
 # WebSocket handlers
 from flask_socketio import emit, join_room, leave_room
 
+# Session bound to each student socket, keyed by Socket.IO sid
+socket_sessions = {}
+
+# PCM received per socket, analyzed once a full chunk has arrived
+audio_buffers = {}
+
 @socketio.on('join_exam')
 def handle_join_exam(data):
-    """Student joins exam room"""
+    """Student joins exam room and binds the socket to their session"""
     session_id = data.get('session_id')
+    session = db.session.get(ExamSession, session_id) if session_id else None
+    
+    if session is None or session.student_id != current_user.id \
+            or session.status != 'in_progress':
+        emit('error', {'message': 'Invalid session'})
+        return
+    
+    if session_id not in active_monitors:
+        active_monitors[session_id] = ActivityMonitor(current_app.config)
+    session_exams[session_id] = session.exam_id
+    session_students[session_id] = session.student_id
+    
+    socket_sessions[request.sid] = {
+        'session_id': session_id,
+        'student_id': current_user.id,
+        'student_name': current_user.username
+    }
+    
     join_room(f'exam_{session_id}')
     join_room(f'student_{current_user.id}')
     emit('joined', {'status': 'connected'})
@@ -260,31 +493,110 @@ def handle_join_admin():
 
 @socketio.on('video_frame')
 def handle_video_frame(data):
-    """Process video frame from student"""
-    # Forward to API endpoint for processing
-    # This is handled by the REST API to avoid blocking the WebSocket
-    pass
+    """Queue a binary JPEG frame from the student for analysis"""
+    binding = socket_sessions.get(request.sid)
+    frame_bytes = data.get('frame')
+    
+    if binding is None or not isinstance(frame_bytes, (bytes, bytearray)) or not frame_bytes:
+        return
+    
+    frame_pipeline.submit(binding['session_id'], {
+        'kind': 'frame',
+        'session_id': binding['session_id'],
+        'frame_bytes': frame_bytes,
+        'student_id': binding['student_id'],
+        'student_name': binding['student_name']
+    })
 
 @socketio.on('audio_data')
 def handle_audio_data(data):
-    """Process audio data from student"""
-    # Forward to API endpoint for processing
-    pass
+    """Buffer binary PCM from the student and queue full chunks
+    
+    Current clients send 16 kHz Int16 PCM (``format`` ``s16le``) a few
+    times a second; Float32 PCM at any rate is still accepted.
+    """
+    binding = socket_sessions.get(request.sid)
+    if binding is None:
+        return
+    
+    pcm = data.get('pcm')
+    if not isinstance(pcm, (bytes, bytearray)):
+        # Older clients only send a level
+        _record_audio_level(binding['session_id'], data.get('audio_level'))
+        return
+    
+    if audio_stats['since'] is None:
+        audio_stats['since'] = time.monotonic()
+    audio_stats['messages'] += 1
+    audio_stats['bytes'] += len(pcm)
+    
+    sample_rate = data.get('sample_rate') or AUDIO_SAMPLE_RATE
+    if not isinstance(sample_rate, (int, float)) \
+            or not AUDIO_MIN_SAMPLE_RATE <= sample_rate <= AUDIO_MAX_SAMPLE_RATE:
+        emit('error', {'message': 'Unsupported sample rate'})
+        return
+    
+    samples = _decode_pcm(pcm, data.get('format'))
+    if not len(samples):
+        return
+    if sample_rate != AUDIO_SAMPLE_RATE:
+        samples = _resample(samples, sample_rate, AUDIO_SAMPLE_RATE)
+    
+    buffer = audio_buffers.setdefault(request.sid, [])
+    buffer.append(samples)
+    if sum(len(chunk) for chunk in buffer) < AUDIO_CHUNK_SAMPLES:
+        return
+    
+    audio_buffers[request.sid] = []
+    _queue_audio(binding, np.concatenate(buffer))
+
+def _decode_pcm(pcm, sample_format):
+    """Float32 samples from little-endian Int16 or Float32 PCM
+    
+    A trailing partial sample is ignored.
+    """
+    dtype = np.dtype('<i2') if sample_format == 's16le' else np.dtype('<f4')
+    samples = np.frombuffer(pcm, dtype=dtype, count=len(pcm) // dtype.itemsize)
+    if sample_format == 's16le':
+        return samples.astype(np.float32) / 32768.0
+    return samples.astype(np.float32, copy=False)
+
+def _queue_audio(binding, samples, final=False):
+    """Queue PCM for analysis; ``final`` ends the session's audio stream"""
+    audio_stats['chunks'] += 1
+    # Audio has its own queue so it never displaces video frames, and keeps
+    # every chunk: the analyzer's speech state runs across consecutive chunks
+    frame_pipeline.submit(f"{binding['session_id']}:audio", {
+        'kind': 'audio',
+        'session_id': binding['session_id'],
+        'audio': samples,
+        'final': final,
+        'student_id': binding['student_id'],
+        'student_name': binding['student_name']
+    }, lossless=True)
+
+def _resample(samples, source_rate, target_rate):
+    """Linear resampling, enough for energy and spectral features"""
+    if not len(samples):
+        return samples
+    duration = len(samples) / source_rate
+    target_len = int(round(duration * target_rate))
+    positions = np.linspace(0, len(samples) - 1, target_len)
+    return np.interp(positions, np.arange(len(samples)), samples).astype(np.float32)
 
 @socketio.on('tab_switch')
 def handle_tab_switch(data):
     """Handle tab switching event"""
-    session_id = data.get('session_id')
+    binding = socket_sessions.get(request.sid)
+    session_id = binding['session_id'] if binding else data.get('session_id')
     
-    log = MonitoringLog(
+    log_writer.add(
         session_id=session_id,
         activity_type='tab_switch',
         confidence_score=1.0,
         details=json.dumps({'action': 'Student switched browser tab'}),
         timestamp=datetime.utcnow()
     )
-    db.session.add(log)
-    db.session.commit()
     
     # Emit warning
     emit('warning', {
@@ -295,5 +607,22 @@ def handle_tab_switch(data):
 @socketio.on('disconnect')
 def handle_disconnect():
     """Handle client disconnect"""
-    # Clean up any resources
-    pass
\ No newline at end of file
+    # Drop the per-connection session binding
+    binding = socket_sessions.pop(request.sid, None)
+    buffer = audio_buffers.pop(request.sid, None)
+    
+    # End the audio stream so speech still in progress is logged
+    if buffer is not None and binding is not None:
+        samples = np.concatenate(buffer) if buffer else np.zeros(0, dtype=np.float32)
+        _queue_audio(binding, samples, final=True)
+    
+    # Let the queued frames and final audio run before forgetting the session
+    if binding is not None:
+        socketio.start_background_task(
+            _end_session_streams_in_context, current_app._get_current_object(),
+            binding['session_id']
+        )
+
+def _end_session_streams_in_context(app, session_id):
+    with app.app_context():
+        end_session_streams(session_id)
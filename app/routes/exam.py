@@ -1,8 +1,9 @@
 from flask import Blueprint, render_template, redirect, url_for, request, flash
 from flask_login import login_required, current_user
-from app import db
+from app import db, log_writer
 from app.models.exam import Exam, Question, ExamSession, Answer
 from app.models.user import User
+from app.routes.api import end_session_streams
 from datetime import datetime
 
 exam_bp = Blueprint('exam', __name__)
@@ -83,6 +84,11 @@ def submit_exam(exam_id):
     
     db.session.commit()
     
+    # Finish analysing what was already received, then store the session's
+    # monitoring rows before it is reported as ended
+    end_session_streams(session.id, finished=True)
+    log_writer.flush()
+    
     flash('Exam submitted successfully!', 'success')
     return redirect(url_for('exam.index'))
 
@@ -61,25 +61,260 @@ def process_monitoring_data(session_id, frame_data):
         logger.error(f"Error processing monitoring data: {str(e)}")
         return {'error': str(e)}
 
-@celery.task(name='app.tasks.cleanup_old_sessions')
-def cleanup_old_sessions():
-    """Clean up old exam sessions and their data"""
-    from app.models.exam import ExamSession
+def delete_in_chunks(table, condition, chunk_size, before_delete=None):
+    """Delete matching rows in bounded transactions; returns the count deleted
+
+    Each pass deletes up to chunk_size ids picked through the index on the
+    condition's columns, so locks and the write-ahead log stay small.
+    before_delete, if given, is called with a condition matching the rows
+    of each pass before they are deleted, in the same transaction.
+    """
+    deleted = 0
+    while True:
+        ids = db.select(table.c.id).where(condition).limit(chunk_size)
+        if before_delete is not None:
+            ids = db.session.execute(ids).scalars().all()
+            before_delete(table.c.id.in_(ids))
+        else:
+            ids = ids.scalar_subquery()
+        result = db.session.execute(table.delete().where(table.c.id.in_(ids)))
+        db.session.commit()
+        deleted += result.rowcount
+        if result.rowcount < chunk_size:
+            return deleted
+
+def release_blobs(condition):
+    """Drop the evidence blob references held by matching monitoring logs
+
+    Each EvidenceBlob's refcount goes down by the number of matching rows
+    pointing at it, and blobs left without references are deleted. Returns
+    their paths so the files can be removed once the transaction commits.
+    """
+    from app.evidence import BLOB_PREFIX, blob_sha
+    from app.models.monitoring import MonitoringLog, EvidenceBlob
+    
+    logs = MonitoringLog.__table__
+    blobs = EvidenceBlob.__table__
+    counts = db.session.execute(
+        db.select(logs.c.video_frame_path, db.func.count())
+        .where(condition, logs.c.video_frame_path.like(f'{BLOB_PREFIX}%'))
+        .group_by(logs.c.video_frame_path)
+    ).all()
+    if not counts:
+        return []
+    
+    shas = [blob_sha(path) for path, _ in counts]
+    db.session.execute(
+        blobs.update().where(blobs.c.sha256 == db.bindparam('b_sha256'))
+        .values(refcount=blobs.c.refcount - db.bindparam('b_count')),
+        [{'b_sha256': blob_sha(path), 'b_count': count} for path, count in counts]
+    )
+    orphaned = db.and_(blobs.c.sha256.in_(shas), blobs.c.refcount <= 0)
+    paths = db.session.execute(db.select(blobs.c.path).where(orphaned)).scalars().all()
+    db.session.execute(blobs.delete().where(orphaned))
+    return paths
+
+def remove_evidence_files(evidence_dir, paths):
+    """Remove evidence files and the directories they leave empty
+
+    Returns the number of files removed.
+    """
+    import os
+    
+    removed = 0
+    directories = set()
+    for filename in paths:
+        path = os.path.join(evidence_dir, filename)
+        directories.add(os.path.dirname(path))
+        try:
+            os.remove(path)
+            removed += 1
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning(f"Could not remove evidence {filename}: {str(e)}")
+    
+    # Drop emptied shard directories
+    for directory in directories:
+        while directory != evidence_dir and directory.startswith(evidence_dir):
+            try:
+                os.rmdir(directory)
+            except FileNotFoundError:
+                pass
+            except OSError:
+                break
+            directory = os.path.dirname(directory)
+    return removed
+
+def evidence_paths(condition):
+    """Per-event evidence files and clip manifests of matching monitoring logs
+
+    Only files from before the blob store are listed; blobs are refcounted
+    and released by release_blobs().
+    """
+    from app.evidence import BLOB_PREFIX
+    from app.models.monitoring import MonitoringLog
+    
+    logs = MonitoringLog.__table__
+    files = db.session.execute(
+        db.select(logs.c.video_frame_path).where(
+            condition, logs.c.video_frame_path.isnot(None),
+            logs.c.video_frame_path.notlike(f'{BLOB_PREFIX}%')
+        ).distinct()
+    ).scalars().all()
+    clips = db.session.execute(
+        db.select(logs.c.clip_manifest_path).where(
+            condition, logs.c.clip_manifest_path.isnot(None)
+        ).distinct()
+    ).scalars().all()
+    return files, clips
+
+def unreferenced(column, paths, chunk_size):
+    """The paths that no remaining monitoring log has in column"""
+    paths = list(set(paths))
+    kept = set()
+    for start in range(0, len(paths), chunk_size):
+        kept.update(db.session.execute(
+            db.select(column).where(column.in_(paths[start:start + chunk_size])).distinct()
+        ).scalars())
+    return [path for path in paths if path not in kept]
+
+def remove_evidence_clips(evidence_dir, manifests):
+    """Remove evidence clips and the directories they leave empty
+
+    Each clip is a directory of frames next to its manifest. Returns the
+    number of clips removed.
+    """
+    import os
+    import shutil
+    
+    removed = 0
+    for manifest in manifests:
+        clip_dir = os.path.dirname(os.path.join(evidence_dir, manifest))
+        try:
+            shutil.rmtree(clip_dir)
+            removed += 1
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning(f"Could not remove evidence clip {manifest}: {str(e)}")
+    # The clip directories are gone; their paths still let the emptied
+    # session and exam directories be pruned
+    remove_evidence_files(evidence_dir, manifests)
+    return removed
+
+@celery.task(name='app.tasks.purge_raw_monitoring_logs')
+def purge_raw_monitoring_logs(days=None):
+    """Drop raw monitoring events past retention, keeping the rollups
+    
+    Evidence blobs no longer referenced by any event are removed too, as
+    are older per-event evidence files and clips that only purged events
+    pointed at. Celery beat runs this every MONITORING_PURGE_INTERVAL_HOURS.
+    """
+    from flask import current_app
+    from app.models.monitoring import MonitoringLog
     from datetime import timedelta
+    import os
     
     try:
-        # Delete sessions older than 30 days
-        cutoff_date = datetime.utcnow() - timedelta(days=30)
-        old_sessions = ExamSession.query.filter(
-            ExamSession.end_time < cutoff_date
-        ).all()
+        config = current_app.config
+        days = days or config['MONITORING_RAW_RETENTION_DAYS']
+        chunk_size = config['RETENTION_CHUNK_SIZE']
+        cutoff_date = datetime.utcnow() - timedelta(days=days)
+        table = MonitoringLog.__table__
+        orphaned, files, clips = [], [], []
         
-        count = len(old_sessions)
-        for session in old_sessions:
-            db.session.delete(session)
+        def release(chunk):
+            orphaned.extend(release_blobs(chunk))
+            chunk_files, chunk_clips = evidence_paths(chunk)
+            files.extend(chunk_files)
+            clips.extend(chunk_clips)
         
-        db.session.commit()
-        return {'deleted': count}
+        deleted = delete_in_chunks(table, table.c.timestamp < cutoff_date, chunk_size,
+                                   before_delete=release)
+        # Events inside retention may share a file or clip with purged ones
+        files = unreferenced(table.c.video_frame_path, files, chunk_size)
+        clips = unreferenced(table.c.clip_manifest_path, clips, chunk_size)
+        evidence_dir = os.path.join(config['UPLOAD_FOLDER'], 'evidence')
+        return {'deleted': deleted,
+                'evidence_files': remove_evidence_files(evidence_dir, orphaned + files),
+                'evidence_clips': remove_evidence_clips(evidence_dir, clips)}
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Error purging monitoring logs: {str(e)}")
+        return {'error': str(e)}
+
+@celery.task(name='app.tasks.cleanup_old_sessions', bind=True)
+def cleanup_old_sessions(self, days=None, chunk_size=None):
+    """Clean up old exam sessions and their data
+
+    Expired sessions are removed in chunks of SESSION_CLEANUP_CHUNK_SIZE with
+    bulk DELETEs, children first: monitoring logs (themselves deleted in
+    RETENTION_CHUNK_SIZE batches), rollups, aggregates and answers, then
+    the sessions. Evidence blobs left without references, older per-event
+    evidence files and clips are removed once their rows are gone.
+    """
+    from flask import current_app
+    from app.models.exam import ExamSession, Answer
+    from app.models.monitoring import MonitoringLog, MonitoringRollup, SessionActivityAggregate
+    from datetime import timedelta
+    import os
+    import time
+    
+    config = current_app.config
+    days = days or config['SESSION_RETENTION_DAYS']
+    chunk_size = chunk_size or config['SESSION_CLEANUP_CHUNK_SIZE']
+    row_chunk_size = config['RETENTION_CHUNK_SIZE']
+    evidence_dir = os.path.join(config['UPLOAD_FOLDER'], 'evidence')
+    
+    sessions = ExamSession.__table__
+    logs = MonitoringLog.__table__
+    children = [MonitoringRollup.__table__, SessionActivityAggregate.__table__, Answer.__table__]
+    
+    cutoff_date = datetime.utcnow() - timedelta(days=days)
+    totals = {'sessions': 0, 'monitoring_logs': 0, 'monitoring_rollups': 0,
+              'session_activity_aggregates': 0, 'answers': 0,
+              'evidence_files': 0, 'evidence_clips': 0}
+    start = time.perf_counter()
+    
+    try:
+        while True:
+            ids = db.session.execute(
+                db.select(sessions.c.id).where(sessions.c.end_time < cutoff_date)
+                .order_by(sessions.c.id).limit(chunk_size)
+            ).scalars().all()
+            if not ids:
+                break
+            
+            files, clips = evidence_paths(logs.c.session_id.in_(ids))
+            # Blob references are released in the transaction that deletes
+            # their rows, so a failed pass never leaves refcounts too low
+            totals['monitoring_logs'] += delete_in_chunks(
+                logs, logs.c.session_id.in_(ids), row_chunk_size,
+                before_delete=lambda chunk: files.extend(release_blobs(chunk)))
+            for table in children:
+                result = db.session.execute(table.delete().where(table.c.session_id.in_(ids)))
+                totals[table.name] += result.rowcount
+            result = db.session.execute(sessions.delete().where(sessions.c.id.in_(ids)))
+            totals['sessions'] += result.rowcount
+            db.session.commit()
+            
+            totals['evidence_clips'] += remove_evidence_clips(evidence_dir, clips)
+            totals['evidence_files'] += remove_evidence_files(evidence_dir, files)
+            
+            elapsed = time.perf_counter() - start
+            rows = sum(v for k, v in totals.items() if not k.startswith('evidence_'))
+            progress = dict(totals, seconds=round(elapsed, 2),
+                            rows_per_second=round(rows / elapsed, 1) if elapsed else None)
+            logger.info(f"Session cleanup progress: {progress}")
+            if self.request.id:
+                self.update_state(state='PROGRESS', meta=progress)
+        
+        elapsed = time.perf_counter() - start
+        rows = sum(v for k, v in totals.items() if not k.startswith('evidence_'))
+        return dict(totals, deleted=totals['sessions'], seconds=round(elapsed, 2),
+                    rows_per_second=round(rows / elapsed, 1) if elapsed else None)
     except Exception as e:
+        db.session.rollback()
         logger.error(f"Error cleaning up sessions: {str(e)}")
-        return {'error': str(e)}
\ No newline at end of file
+        return dict(totals, error=str(e))
@@ -0,0 +1,213 @@
+"""Replay recorded frames and audio through the monitoring pipeline.
+
+Run from the repository root::
+
+    python -m benchmarks --frames frames/ --audio clips/ \\
+        --methods haar,opencv_dnn,mtcnn,cascade --out run.json [--stub]
+
+``--frames`` is a directory of JPEG/PNG frames (or a video file) replayed
+in file-name order; ``--audio`` is a directory of WAV clips cut into
+one-second chunks at 16 kHz. Without them a synthetic clip and noise are
+used. Each stage reports throughput, latency percentiles and the peak RSS
+seen so far, and the result records the git commit so runs can be
+compared across commits. ``--stub`` swaps every model for the stand-ins in
+``benchmarks.stubs`` so the suite runs offline with no weights or network.
+"""
+import argparse
+import os
+import platform
+import subprocess
+import sys
+import wave
+
+import numpy as np
+
+from benchmarks.common import emit, load_frames, peak_rss, summarize, synthetic_clip, time_calls
+
+SAMPLE_RATE = 16000
+
+MONITOR_CONFIG = {
+    'ABSENCE_DURATION_THRESHOLD': 10,
+    'CHEATING_CONFIDENCE_THRESHOLD': 0.7,
+    'enable_gaze_tracking': True,
+}
+
+
+def read_wav(path, sample_rate=SAMPLE_RATE):
+    """Mono float32 samples of a PCM WAV file resampled to sample_rate"""
+    with wave.open(path, 'rb') as f:
+        width = f.getsampwidth()
+        channels = f.getnchannels()
+        rate = f.getframerate()
+        raw = f.readframes(f.getnframes())
+
+    if width == 1:
+        samples = (np.frombuffer(raw, np.uint8).astype(np.float32) - 128.0) / 128.0
+    elif width == 2:
+        samples = np.frombuffer(raw, '<i2').astype(np.float32) / 32768.0
+    elif width == 4:
+        samples = np.frombuffer(raw, '<i4').astype(np.float32) / 2147483648.0
+    else:
+        raise ValueError(f'{path}: unsupported sample width {width}')
+    samples = samples.reshape(-1, channels).mean(axis=1)
+
+    if rate != sample_rate and len(samples) > 1:
+        target = int(round(len(samples) * sample_rate / rate))
+        positions = np.linspace(0, len(samples) - 1, target)
+        samples = np.interp(positions, np.arange(len(samples)), samples)
+    return samples.astype(np.float32)
+
+
+def load_audio_chunks(path, limit=None, chunk=SAMPLE_RATE):
+    """One-second chunks from every WAV file in a directory"""
+    chunks = []
+    for name in sorted(os.listdir(path)):
+        if not name.lower().endswith('.wav'):
+            continue
+        samples = read_wav(os.path.join(path, name))
+        for start in range(0, len(samples) - chunk + 1, chunk):
+            chunks.append(samples[start:start + chunk])
+    return chunks[:limit]
+
+
+def synthetic_audio(count=20, seed=0):
+    """Quiet noise with a tone in every other chunk"""
+    rng = np.random.default_rng(seed)
+    t = np.arange(SAMPLE_RATE) / SAMPLE_RATE
+    chunks = []
+    for i in range(count):
+        chunk = rng.normal(0, 0.01, SAMPLE_RATE)
+        if i % 2:
+            chunk += 0.2 * np.sin(2 * np.pi * 220 * t)
+        chunks.append(chunk.astype(np.float32))
+    return chunks
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD'], text=True,
+                                       stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_stage(fn, items, repeat):
+    latencies, wall = time_calls(fn, [(item,) for item in items] * repeat)
+    result = summarize(latencies, wall)
+    result['peak_rss_mb'] = round(peak_rss() / 2 ** 20, 1)
+    return result
+
+
+def face_detector(method, args):
+    if args.stub:
+        from benchmarks.stubs import StubFaceDetector
+        return StubFaceDetector(method, cost_ms=args.stub_face_ms)
+    from ml_models.cheating_detection.face_detector import FaceDetector
+    return FaceDetector(method=method)
+
+
+def object_detector(args):
+    if args.stub:
+        from benchmarks.stubs import StubObjectDetector
+        return StubObjectDetector(call_ms=args.stub_object_ms)
+    from ml_models.cheating_detection.object_detector import ObjectDetector
+    return ObjectDetector(model_path=args.object_model, backend=args.object_backend)
+
+
+def audio_analyzer(args):
+    if args.stub:
+        from benchmarks.stubs import StubAudioAnalyzer
+        return StubAudioAnalyzer()
+    from ml_models.cheating_detection.audio_analyzer import AudioAnalyzer
+    return AudioAnalyzer(sample_rate=SAMPLE_RATE)
+
+
+def bench_monitor(frames, args):
+    from ml_models.cheating_detection.activity_monitor import ActivityMonitor
+    from ml_models.cheating_detection.stage_timing import stage_timer
+
+    if args.stub:
+        from benchmarks import stubs
+        stubs.install(face_ms=args.stub_face_ms, object_ms=args.stub_object_ms)
+
+    monitor = ActivityMonitor(dict(MONITOR_CONFIG, OBJECT_DETECTION_MODEL=args.object_model,
+                                   OBJECT_DETECTOR_BACKEND=args.object_backend))
+    stage_timer.reset()
+    stage_timer.enable()
+    try:
+        result = run_stage(monitor.analyze_frame, frames, args.repeat)
+    finally:
+        stage_timer.enable(False)
+    result['stages'] = {
+        stage: dict(count=data['count'],
+                    **{f'p{int(q * 100)}': round(v * 1000.0, 3) for q, v in data['quantiles'].items()})
+        for stage, data in stage_timer.snapshot().items()
+    }
+    return result
+
+
+def guarded(fn, *args):
+    """Run one benchmark, reporting a missing model as an error entry"""
+    try:
+        return fn(*args)
+    except Exception as e:
+        return {'error': f'{type(e).__name__}: {e}'}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--frames', help='directory of frames or a video file')
+    parser.add_argument('--audio', help='directory of WAV clips')
+    parser.add_argument('--limit', type=int, help='use at most this many frames and audio chunks')
+    parser.add_argument('--repeat', type=int, default=1, help='replay the inputs this many times')
+    parser.add_argument('--methods', default='haar,opencv_dnn,mtcnn,cascade',
+                        help='comma separated FaceDetector methods')
+    parser.add_argument('--object-model', default='ml_models/yolov5/yolov5s.pt')
+    parser.add_argument('--object-backend', default='torch')
+    parser.add_argument('--stages', default='monitor,face,object,audio',
+                        help='comma separated subset of monitor,face,object,audio')
+    parser.add_argument('--stub', action='store_true', help='use stand-in models instead of real ones')
+    parser.add_argument('--stub-face-ms', type=float, default=0.0)
+    parser.add_argument('--stub-object-ms', type=float, default=0.0)
+    parser.add_argument('--out', help='also write the JSON result to this file')
+    args = parser.parse_args(argv)
+
+    frames = load_frames(args.frames, args.limit) if args.frames else synthetic_clip(args.limit or 60)
+    audio = load_audio_chunks(args.audio, args.limit) if args.audio else synthetic_audio(args.limit or 20)
+    stages = set(args.stages.split(','))
+
+    results = {}
+    if 'monitor' in stages:
+        results['activity_monitor'] = guarded(bench_monitor, frames, args)
+    if 'face' in stages:
+        results['face_detector'] = {
+            method: guarded(lambda m: run_stage(face_detector(m, args).detect_faces, frames, args.repeat),
+                            method)
+            for method in args.methods.split(',')
+        }
+    if 'object' in stages:
+        results['object_detector'] = guarded(
+            lambda: run_stage(object_detector(args).detect_objects, frames, args.repeat))
+    if 'audio' in stages:
+        results['audio_features'] = guarded(
+            lambda: run_stage(audio_analyzer(args).extract_features, audio, args.repeat))
+
+    report = {
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'argv': sys.argv[1:] if argv is None else argv,
+        'frames': len(frames),
+        'frame_shape': list(frames[0].shape) if frames else None,
+        'audio_chunks': len(audio),
+        'results': results,
+        'peak_rss_mb': round(peak_rss() / 2 ** 20, 1),
+    }
+    emit(report)
+    if args.out:
+        with open(args.out, 'w') as f:
+            emit(report, f)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+"""Audio feature extraction: per-call librosa features vs one shared STFT.
+
+Run from the repository root::
+
+    python -m benchmarks.bench_audio_features --chunks 64 --batch-sizes 1,8,32,64
+
+``librosa_twice`` is the previous AudioAnalyzer path: detect_voice_activity
+and detect_anomaly each called extract_features, which ran librosa's STFT
+for the spectral features and a second spectrogram inside
+librosa.feature.mfcc. It is skipped when librosa isn't installed.
+``single_pass`` is AudioFeatureExtractor on one chunk at a time, and
+``batch[N]`` extracts N chunks (e.g. one per session) in one call.
+"""
+import argparse
+import time
+
+import numpy as np
+
+from benchmarks.common import emit, summarize
+
+SAMPLE_RATE = 16000
+
+
+def make_chunks(count, seed=0):
+    """One-second chunks of noise with speech-band tones of varying level"""
+    rng = np.random.default_rng(seed)
+    t = np.arange(SAMPLE_RATE) / SAMPLE_RATE
+    chunks = rng.normal(0, 0.01, (count, SAMPLE_RATE))
+    for chunk in chunks:
+        for freq in rng.uniform(150, 3000, 3):
+            chunk += rng.uniform(0, 0.2) * np.sin(2 * np.pi * freq * t)
+    return chunks.astype(np.float32)
+
+
+def librosa_features(audio_data, frame_length=2048):
+    """AudioAnalyzer.extract_features before the single-pass extractor"""
+    import librosa
+
+    hop_length = frame_length // 2
+    features = {
+        'rms': np.sqrt(np.mean(audio_data ** 2)),
+        'zcr': np.mean(librosa.zero_crossings(audio_data)),
+    }
+    magnitude = np.abs(librosa.stft(audio_data, n_fft=frame_length, hop_length=hop_length))
+    features['spectral_centroid'] = np.mean(
+        librosa.feature.spectral_centroid(S=magnitude, sr=SAMPLE_RATE))
+    features['spectral_rolloff'] = np.mean(
+        librosa.feature.spectral_rolloff(S=magnitude, sr=SAMPLE_RATE))
+    features['spectral_bandwidth'] = np.mean(
+        librosa.feature.spectral_bandwidth(S=magnitude, sr=SAMPLE_RATE))
+    mfccs = librosa.feature.mfcc(y=audio_data, sr=SAMPLE_RATE, n_mfcc=13)
+    for i in range(13):
+        features[f'mfcc_{i}'] = np.mean(mfccs[i])
+    return features
+
+
+def timed(fn, items, repeat):
+    latencies = []
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for item in items:
+            t0 = time.perf_counter()
+            fn(item)
+            latencies.append(time.perf_counter() - t0)
+    return latencies, time.perf_counter() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--chunks', type=int, default=64)
+    parser.add_argument('--batch-sizes', default='1,8,32,64')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args(argv)
+
+    from ml_models.cheating_detection.audio_features import FEATURE_NAMES, AudioFeatureExtractor
+
+    chunks = make_chunks(args.chunks)
+    extractor = AudioFeatureExtractor(sample_rate=SAMPLE_RATE)
+    results = {}
+
+    try:
+        import librosa  # noqa: F401
+    except ImportError:
+        results['librosa_twice'] = {'skipped': 'librosa is not installed'}
+    else:
+        def twice(chunk):
+            librosa_features(chunk)
+            return librosa_features(chunk)
+
+        latencies, wall = timed(twice, chunks, args.repeat)
+        results['librosa_twice'] = summarize(latencies, wall)
+        # Every feature should match up to float32 rounding
+        reference = np.array([list(librosa_features(c).values()) for c in chunks[:8]])
+        ours = extractor.extract_batch(chunks[:8])
+        error = np.abs(ours - reference) / np.maximum(np.abs(reference), 1e-6)
+        results['max_relative_difference'] = {
+            name: round(float(value), 4) for name, value in zip(FEATURE_NAMES, error.max(axis=0))
+        }
+
+    latencies, wall = timed(extractor.extract, chunks, args.repeat)
+    results['single_pass'] = summarize(latencies, wall)
+
+    for batch_size in (int(b) for b in args.batch_sizes.split(',')):
+        batches = [chunks[i:i + batch_size] for i in range(0, len(chunks), batch_size)]
+        latencies, wall = timed(extractor.extract_batch, batches, args.repeat)
+        result = summarize(latencies, wall)
+        result['chunks_per_s'] = round(len(chunks) * args.repeat / wall, 1)
+        results[f'batch[{batch_size}]'] = result
+
+    if 'mean_ms' in results['librosa_twice']:
+        results['speedup_single_pass'] = round(
+            results['librosa_twice']['mean_ms'] / results['single_pass']['mean_ms'], 1)
+
+    emit({'chunks': args.chunks, 'chunk_seconds': 1.0, 'features': len(FEATURE_NAMES),
+          'results': results})
+
+
+if __name__ == '__main__':
+    main()
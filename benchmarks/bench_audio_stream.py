@@ -0,0 +1,162 @@
+"""Audio messages and MonitoringLog writes per student: level posts vs streamed PCM.
+
+Run from the repository root::
+
+    python -m benchmarks.bench_audio_stream --seconds 600 --students 5
+
+Each student gets synthetic microphone audio at ``--rate`` Hz: background
+noise with bursts of speech-band noise modulated at a syllable rate.
+
+``level`` is the original client: one message per 2048-sample
+ScriptProcessor callback carrying an AnalyserNode-style average FFT level,
+and one row per callback above 50. ``float_chunks`` streams Float32 PCM at
+the capture rate and writes a row for every voiced one-second chunk
+(RMS and ZCR rule). ``stream_vad`` is the current path: 16 kHz Int16 sent
+every 250 ms, fed to StreamingVAD in one-second chunks, one row per voice
+segment.
+"""
+import argparse
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from benchmarks.common import emit
+
+CALLBACK_SAMPLES = 2048
+TARGET_RATE = 16000
+SEND_SAMPLES = 4000
+
+
+def synthetic_audio(seconds, rate, seed):
+    """Microphone audio and the total seconds of speech in it"""
+    rng = np.random.default_rng(seed)
+    audio = rng.normal(0, 0.003, seconds * rate).astype(np.float32)
+    spectrum_freqs = np.fft.rfftfreq(rate, 1 / rate)
+    band = (spectrum_freqs > 300) & (spectrum_freqs < 3400)
+    speech = 0.0
+    t = rng.uniform(2, 10)
+    while t < seconds - 8:
+        duration = rng.uniform(1, 6)
+        n = int(duration * rate)
+        noise = np.fft.rfft(rng.normal(0, 1, n))
+        noise[~np.interp(np.fft.rfftfreq(n, 1 / rate), spectrum_freqs, band).astype(bool)] = 0
+        voiced = np.fft.irfft(noise, n)
+        voiced /= np.max(np.abs(voiced)) or 1.0
+        envelope = 0.5 + 0.5 * np.sin(2 * np.pi * 4 * np.arange(n) / rate)
+        start = int(t * rate)
+        audio[start:start + n] += (0.15 * envelope * voiced).astype(np.float32)
+        speech += duration
+        t += duration + rng.uniform(4, 20)
+    return audio, speech
+
+
+def analyser_level(block, fft_size=1024):
+    """Average of AnalyserNode.getByteFrequencyData over the last fft_size samples"""
+    window = np.blackman(fft_size)
+    spectrum = np.abs(np.fft.rfft(block[-fft_size:] * window))[:fft_size // 2] / fft_size
+    decibels = 20 * np.log10(np.maximum(spectrum, 1e-12))
+    return float(np.mean(np.clip(255 * (decibels + 100) / 70, 0, 255)))
+
+
+def level_path(audio, rate):
+    blocks = len(audio) // CALLBACK_SAMPLES
+    rows = sum(1 for i in range(blocks)
+               if analyser_level(audio[i * CALLBACK_SAMPLES:(i + 1) * CALLBACK_SAMPLES]) > 50)
+    # Messages carry a level only; their size isn't counted
+    return {'messages': blocks, 'db_writes': rows}
+
+
+def float_chunk_path(audio, rate):
+    blocks = len(audio) // CALLBACK_SAMPLES
+    rows = 0
+    for start in range(0, len(audio) - rate + 1, rate):
+        chunk = audio[start:start + rate]
+        signs = np.signbit(chunk)
+        rms = np.sqrt(np.mean(chunk ** 2))
+        zcr = np.mean(signs[1:] != signs[:-1])
+        rows += rms > 0.02 and zcr > 0.1
+    return {'messages': blocks, 'bytes': blocks * CALLBACK_SAMPLES * 4, 'db_writes': int(rows)}
+
+
+def downsample_int16(audio, rate):
+    """What the client sends: group averages at 16 kHz as Int16"""
+    ratio = rate / TARGET_RATE
+    count = int(len(audio) / ratio)
+    edges = (np.arange(count + 1) * ratio).astype(np.int64)
+    sums = np.add.reduceat(audio, edges[:-1])
+    samples = np.clip(sums / np.diff(edges), -1, 1)
+    return (samples * 0x7fff).astype('<i2')
+
+
+def stream_path(audio, rate):
+    from ml_models.cheating_detection.vad import StreamingVAD
+
+    pcm = downsample_int16(audio, rate)
+    messages = len(pcm) // SEND_SAMPLES
+    vad = StreamingVAD(sample_rate=TARGET_RATE)
+    start_time = datetime(2026, 1, 1)
+    segments = []
+    vad_time = 0.0
+    for start in range(0, messages * SEND_SAMPLES, TARGET_RATE):
+        chunk = pcm[start:start + TARGET_RATE].astype(np.float32) / 32768.0
+        end = start_time + timedelta(seconds=(start + len(chunk)) / TARGET_RATE)
+        t0 = time.perf_counter()
+        segments += vad.process(chunk, end)
+        vad_time += time.perf_counter() - t0
+    segments += vad.flush(start_time + timedelta(seconds=len(pcm) / TARGET_RATE))
+    return {
+        'messages': messages,
+        'bytes': messages * SEND_SAMPLES * 2,
+        'db_writes': len(segments),
+        'speech_seconds_detected': round(sum(s['duration'] for s in segments), 1),
+        'vad_ms_per_audio_s': round(vad_time * 1000.0 / (len(pcm) / TARGET_RATE), 4),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--seconds', type=int, default=600)
+    parser.add_argument('--students', type=int, default=5)
+    parser.add_argument('--rate', type=int, default=48000, help='capture sample rate')
+    args = parser.parse_args(argv)
+
+    totals = {}
+    speech = 0.0
+    for student in range(args.students):
+        audio, spoken = synthetic_audio(args.seconds, args.rate, seed=student)
+        speech += spoken
+        for name, path in (('level', level_path), ('float_chunks', float_chunk_path),
+                           ('stream_vad', stream_path)):
+            result = path(audio, args.rate)
+            entry = totals.setdefault(name, {})
+            for key, value in result.items():
+                entry[key] = entry.get(key, 0) + value
+
+    per_student = {}
+    for name, entry in totals.items():
+        per_student[name] = {
+            'messages_per_s': round(entry['messages'] / args.students / args.seconds, 2),
+            'kbytes_per_s': round(entry['bytes'] / args.students / args.seconds / 1024, 1)
+            if 'bytes' in entry else None,
+            'db_writes_per_min': round(entry['db_writes'] / args.students / args.seconds * 60, 2),
+        }
+    stream = totals['stream_vad']
+    per_student['stream_vad']['speech_seconds_detected'] = round(
+        stream['speech_seconds_detected'] / args.students, 1)
+    per_student['stream_vad']['vad_ms_per_audio_s'] = round(
+        stream['vad_ms_per_audio_s'] / args.students, 4)
+
+    emit({
+        'students': args.students,
+        'seconds': args.seconds,
+        'speech_seconds_per_student': round(speech / args.students, 1),
+        'per_student': per_student,
+        'db_writes_saved_vs_level': round(1 - stream['db_writes'] / max(totals['level']['db_writes'], 1), 3),
+        'db_writes_saved_vs_float_chunks': round(
+            1 - stream['db_writes'] / max(totals['float_chunks']['db_writes'], 1), 3),
+    })
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+"""Throughput and latency of micro-batched object detection.
+
+Run from the repository root::
+
+    python -m benchmarks.bench_batch_inference --stub --duration 5
+
+For each batch size, that many client threads submit frames back to back
+through a BatchingObjectDetector. Without ``--stub`` the real YOLOv5
+model from OBJECT_DETECTION_MODEL is used.
+"""
+import argparse
+import os
+import threading
+import time
+
+from benchmarks.common import emit, percentiles, synthetic_frame
+from ml_models.cheating_detection.batch_inference import BatchingObjectDetector
+
+
+def _cores():
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def run_batch_size(detector, batch_size, window_ms, duration, frame):
+    batcher = BatchingObjectDetector(detector, max_batch=batch_size, window_ms=window_ms)
+    latencies = [[] for _ in range(batch_size)]
+    stop = time.perf_counter() + duration
+
+    def client(samples):
+        while time.perf_counter() < stop:
+            t0 = time.perf_counter()
+            batcher.detect_objects(frame)
+            samples.append(time.perf_counter() - t0)
+
+    threads = [threading.Thread(target=client, args=(samples,)) for samples in latencies]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    all_latencies = [x for samples in latencies for x in samples]
+    fps = len(all_latencies) / elapsed
+    result = {
+        'batch_size': batch_size,
+        'frames': len(all_latencies),
+        'frames_per_s': round(fps, 2),
+        'frames_per_s_per_core': round(fps / _cores(), 2),
+        'mean_batch_size': round(batcher.get_stats()['mean_batch_size'], 2),
+    }
+    result.update(percentiles(all_latencies))
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--batch-sizes', default='1,4,8,16')
+    parser.add_argument('--window-ms', type=float, default=50)
+    parser.add_argument('--duration', type=float, default=5.0, help='seconds per batch size')
+    parser.add_argument('--model', help='YOLOv5 weights (defaults to ObjectDetector default)')
+    parser.add_argument('--stub', action='store_true', help='use a stub model instead of YOLOv5')
+    parser.add_argument('--stub-call-ms', type=float, default=20.0,
+                        help='stub fixed cost per forward pass')
+    parser.add_argument('--stub-frame-ms', type=float, default=5.0,
+                        help='stub incremental cost per frame in a batch')
+    args = parser.parse_args(argv)
+
+    if args.stub:
+        from benchmarks.stubs import StubObjectDetector
+        detector = StubObjectDetector(weights_mb=0, call_ms=args.stub_call_ms,
+                                      frame_ms=args.stub_frame_ms)
+    else:
+        from ml_models.cheating_detection.object_detector import ObjectDetector
+        detector = ObjectDetector(args.model) if args.model else ObjectDetector()
+
+    frame = synthetic_frame(640, 480)
+    results = [
+        run_batch_size(detector, int(size), args.window_ms, args.duration, frame)
+        for size in args.batch_sizes.split(',')
+    ]
+    emit({'cores': _cores(), 'window_ms': args.window_ms, 'results': results})
+
+
+if __name__ == '__main__':
+    main()
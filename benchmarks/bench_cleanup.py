@@ -0,0 +1,128 @@
+"""Old-session cleanup: ORM cascade delete vs chunked bulk deletes.
+
+Run from the repository root::
+
+    python -m benchmarks.bench_cleanup --sessions 400 --logs-per-session 500
+
+Seeds expired sessions with answers, monitoring logs, rollups and
+aggregates (plus one evidence blob per session, referenced by its first
+ten events) in a temporary SQLite
+database. ``orm`` is the previous cleanup_old_sessions, which loads each
+session and lets relationship cascades delete its rows; ``chunked`` is the
+current task. Each mode gets freshly seeded data.
+"""
+import argparse
+import hashlib
+import os
+import shutil
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from benchmarks.common import emit
+
+
+def seed(db, sessions, logs_per_session, evidence_dir):
+    from sqlalchemy import insert
+    from app.evidence import blob_path
+    from app.log_writer import (aggregate_rows, blob_rows, rollup_rows, upsert_aggregates,
+                                upsert_blobs, upsert_rollups)
+    from app.models.exam import Answer, ExamSession
+    from app.models.monitoring import MonitoringLog
+
+    ended = datetime.utcnow() - timedelta(days=60)
+    db.session.execute(insert(ExamSession), [
+        {'id': i, 'exam_id': 1, 'student_id': 1, 'status': 'completed',
+         'start_time': ended - timedelta(hours=1), 'end_time': ended}
+        for i in range(1, sessions + 1)
+    ])
+    db.session.execute(insert(Answer), [
+        {'session_id': i, 'question_id': q, 'answer_text': 'answer'}
+        for i in range(1, sessions + 1) for q in range(1, 11)
+    ])
+    for i in range(1, sessions + 1):
+        content = b'\xff\xd8' + f'session {i}'.encode() + b'\xff\xd9'
+        evidence = blob_path(hashlib.sha256(content).hexdigest())
+        os.makedirs(os.path.dirname(os.path.join(evidence_dir, evidence)), exist_ok=True)
+        with open(os.path.join(evidence_dir, evidence), 'wb') as f:
+            f.write(content)
+        rows = [{
+            'session_id': i,
+            'activity_type': 'phone_detected',
+            'confidence_score': 0.9,
+            'details': '"seeded"',
+            'video_frame_path': evidence if n < 10 else None,
+            'timestamp': ended - timedelta(seconds=2 * n),
+        } for n in range(logs_per_session)]
+        db.session.execute(insert(MonitoringLog), rows)
+        upsert_rollups(db.session, rollup_rows(rows))
+        upsert_aggregates(db.session, aggregate_rows(rows))
+        upsert_blobs(db.session, blob_rows(rows))
+    db.session.commit()
+
+
+def orm_cleanup(db):
+    """The cleanup_old_sessions implementation this replaces"""
+    from app.models.exam import ExamSession
+
+    cutoff_date = datetime.utcnow() - timedelta(days=30)
+    old_sessions = ExamSession.query.filter(ExamSession.end_time < cutoff_date).all()
+    count = len(old_sessions)
+    for session in old_sessions:
+        db.session.delete(session)
+    db.session.commit()
+    return {'deleted': count}
+
+
+def remaining(db):
+    tables = ('exam_sessions', 'answers', 'monitoring_logs', 'monitoring_rollups',
+              'session_activity_aggregates', 'evidence_blobs')
+    return {t: db.session.execute(db.text(f'SELECT COUNT(*) FROM {t}')).scalar() for t in tables}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sessions', type=int, default=400)
+    parser.add_argument('--logs-per-session', type=int, default=500)
+    parser.add_argument('--chunk-size', type=int, default=200, help='sessions per transaction')
+    args = parser.parse_args(argv)
+
+    directory = tempfile.mkdtemp()
+    os.environ['TEST_DATABASE_URL'] = f'sqlite:///{os.path.join(directory, "cleanup.db")}'
+    from app import create_app, db
+    from app.tasks import cleanup_old_sessions
+
+    app = create_app('testing')
+    app.config['UPLOAD_FOLDER'] = directory
+    evidence_dir = os.path.join(directory, 'evidence')
+
+    results = {}
+    for mode in ('orm', 'chunked'):
+        with app.app_context():
+            db.drop_all()
+            db.create_all()
+            shutil.rmtree(evidence_dir, ignore_errors=True)
+            os.makedirs(evidence_dir)
+            seed(db, args.sessions, args.logs_per_session, evidence_dir)
+
+            start = time.perf_counter()
+            if mode == 'orm':
+                result = orm_cleanup(db)
+            else:
+                result = cleanup_old_sessions(chunk_size=args.chunk_size)
+            elapsed = time.perf_counter() - start
+
+            result['seconds'] = round(elapsed, 3)
+            result['remaining_rows'] = remaining(db)
+            result['remaining_evidence_files'] = sum(
+                len(names) for _, _, names in os.walk(evidence_dir))
+            results[mode] = result
+
+    results['speedup'] = round(results['orm']['seconds'] / results['chunked']['seconds'], 1)
+    emit({'sessions': args.sessions, 'logs_per_session': args.logs_per_session,
+          'results': results})
+    shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+"""Cost of saving evidence frames on the analysis path.
+
+Run from the repository root::
+
+    python -m benchmarks.bench_evidence --frames 300 --width 1280 --height 720
+
+``imwrite`` is the old ActivityMonitor.save_evidence: re-encode the
+decoded frame and write it synchronously. ``writer`` queues the client's
+original JPEG bytes on EvidenceWriter; the caller only pays for hashing
+and the enqueue, and the drain time covers the background writes. Every
+frame is distinct and near-duplicate reuse is off, so each one is written;
+see bench_evidence_store for deduplication.
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+import cv2
+
+from benchmarks.common import emit, summarize, synthetic_frame
+
+
+class _App:
+    def __init__(self, upload_folder, workers, queue_size):
+        self.config = {'UPLOAD_FOLDER': upload_folder, 'EVIDENCE_WORKERS': workers,
+                       'EVIDENCE_QUEUE_SIZE': queue_size, 'EVIDENCE_DHASH_DISTANCE': 0}
+        self.extensions = {}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--frames', type=int, default=300)
+    parser.add_argument('--width', type=int, default=1280)
+    parser.add_argument('--height', type=int, default=720)
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--queue-size', type=int, default=1024)
+    args = parser.parse_args(argv)
+
+    from app.evidence import EvidenceWriter
+
+    frame = synthetic_frame(args.width, args.height)
+    jpeg = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 70])[1].tobytes()
+    # Distinct content per frame: a counter in a JPEG comment segment
+    jpegs = [jpeg[:2] + b'\xff\xfe\x00\x06' + i.to_bytes(4, 'big') + jpeg[2:]
+             for i in range(args.frames)]
+    directory = tempfile.mkdtemp()
+
+    legacy_dir = os.path.join(directory, 'legacy')
+    os.makedirs(legacy_dir)
+    latencies = []
+    start = time.perf_counter()
+    for i in range(args.frames):
+        t0 = time.perf_counter()
+        cv2.imwrite(os.path.join(legacy_dir, f'1_phone_detected_{i}.jpg'), frame)
+        latencies.append(time.perf_counter() - t0)
+    imwrite = summarize(latencies, time.perf_counter() - start)
+
+    writer = EvidenceWriter(_App(directory, args.workers, args.queue_size))
+    latencies = []
+    start = time.perf_counter()
+    for i in range(args.frames):
+        t0 = time.perf_counter()
+        writer.save(i % 20, jpeg_bytes=jpegs[i])
+        latencies.append(time.perf_counter() - t0)
+    enqueue = summarize(latencies, time.perf_counter() - start)
+    writer.shutdown(timeout=60.0)
+    drained = time.perf_counter() - start
+
+    emit({
+        'frame_shape': list(frame.shape),
+        'jpeg_bytes': len(jpeg),
+        'imwrite': imwrite,
+        'writer': dict(enqueue, drain_s=round(drained, 4),
+                       files_per_s=round(writer.written / drained, 1), **writer.get_stats()),
+    })
+    shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+"""Per-session frame buffer memory and evidence clip writes.
+
+Run from the repository root::
+
+    python -m benchmarks.bench_evidence_clips --sessions 50 --frames 60 --width 1280 --height 720
+
+``ndarray_buffer`` is the old ActivityMonitor.frame_buffer: up to 10
+decoded BGR frames per session. ``jpeg_ring`` is the FrameRing that
+replaces it, holding the client's JPEG bytes. Frames arrive every
+``--interval`` seconds of simulated time; each session has one
+phone_detected event halfway through, recorded as a clip by EvidenceWriter.
+"""
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import time
+from collections import deque
+from datetime import datetime, timedelta
+
+import cv2
+
+from benchmarks.common import emit, summarize, synthetic_frame
+
+
+class _App:
+    def __init__(self, upload_folder):
+        self.config = {'UPLOAD_FOLDER': upload_folder, 'EVIDENCE_WORKERS': 2,
+                       'EVIDENCE_QUEUE_SIZE': 1024,
+                       'EVIDENCE_CLIP_ACTIVITIES': ['phone_detected'],
+                       'EVIDENCE_CLIP_PRE_SECONDS': 6.0, 'EVIDENCE_CLIP_POST_SECONDS': 6.0}
+        self.extensions = {}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sessions', type=int, default=50)
+    parser.add_argument('--frames', type=int, default=60, help='frames per session')
+    parser.add_argument('--interval', type=float, default=2.0, help='seconds between frames')
+    parser.add_argument('--width', type=int, default=1280)
+    parser.add_argument('--height', type=int, default=720)
+    parser.add_argument('--ring-frames', type=int, default=15)
+    parser.add_argument('--ring-bytes', type=int, default=4 * 1024 * 1024)
+    args = parser.parse_args(argv)
+
+    from app.evidence import EvidenceWriter
+    from ml_models.cheating_detection.frame_ring import FrameRing
+
+    frame = synthetic_frame(args.width, args.height)
+    jpeg = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 70])[1].tobytes()
+    start_time = datetime.now()
+
+    # Old buffer: decoded frames, only appended when an activity fired
+    legacy = [deque(maxlen=10) for _ in range(args.sessions)]
+    for buffer in legacy:
+        for i in range(args.frames):
+            buffer.append((frame.copy(), start_time))
+    legacy_bytes = sum(f.nbytes for buffer in legacy for f, _ in buffer)
+    legacy = None
+
+    directory = tempfile.mkdtemp()
+    writer = EvidenceWriter(_App(directory))
+    rings = [FrameRing(args.ring_frames, args.ring_bytes) for _ in range(args.sessions)]
+    event_frame = args.frames // 2
+    appends = []
+    clip_calls = []
+    manifests = []
+    peak_pending = {'pending_clips': 0, 'pending_clip_bytes': 0}
+    start = time.perf_counter()
+    for i in range(args.frames):
+        timestamp = start_time + timedelta(seconds=i * args.interval)
+        for session_id, ring in enumerate(rings, 1):
+            t0 = time.perf_counter()
+            ring.append(timestamp, jpeg)
+            appends.append(time.perf_counter() - t0)
+
+            t0 = time.perf_counter()
+            if i == event_frame:
+                manifests.append(writer.start_clip(1, session_id, 'phone_detected', timestamp, ring))
+            writer.add_clip_frame(session_id, *ring.latest())
+            clip_calls.append(time.perf_counter() - t0)
+        pending = writer.pending_clip_stats()
+        if pending['pending_clip_bytes'] > peak_pending['pending_clip_bytes']:
+            peak_pending = pending
+    writer.shutdown(timeout=60.0)
+    elapsed = time.perf_counter() - start
+
+    with open(os.path.join(writer.root, manifests[0])) as f:
+        manifest = json.load(f)
+    ring_bytes = sum(ring.bytes for ring in rings)
+
+    emit({
+        'sessions': args.sessions,
+        'frame_shape': list(frame.shape),
+        'jpeg_bytes': len(jpeg),
+        'ndarray_buffer': {'bytes_per_session': legacy_bytes // args.sessions,
+                           'total_mb': round(legacy_bytes / 2 ** 20, 1)},
+        'jpeg_ring': dict(rings[0].get_stats(), total_mb=round(ring_bytes / 2 ** 20, 2)),
+        'memory_ratio': round(legacy_bytes / ring_bytes, 1),
+        'ring_append': summarize(appends, elapsed),
+        'clip_calls': summarize(clip_calls, elapsed),
+        'peak_pending_clips': peak_pending,
+        'clip': {'frames': len(manifest['frames']),
+                 'offsets': [f['offset'] for f in manifest['frames']]},
+        'writer': writer.get_stats(),
+    })
+    shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+"""Evidence files and bytes written with and without near-duplicate reuse.
+
+Run from the repository root::
+
+    python -m benchmarks.bench_evidence_store --sessions 10 --events 120 --scene-every 30
+
+Each session saves ``--events`` evidence frames in a row, as when a phone
+is held up for a minute: sensor noise makes every JPEG different, and the
+scene changes every ``--scene-every`` events. ``exact`` only shares blobs
+with identical bytes (EVIDENCE_DHASH_DISTANCE=0); ``near`` also reuses the
+session's last stored frame when the difference hashes are close. Every
+returned path is checked to exist once the writer has drained.
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+from benchmarks.common import emit, summarize, synthetic_frame
+
+
+class _App:
+    def __init__(self, upload_folder, distance):
+        self.config = {'UPLOAD_FOLDER': upload_folder, 'EVIDENCE_WORKERS': 2,
+                       'EVIDENCE_QUEUE_SIZE': 4096, 'EVIDENCE_DHASH_DISTANCE': distance}
+        self.extensions = {}
+
+
+def make_events(sessions, events, scene_every, width, height):
+    """(session_id, frame, jpeg_bytes) per event, interleaved across sessions"""
+    rng = np.random.default_rng(1)
+    scenes = {}
+    result = []
+    for n in range(events):
+        for session_id in range(1, sessions + 1):
+            key = (session_id, n // scene_every)
+            if key not in scenes:
+                # A new scene: shifted texture with the phone somewhere else
+                scene = np.roll(synthetic_frame(width, height, seed=len(scenes)),
+                                len(scenes) * width // 7, axis=1)
+                x = int(rng.integers(0, width - width // 6))
+                cv2.rectangle(scene, (x, height // 4), (x + width // 6, height // 4 * 3),
+                              (20, 20, 20), -1)
+                scenes[key] = scene
+            noise = rng.integers(-3, 4, size=scenes[key].shape)
+            frame = np.clip(scenes[key] + noise, 0, 255).astype(np.uint8)
+            jpeg = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 70])[1].tobytes()
+            result.append((session_id, frame, jpeg))
+    return result
+
+
+def run(events, distance):
+    from app.evidence import EvidenceWriter
+
+    directory = tempfile.mkdtemp()
+    writer = EvidenceWriter(_App(directory, distance))
+    latencies = []
+    paths = []
+    start = time.perf_counter()
+    for session_id, frame, jpeg in events:
+        t0 = time.perf_counter()
+        paths.append(writer.save(session_id, jpeg_bytes=jpeg, frame=frame))
+        latencies.append(time.perf_counter() - t0)
+    writer.shutdown(timeout=60.0)
+    elapsed = time.perf_counter() - start
+
+    files = sum(len(names) for _, _, names in os.walk(writer.root))
+    disk_bytes = sum(os.path.getsize(os.path.join(root, name))
+                     for root, _, names in os.walk(writer.root) for name in names)
+    result = {
+        'save': summarize(latencies, elapsed),
+        'files': files,
+        'disk_mb': round(disk_bytes / 2 ** 20, 2),
+        'distinct_pointers': len(set(paths)),
+        'dangling_pointers': sum(1 for p in paths
+                                 if p is None or not os.path.exists(os.path.join(writer.root, p))),
+    }
+    result.update(writer.get_stats())
+    shutil.rmtree(directory)
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sessions', type=int, default=10)
+    parser.add_argument('--events', type=int, default=120, help='evidence frames per session')
+    parser.add_argument('--scene-every', type=int, default=30)
+    parser.add_argument('--distance', type=int, default=2, help='EVIDENCE_DHASH_DISTANCE for near')
+    parser.add_argument('--width', type=int, default=1280)
+    parser.add_argument('--height', type=int, default=720)
+    args = parser.parse_args(argv)
+
+    events = make_events(args.sessions, args.events, args.scene_every, args.width, args.height)
+    exact = run(events, 0)
+    near = run(events, args.distance)
+    emit({
+        'events': len(events),
+        'exact': exact,
+        'near': near,
+        'file_reduction': round(exact['files'] / max(near['files'], 1), 1),
+    })
+
+
+if __name__ == '__main__':
+    main()
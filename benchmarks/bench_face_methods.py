@@ -0,0 +1,86 @@
+"""Latency and face-count accuracy of each FaceDetector method.
+
+Run from the repository root::
+
+    python -m benchmarks.bench_face_methods --frames labelled/ \\
+        --methods haar,opencv_dnn,mtcnn,cascade --cascade-grid 0.3:0.8,0.4:0.9
+
+``labelled/`` holds JPEG frames plus a ``labels.json`` mapping each file
+name to its true face count. Frames are replayed in file-name order, so
+a directory cut from one recording behaves like a live session for the
+cascade's face-count-change rule.
+"""
+import argparse
+import json
+import os
+import time
+
+import cv2
+
+from benchmarks.common import IMAGE_EXTENSIONS, emit, percentiles
+
+
+def load_labelled(path):
+    with open(os.path.join(path, 'labels.json')) as f:
+        labels = json.load(f)
+    frames = []
+    for name in sorted(labels):
+        if name.lower().endswith(IMAGE_EXTENSIONS):
+            frame = cv2.imread(os.path.join(path, name))
+            if frame is not None:
+                frames.append((frame, int(labels[name])))
+    return frames
+
+
+def evaluate(detector, frames):
+    latencies = []
+    correct = 0
+    previous = None
+    for frame, expected in frames:
+        t0 = time.perf_counter()
+        faces = detector.detect_faces(frame, previous_count=previous)
+        latencies.append(time.perf_counter() - t0)
+        previous = len(faces)
+        correct += previous == expected
+
+    result = {
+        'frames': len(frames),
+        'count_accuracy': round(correct / len(frames), 4),
+        'mean_ms': round(sum(latencies) / len(latencies) * 1000.0, 3),
+    }
+    result.update(percentiles(latencies))
+    result.update(detector.get_stats())
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--frames', required=True, help='directory of frames with labels.json')
+    parser.add_argument('--methods', default='haar,opencv_dnn,mtcnn,cascade')
+    parser.add_argument('--cascade-grid', default='0.3:0.8',
+                        help='comma separated low:high escalation thresholds for cascade')
+    args = parser.parse_args(argv)
+
+    from ml_models.cheating_detection.face_detector import FaceDetector
+
+    frames = load_labelled(args.frames)
+    results = {}
+    for method in args.methods.split(','):
+        if method == 'cascade':
+            for pair in args.cascade_grid.split(','):
+                low, high = (float(x) for x in pair.split(':'))
+                detector = FaceDetector(method='cascade', cascade_low=low, cascade_high=high)
+                results[f'cascade[{low}:{high}]'] = evaluate(detector, frames)
+            continue
+        try:
+            detector = FaceDetector(method=method)
+        except Exception as e:
+            results[method] = {'error': str(e)}
+            continue
+        results[method] = evaluate(detector, frames)
+
+    emit({'frames': len(frames), 'methods': results})
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+"""Per-frame face localisation latency with and without tracking.
+
+Run from the repository root::
+
+    python -m benchmarks.bench_face_tracking --clip session.mp4 --method haar --interval 5
+
+Without ``--clip`` a synthetic clip is used (it contains no faces, so it
+only exercises the detect-every-frame path).
+"""
+import argparse
+import time
+
+from benchmarks.common import emit, load_frames, percentiles, synthetic_clip
+
+
+def replay(frames, locate):
+    latencies = []
+    counts = []
+    previous = None
+    for frame in frames:
+        t0 = time.perf_counter()
+        faces = locate(frame, previous)
+        latencies.append(time.perf_counter() - t0)
+        previous = len(faces)
+        counts.append(previous)
+    result = {'mean_ms': round(sum(latencies) / len(latencies) * 1000.0, 3)}
+    result.update(percentiles(latencies))
+    return result, counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--clip', help='video file or directory of frames')
+    parser.add_argument('--limit', type=int)
+    parser.add_argument('--method', default='mtcnn')
+    parser.add_argument('--interval', type=int, default=5, help='frames per full detection')
+    args = parser.parse_args(argv)
+
+    from ml_models.cheating_detection.face_detector import FaceDetector
+    from ml_models.cheating_detection.face_tracker import FaceTracker
+
+    frames = load_frames(args.clip, args.limit) if args.clip else synthetic_clip()
+    detector = FaceDetector(method=args.method)
+    tracker = FaceTracker(detector, detect_interval=args.interval)
+
+    detect_only, reference = replay(
+        frames, lambda frame, prev: detector.detect_faces(frame, previous_count=prev))
+    tracked, counts = replay(
+        frames, lambda frame, prev: tracker.update(frame, previous_count=prev))
+
+    agreement = sum(a == b for a, b in zip(reference, counts)) / len(frames)
+    emit({
+        'frames': len(frames),
+        'method': args.method,
+        'interval': args.interval,
+        'detection_only': detect_only,
+        'tracking': dict(tracked, **tracker.get_stats()),
+        'face_count_agreement': round(agreement, 4),
+    })
+
+
+if __name__ == '__main__':
+    main()
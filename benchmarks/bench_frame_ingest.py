@@ -0,0 +1,108 @@
+"""Compare the JSON/base64 and binary frame ingestion routes.
+
+Run from the repository root::
+
+    python -m benchmarks.bench_frame_ingest --requests 500
+
+Detector work is replaced by a no-op monitor so the numbers isolate
+request parsing; both routes hand the frame to the analysis pipeline and
+return 202.
+"""
+import argparse
+import base64
+import json
+import time
+from datetime import datetime
+
+import cv2
+
+from benchmarks.common import emit, summarize, synthetic_frame
+from ml_models.cheating_detection.frame_ring import FrameRing
+
+
+class _NullMonitor:
+    def __init__(self):
+        self.frame_buffer = FrameRing()
+
+    def analyze_frame(self, frame, audio_data=None, jpeg_bytes=None):
+        if jpeg_bytes is not None:
+            self.frame_buffer.append(datetime.now(), jpeg_bytes)
+        return []
+
+
+def _build_client():
+    from app import create_app, db
+    from app.models.user import User
+    from app.routes import api
+
+    app = create_app('testing')
+    with app.app_context():
+        db.create_all()
+        user = User(username='bench', email='bench@example.com')
+        user.set_password('bench')
+        db.session.add(user)
+        db.session.commit()
+
+    api.active_monitors[1] = _NullMonitor()
+    client = app.test_client()
+    client.post('/auth/login', data={'username': 'bench', 'password': 'bench'})
+    return client
+
+
+def _run(client, count, **kwargs):
+    latencies = []
+    start = time.perf_counter()
+    for _ in range(count):
+        t0 = time.perf_counter()
+        response = client.post(**kwargs)
+        latencies.append(time.perf_counter() - t0)
+        if response.status_code not in (200, 202):
+            raise RuntimeError(f"{kwargs['path']} returned {response.status_code}")
+    return summarize(latencies, time.perf_counter() - start)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=300)
+    parser.add_argument('--image', help='JPEG file to send instead of a synthetic frame')
+    parser.add_argument('--width', type=int, default=1280)
+    parser.add_argument('--height', type=int, default=720)
+    parser.add_argument('--quality', type=int, default=70)
+    args = parser.parse_args(argv)
+
+    if args.image:
+        with open(args.image, 'rb') as f:
+            jpeg = f.read()
+    else:
+        frame = synthetic_frame(args.width, args.height)
+        ok, encoded = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, args.quality])
+        jpeg = encoded.tobytes()
+
+    json_body = json.dumps({
+        'session_id': 1,
+        'frame': 'data:image/jpeg;base64,' + base64.b64encode(jpeg).decode('ascii'),
+    }).encode('utf-8')
+
+    from app import frame_pipeline
+
+    client = _build_client()
+    result = {
+        'jpeg_bytes': len(jpeg),
+        'json': dict(
+            bytes_per_frame=len(json_body),
+            **_run(client, args.requests, path='/api/submit_frame',
+                   data=json_body, content_type='application/json'),
+        ),
+        'binary': dict(
+            bytes_per_frame=len(jpeg),
+            **_run(client, args.requests, path='/api/submit_frame/binary',
+                   data=jpeg, content_type='image/jpeg',
+                   headers={'X-Session-Id': '1'}),
+        ),
+    }
+    frame_pipeline.shutdown()
+    emit(result)
+
+
+if __name__ == '__main__':
+    main()
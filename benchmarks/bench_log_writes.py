@@ -0,0 +1,133 @@
+"""MonitoringLog inserts per second: commit per row vs the buffered writer.
+
+Run from the repository root::
+
+    python -m benchmarks.bench_log_writes --rows 5000 --threads 4 --batch-sizes 50,200,1000
+
+Writer threads stand in for the frame pipeline workers and request
+handlers that record activities concurrently. ``per_row`` is the old
+add-and-commit per activity; ``buffered[N]`` queues rows in
+MonitoringLogWriter with LOG_BATCH_SIZE=N and ends with the flush done
+when an exam session ends. Tables are recreated before each mode in a
+temporary SQLite file unless ``--database-url`` points at another database.
+"""
+import argparse
+import json
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+from benchmarks.common import emit
+
+ACTIVITY_TYPES = ('multiple_faces', 'phone_detected', 'voice_detected', 'tab_switch')
+
+
+def make_app(database_url, batch_size):
+    os.environ['TEST_DATABASE_URL'] = database_url
+    from app import create_app, db
+
+    app = create_app('testing')
+    app.config['LOG_BATCH_SIZE'] = batch_size
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+    return app
+
+
+def row(i):
+    return {
+        'session_id': i % 50 + 1,
+        'activity_type': ACTIVITY_TYPES[i % len(ACTIVITY_TYPES)],
+        'confidence_score': 0.9,
+        'details': json.dumps(f'row {i}'),
+        'timestamp': datetime.utcnow(),
+    }
+
+
+def run_threads(count, threads, target):
+    per_thread = count // threads
+    workers = [threading.Thread(target=target, args=(t * per_thread, per_thread))
+               for t in range(threads)]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return time.perf_counter() - start, per_thread * threads
+
+
+def per_row(app, count, threads):
+    from app import db
+    from app.models.monitoring import MonitoringLog
+
+    def write(first, n):
+        with app.app_context():
+            for i in range(first, first + n):
+                db.session.add(MonitoringLog(**row(i)))
+                db.session.commit()
+
+    elapsed, written = run_threads(count, threads, write)
+    return {'rows': written, 'seconds': round(elapsed, 3),
+            'inserts_per_s': round(written / elapsed, 1)}
+
+
+def buffered(app, count, threads, batch_size):
+    from app.log_writer import MonitoringLogWriter
+
+    log_writer = MonitoringLogWriter(app)
+
+    def write(first, n):
+        for i in range(first, first + n):
+            log_writer.add(**row(i))
+
+    elapsed, written = run_threads(count, threads, write)
+    # Session end: everything queued is durable once flush() returns
+    start = time.perf_counter()
+    log_writer.flush()
+    flush_s = time.perf_counter() - start
+    elapsed += flush_s
+
+    result = {'rows': written, 'seconds': round(elapsed, 3),
+              'inserts_per_s': round(written / elapsed, 1),
+              'final_flush_ms': round(flush_s * 1000.0, 2)}
+    result.update(log_writer.get_stats())
+    log_writer.close()
+    return result
+
+
+def count_rows(app):
+    from app.models.monitoring import MonitoringLog
+
+    with app.app_context():
+        return MonitoringLog.query.count()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=5000)
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--batch-sizes', default='50,200,1000')
+    parser.add_argument('--database-url', help='defaults to a temporary SQLite file')
+    args = parser.parse_args(argv)
+
+    directory = tempfile.mkdtemp()
+    database_url = args.database_url or f'sqlite:///{os.path.join(directory, "logs.db")}'
+
+    app = make_app(database_url, 1)
+    results = {'per_row': per_row(app, args.rows, args.threads)}
+    results['per_row']['stored'] = count_rows(app)
+
+    for batch_size in (int(b) for b in args.batch_sizes.split(',')):
+        app = make_app(database_url, batch_size)
+        result = buffered(app, args.rows, args.threads, batch_size)
+        result['stored'] = count_rows(app)
+        result['speedup'] = round(result['inserts_per_s'] / results['per_row']['inserts_per_s'], 1)
+        results[f'buffered[{batch_size}]'] = result
+
+    emit({'database': database_url.split(':', 1)[0], 'threads': args.threads, 'results': results})
+
+
+if __name__ == '__main__':
+    main()
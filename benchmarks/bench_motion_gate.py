@@ -0,0 +1,97 @@
+"""CPU per frame and alert recall with and without motion gating.
+
+Run from the repository root::
+
+    python -m benchmarks.bench_motion_gate --clips recordings/ [--stub]
+
+``--clips`` is a directory of video files and/or sub-directories of JPEG
+frames; without it a synthetic clip is used. Alerts from the ungated run
+are the reference: recall is the share of (frame, activity type) alerts
+the gated run still raises.
+"""
+import argparse
+import os
+import time
+
+from benchmarks.common import VIDEO_EXTENSIONS, emit, load_frames, synthetic_clip
+
+BASE_CONFIG = {
+    'ABSENCE_DURATION_THRESHOLD': 10,
+    'CHEATING_CONFIDENCE_THRESHOLD': 0.7,
+}
+
+
+def find_clips(path):
+    clips = {}
+    for name in sorted(os.listdir(path)):
+        full = os.path.join(path, name)
+        if os.path.isdir(full) or name.lower().endswith(VIDEO_EXTENSIONS):
+            clips[name] = full
+    return clips
+
+
+def replay(frames, config):
+    from ml_models.cheating_detection.activity_monitor import ActivityMonitor
+
+    monitor = ActivityMonitor(config)
+    alerts = set()
+    cpu_start = time.process_time()
+    for index, frame in enumerate(frames):
+        for activity in monitor.analyze_frame(frame):
+            alerts.add((index, activity['type']))
+    cpu = time.process_time() - cpu_start
+
+    result = {'cpu_ms_per_frame': round(cpu / len(frames) * 1000.0, 3)}
+    if monitor.motion_gate is not None:
+        result.update(monitor.motion_gate.get_stats())
+    return result, alerts
+
+
+def run_clip(frames, threshold, max_interval):
+    ungated, reference = replay(frames, dict(BASE_CONFIG, MOTION_GATE_THRESHOLD=0))
+    gated, alerts = replay(frames, dict(BASE_CONFIG, MOTION_GATE_THRESHOLD=threshold,
+                                        MOTION_GATE_MAX_INTERVAL=max_interval))
+    recall = len(reference & alerts) / len(reference) if reference else None
+    return {
+        'frames': len(frames),
+        'ungated': ungated,
+        'gated': gated,
+        'reference_alerts': len(reference),
+        'alert_recall': recall,
+        'cpu_reduction': round(1 - gated['cpu_ms_per_frame'] / ungated['cpu_ms_per_frame'], 3)
+        if ungated['cpu_ms_per_frame'] else None,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--clips', help='directory of recorded clips')
+    parser.add_argument('--limit', type=int, help='maximum frames per clip')
+    parser.add_argument('--threshold', type=float, default=4.0)
+    parser.add_argument('--max-interval', type=int, default=5)
+    parser.add_argument('--stub', action='store_true',
+                        help='use stub detectors with a fixed CPU cost per frame; the object '
+                        'stub reports a phone wherever a white block is in view')
+    args = parser.parse_args(argv)
+
+    if args.stub:
+        from benchmarks import stubs
+        # Phones are "seen" while the synthetic clip's square is in view,
+        # so the gated run has reference alerts to lose
+        stubs.install(face_mb=0, object_mb=0, face_ms=30.0, object_ms=60.0,
+                      object_detector=stubs.StubPhoneDetector)
+
+    if args.clips:
+        clips = {name: load_frames(path, args.limit) for name, path in find_clips(args.clips).items()}
+    else:
+        clips = {'synthetic': synthetic_clip()}
+
+    results = {
+        name: run_clip(frames, args.threshold, args.max_interval)
+        for name, frames in clips.items() if frames
+    }
+    emit({'threshold': args.threshold, 'max_interval': args.max_interval, 'clips': results})
+
+
+if __name__ == '__main__':
+    main()
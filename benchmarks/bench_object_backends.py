@@ -0,0 +1,85 @@
+"""Parity and throughput of the torch and ONNX object detector backends.
+
+Run from the repository root::
+
+    python -m benchmarks.bench_object_backends --clip session.mp4 \\
+        --torch-model ml_models/yolov5/yolov5s.pt --onnx-model ml_models/yolov5/yolov5s.onnx
+
+Export the ONNX model with YOLOv5's ``export.py --include onnx``. A
+torch detection counts as matched when the ONNX backend reports the same
+class with IoU >= --iou and a confidence within --conf-tol. The command
+exits with status 1 when the match rate is below --min-parity.
+"""
+import argparse
+import sys
+import time
+
+from benchmarks.common import emit, load_frames, percentiles, synthetic_clip
+from ml_models.cheating_detection.face_tracker import box_iou
+
+
+def run(detector, frames):
+    outputs = []
+    latencies = []
+    start = time.perf_counter()
+    for frame in frames:
+        t0 = time.perf_counter()
+        outputs.append(detector.detect_objects(frame))
+        latencies.append(time.perf_counter() - t0)
+    elapsed = time.perf_counter() - start
+    stats = {'frames_per_s': round(len(frames) / elapsed, 2)}
+    stats.update(percentiles(latencies))
+    return outputs, stats
+
+
+def match_rate(reference, candidate, iou, conf_tol):
+    total = matched = 0
+    for ref_dets, cand_dets in zip(reference, candidate):
+        remaining = list(cand_dets)
+        for ref in ref_dets:
+            total += 1
+            for cand in remaining:
+                if (cand['class'] == ref['class']
+                        and box_iou(cand['bbox'], ref['bbox']) >= iou
+                        and abs(cand['confidence'] - ref['confidence']) <= conf_tol):
+                    remaining.remove(cand)
+                    matched += 1
+                    break
+    return matched / total if total else 1.0, total
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--clip', help='video file or directory of frames')
+    parser.add_argument('--limit', type=int, default=200)
+    parser.add_argument('--torch-model', default='ml_models/yolov5/yolov5s.pt')
+    parser.add_argument('--onnx-model', default='ml_models/yolov5/yolov5s.onnx')
+    parser.add_argument('--input-size', type=int, default=640)
+    parser.add_argument('--iou', type=float, default=0.9)
+    parser.add_argument('--conf-tol', type=float, default=0.05)
+    parser.add_argument('--min-parity', type=float, default=0.95)
+    args = parser.parse_args(argv)
+
+    from ml_models.cheating_detection.object_detector import ObjectDetector
+
+    frames = load_frames(args.clip, args.limit) if args.clip else synthetic_clip()
+    torch_detector = ObjectDetector(args.torch_model, input_size=args.input_size, backend='torch')
+    onnx_detector = ObjectDetector(args.onnx_model, input_size=args.input_size, backend='onnx')
+
+    torch_out, torch_stats = run(torch_detector, frames)
+    onnx_out, onnx_stats = run(onnx_detector, frames)
+    parity, compared = match_rate(torch_out, onnx_out, args.iou, args.conf_tol)
+
+    emit({
+        'frames': len(frames),
+        'torch': torch_stats,
+        'onnx': onnx_stats,
+        'reference_detections': compared,
+        'parity': round(parity, 4),
+    })
+    if parity < args.min_parity:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+"""Object detection post-processing cost per frame on crowded scenes.
+
+Run from the repository root::
+
+    python -m benchmarks.bench_postprocess --boxes 300
+
+``parse`` compares the per-box Python loop that used to turn YOLOv5
+output into detections with the vectorised parse_detections. ``decode``
+times decoding of a raw YOLOv5 output tensor (25200 candidates x 85)
+with every COCO class against decoding restricted to the target classes
+before NMS.
+"""
+import argparse
+import time
+
+import numpy as np
+
+from benchmarks.common import emit, percentiles
+from ml_models.cheating_detection.object_backends import COCO_NAMES, decode_predictions
+from ml_models.cheating_detection.object_detector import parse_detections
+
+TARGET_CLASSES = ['cell phone', 'laptop', 'book', 'person']
+
+
+def legacy_parse(pred, names, target_classes):
+    detections = []
+    for *box, conf, cls in pred:
+        class_name = names[int(cls)]
+        if class_name in target_classes:
+            detections.append({
+                'class': class_name,
+                'confidence': float(conf),
+                'bbox': [int(x) for x in box]
+            })
+    return detections
+
+
+def crowded_predictions(count, rng):
+    xy = rng.uniform(0, 600, size=(count, 2))
+    wh = rng.uniform(10, 120, size=(count, 2))
+    conf = rng.uniform(0.45, 1.0, size=(count, 1))
+    cls = rng.integers(0, len(COCO_NAMES), size=(count, 1))
+    return np.hstack([xy, xy + wh, conf, cls]).astype(np.float32)
+
+
+def raw_output(candidates, rng):
+    pred = np.zeros((candidates, 85), dtype=np.float32)
+    pred[:, :2] = rng.uniform(0, 640, size=(candidates, 2))
+    pred[:, 2:4] = rng.uniform(8, 160, size=(candidates, 2))
+    pred[:, 4] = rng.beta(0.5, 3.0, size=candidates)
+    pred[:, 5:] = rng.beta(0.5, 3.0, size=(candidates, 80))
+    return pred
+
+
+def timed(fn, repeats):
+    latencies = []
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        fn()
+        latencies.append(time.perf_counter() - t0)
+    result = {'mean_ms': round(float(np.mean(latencies)) * 1000.0, 4)}
+    result.update(percentiles(latencies))
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--boxes', type=int, default=300, help='detections per frame after NMS')
+    parser.add_argument('--candidates', type=int, default=25200, help='raw YOLOv5 candidates')
+    parser.add_argument('--repeats', type=int, default=200)
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(0)
+    names = np.array(COCO_NAMES, dtype=object)
+    target_ids = np.array([i for i, n in enumerate(COCO_NAMES) if n in TARGET_CLASSES])
+    pred = crowded_predictions(args.boxes, rng)
+    raw = raw_output(args.candidates, rng)
+
+    assert legacy_parse(pred, COCO_NAMES, TARGET_CLASSES) == parse_detections(pred, names, target_ids)
+
+    emit({
+        'boxes': args.boxes,
+        'parse': {
+            'per_box_loop': timed(lambda: legacy_parse(pred, COCO_NAMES, TARGET_CLASSES), args.repeats),
+            'vectorised': timed(lambda: parse_detections(pred, names, target_ids), args.repeats),
+        },
+        'decode': {
+            'all_classes': timed(lambda: decode_predictions(
+                raw, 1.0, (0, 0), (640, 640), 0.45, 0.45), args.repeats // 10 or 1),
+            'target_classes': timed(lambda: decode_predictions(
+                raw, 1.0, (0, 0), (640, 640), 0.45, 0.45, target_ids), args.repeats // 10 or 1),
+        },
+    })
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,160 @@
+"""Accuracy and speed of INT8 detector models against FP32.
+
+Run from the repository root::
+
+    python -m benchmarks.bench_quantization --frames samples/ \\
+        --yolo-fp32 ml_models/yolov5/yolov5s.onnx --yolo-int8 ml_models/yolov5/yolov5s.int8.onnx \\
+        --face-fp32 ml_models/weights/res10_300x300_ssd.onnx \\
+        --face-int8 ml_models/weights/res10_300x300_ssd.int8.onnx
+
+Ground truth comes from ``--labels`` (JSON mapping file name to a list of
+``{"class": ..., "bbox": [x1, y1, x2, y2]}``, with class "face" for
+faces); without it the FP32 model's own detections are the reference,
+so the INT8 numbers are directly the agreement with FP32. Models run on
+a single intra-op thread so frames/sec is per core.
+"""
+import argparse
+import json
+import os
+import time
+
+import cv2
+import numpy as np
+
+from benchmarks.common import IMAGE_EXTENSIONS, emit
+from ml_models.cheating_detection.face_tracker import box_iou
+
+CLASSES = ['cell phone', 'book', 'person']
+
+
+def average_precision(predictions, truths, iou_threshold=0.5):
+    """AP@iou and recall for one class
+
+    predictions: per frame list of (box, confidence); truths: per frame list of boxes.
+    """
+    total = sum(len(t) for t in truths)
+    if total == 0:
+        return None, None
+    scored = sorted(
+        ((conf, i, box) for i, preds in enumerate(predictions) for box, conf in preds),
+        key=lambda x: -x[0]
+    )
+    used = [[False] * len(t) for t in truths]
+    hits = []
+    for _, i, box in scored:
+        ious = [box_iou(box, gt) for gt in truths[i]]
+        best = int(np.argmax(ious)) if ious else -1
+        if best >= 0 and ious[best] >= iou_threshold and not used[i][best]:
+            used[i][best] = True
+            hits.append(1)
+        else:
+            hits.append(0)
+
+    if not hits:
+        return 0.0, 0.0
+    tp = np.cumsum(hits)
+    recall = tp / total
+    precision = tp / np.arange(1, len(hits) + 1)
+    # All-point interpolation
+    precision = np.maximum.accumulate(precision[::-1])[::-1]
+    recall_steps = np.diff(np.concatenate([[0.0], recall]))
+    return float(np.sum(recall_steps * precision)), float(recall[-1])
+
+
+def run_objects(model_path, frames, threads):
+    from ml_models.cheating_detection.object_backends import load_backend
+
+    backend = load_backend('onnx', model_path, target_classes=CLASSES, intra_op_threads=threads)
+    outputs = []
+    start = time.perf_counter()
+    for frame in frames:
+        pred = backend.infer([frame])[0]
+        outputs.append([
+            {'class': backend.names[int(cls)], 'bbox': box.tolist(), 'confidence': float(conf)}
+            for *box, conf, cls in (np.array(row) for row in pred)
+        ])
+    return outputs, len(frames) / (time.perf_counter() - start)
+
+
+def run_faces(model_path, frames):
+    from ml_models.cheating_detection.face_detector import FaceDetector
+
+    detector = FaceDetector(method='opencv_dnn', dnn_model=model_path)
+    outputs = []
+    start = time.perf_counter()
+    for frame in frames:
+        outputs.append([
+            {'class': 'face', 'bbox': list(f[:4]), 'confidence': float(f[4])}
+            for f in detector.detect_faces(frame)
+        ])
+    return outputs, len(frames) / (time.perf_counter() - start)
+
+
+def score(outputs, reference, classes):
+    metrics = {}
+    for cls in classes:
+        preds = [[(d['bbox'], d['confidence']) for d in frame if d['class'] == cls] for frame in outputs]
+        truths = [[d['bbox'] for d in frame if d['class'] == cls] for frame in reference]
+        ap, recall = average_precision(preds, truths)
+        metrics[cls] = {'ap50': ap, 'recall': recall}
+    return metrics
+
+
+def compare(fp32, int8, reference, classes):
+    fp32_out, fp32_fps = fp32
+    int8_out, int8_fps = int8
+    fp32_metrics = score(fp32_out, reference or fp32_out, classes)
+    int8_metrics = score(int8_out, reference or fp32_out, classes)
+    deltas = {}
+    for cls in classes:
+        deltas[cls] = {
+            key: (int8_metrics[cls][key] - fp32_metrics[cls][key])
+            if int8_metrics[cls][key] is not None else None
+            for key in ('ap50', 'recall')
+        }
+    return {
+        'fp32': {'frames_per_s_per_core': round(fp32_fps, 2), 'metrics': fp32_metrics},
+        'int8': {'frames_per_s_per_core': round(int8_fps, 2), 'metrics': int8_metrics},
+        'delta': deltas,
+        'speedup': round(int8_fps / fp32_fps, 3),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--frames', required=True)
+    parser.add_argument('--labels', help='ground truth JSON; defaults to FP32 detections')
+    parser.add_argument('--limit', type=int, default=500)
+    parser.add_argument('--yolo-fp32')
+    parser.add_argument('--yolo-int8')
+    parser.add_argument('--face-fp32')
+    parser.add_argument('--face-int8')
+    args = parser.parse_args(argv)
+
+    names = sorted(n for n in os.listdir(args.frames) if n.lower().endswith(IMAGE_EXTENSIONS))
+    names = names[:args.limit]
+    frames = [cv2.imread(os.path.join(args.frames, n)) for n in names]
+
+    reference = None
+    if args.labels:
+        with open(args.labels) as f:
+            labels = json.load(f)
+        reference = [labels.get(n, []) for n in names]
+
+    result = {'frames': len(frames), 'reference': 'labels' if reference else 'fp32'}
+    if args.yolo_fp32 and args.yolo_int8:
+        result['object'] = compare(
+            run_objects(args.yolo_fp32, frames, threads=1),
+            run_objects(args.yolo_int8, frames, threads=1),
+            reference, CLASSES
+        )
+    if args.face_fp32 and args.face_int8:
+        result['face'] = compare(
+            run_faces(args.face_fp32, frames), run_faces(args.face_int8, frames),
+            reference, ['face']
+        )
+    emit(result)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,132 @@
+"""Query plans and timings for the monitoring queries the app runs.
+
+Run from the repository root::
+
+    python -m benchmarks.bench_query_plans --rows 200000 --sessions 500
+
+Seeds a temporary SQLite database, then runs EXPLAIN QUERY PLAN and times
+each query as the routes build it. A plan that scans one of the
+monitoring tables instead of using an index is reported and the script exits with status 1,
+so it can guard schema changes.
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from benchmarks.common import emit
+
+TABLES = ('monitoring_logs', 'monitoring_rollups', 'session_activity_aggregates')
+ACTIVITY_TYPES = ('multiple_faces', 'phone_detected', 'voice_detected', 'tab_switch',
+                  'student_absent', 'suspicious_gaze')
+
+
+def seed(db, rows, sessions, days):
+    from sqlalchemy import insert
+    from app.log_writer import aggregate_rows, rollup_rows, upsert_aggregates, upsert_rollups
+    from app.models.monitoring import MonitoringLog
+
+    rng = random.Random(0)
+    now = datetime.utcnow()
+    batch = []
+    for i in range(rows):
+        batch.append({
+            'session_id': rng.randint(1, sessions),
+            'activity_type': rng.choice(ACTIVITY_TYPES),
+            'confidence_score': rng.random(),
+            'details': '"seeded"',
+            'timestamp': now - timedelta(seconds=rng.uniform(0, days * 86400)),
+        })
+        if len(batch) == 10000 or i == rows - 1:
+            db.session.execute(insert(MonitoringLog), batch)
+            upsert_rollups(db.session, rollup_rows(batch))
+            upsert_aggregates(db.session, aggregate_rows(batch))
+            batch = []
+    db.session.commit()
+
+
+def queries(db, session_id):
+    """The monitoring queries issued by the dashboard, review and report routes"""
+    from app.models.monitoring import MonitoringLog, MonitoringRollup, SessionActivityAggregate
+
+    today = datetime.utcnow().date()
+    return {
+        'dashboard_warnings_today': db.session.query(
+            db.func.coalesce(db.func.sum(MonitoringRollup.event_count), 0)
+        ).filter(MonitoringRollup.minute >= today),
+        'dashboard_session_counts': db.session.query(
+            MonitoringRollup.session_id, db.func.sum(MonitoringRollup.event_count)
+        ).filter(MonitoringRollup.session_id.in_(range(1, 21))).group_by(MonitoringRollup.session_id),
+        'review_session_timeline': MonitoringLog.query.filter_by(
+            session_id=session_id).order_by(MonitoringLog.timestamp),
+        'session_report_totals': SessionActivityAggregate.query.filter_by(session_id=session_id),
+        'session_report_recent_alerts': MonitoringLog.query.filter(
+            MonitoringLog.session_id == session_id, MonitoringLog.confidence_score > 0.7
+        ).order_by(MonitoringLog.timestamp.desc()).limit(100),
+        'session_activity_counts': db.session.query(
+            MonitoringLog.activity_type, db.func.count()
+        ).filter(MonitoringLog.session_id == session_id).group_by(MonitoringLog.activity_type),
+    }
+
+
+def explain(db, query):
+    statement = query.statement.compile(db.engine, compile_kwargs={'literal_binds': True})
+    rows = db.session.execute(db.text(f'EXPLAIN QUERY PLAN {statement}')).fetchall()
+    return [row[-1] for row in rows]
+
+
+def uses_scan(plan):
+    """True when a monitoring table is read without an index"""
+    for step in plan:
+        if step.startswith('SCAN') and 'INDEX' not in step \
+                and any(table in step.split() for table in TABLES):
+            return True
+    return False
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=200000)
+    parser.add_argument('--sessions', type=int, default=500)
+    parser.add_argument('--days', type=int, default=30, help='spread timestamps over this many days')
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args(argv)
+
+    path = os.path.join(tempfile.mkdtemp(), 'plans.db')
+    os.environ['TEST_DATABASE_URL'] = f'sqlite:///{path}'
+    from app import create_app, db
+
+    app = create_app('testing')
+    results = {}
+    failed = []
+    with app.app_context():
+        db.create_all()
+        start = time.perf_counter()
+        seed(db, args.rows, args.sessions, args.days)
+        seed_s = time.perf_counter() - start
+        db.session.execute(db.text('ANALYZE'))
+
+        for name, query in queries(db, args.sessions // 2).items():
+            plan = explain(db, query)
+            start = time.perf_counter()
+            for _ in range(args.repeat):
+                query.all()
+            elapsed = (time.perf_counter() - start) / args.repeat
+            scan = uses_scan(plan)
+            if scan:
+                failed.append(name)
+            results[name] = {'plan': plan, 'full_scan': scan,
+                             'mean_ms': round(elapsed * 1000.0, 3)}
+
+    emit({'rows': args.rows, 'sessions': args.sessions, 'seed_s': round(seed_s, 2),
+          'queries': results, 'full_scans': failed})
+    os.unlink(path)
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
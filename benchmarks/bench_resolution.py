@@ -0,0 +1,80 @@
+"""Detector latency and detection rate per inference resolution.
+
+Run from the repository root::
+
+    python -m benchmarks.bench_resolution --clip session.mp4 --sizes 0,960,640,480,320
+
+A size of 0 means the native frame size. The detection rate is the mean
+number of detections per frame; it is also reported relative to native
+resolution so lost detections at small sizes stand out.
+"""
+import argparse
+import time
+
+from benchmarks.common import emit, load_frames, percentiles, synthetic_clip
+
+
+def measure(detect, frames):
+    latencies = []
+    detections = 0
+    for frame in frames:
+        t0 = time.perf_counter()
+        found = detect(frame)
+        latencies.append(time.perf_counter() - t0)
+        detections += len(found)
+    result = {
+        'mean_ms': round(sum(latencies) / len(latencies) * 1000.0, 3),
+        'detections_per_frame': round(detections / len(frames), 4),
+    }
+    result.update(percentiles(latencies))
+    return result
+
+
+def with_relative_rate(results):
+    native = results.get('0', {}).get('detections_per_frame')
+    for result in results.values():
+        if native:
+            result['relative_detection_rate'] = round(result['detections_per_frame'] / native, 4)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--clip', help='video file or directory of frames')
+    parser.add_argument('--limit', type=int, default=200)
+    parser.add_argument('--sizes', default='0,960,640,480,320')
+    parser.add_argument('--face-method', default='mtcnn')
+    parser.add_argument('--model', help='YOLOv5 weights (defaults to ObjectDetector default)')
+    parser.add_argument('--skip-objects', action='store_true')
+    args = parser.parse_args(argv)
+
+    from ml_models.cheating_detection.face_detector import FaceDetector
+
+    frames = load_frames(args.clip, args.limit) if args.clip else synthetic_clip(width=1280, height=720)
+    sizes = [int(s) for s in args.sizes.split(',')]
+
+    face_results = {}
+    for size in sizes:
+        detector = FaceDetector(method=args.face_method, input_size=size or None)
+        face_results[str(size)] = measure(detector.detect_faces, frames)
+
+    object_results = {}
+    if not args.skip_objects:
+        from ml_models.cheating_detection.object_detector import ObjectDetector
+        for size in sizes:
+            # YOLOv5 needs an explicit size; native means the frame's longest side
+            input_size = size or max(frames[0].shape[:2])
+            options = {'input_size': input_size}
+            detector = ObjectDetector(args.model, **options) if args.model else ObjectDetector(**options)
+            object_results[str(size)] = measure(detector.detect_objects, frames)
+
+    emit({
+        'frames': len(frames),
+        'frame_size': list(frames[0].shape[1::-1]),
+        'face': with_relative_rate(face_results),
+        'object': with_relative_rate(object_results),
+    })
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+"""Resident memory per exam session with shared vs per-session detectors.
+
+Run from the repository root::
+
+    python -m benchmarks.bench_session_memory --sessions 50 --stub
+
+``per_session`` reproduces the old behaviour where every ActivityMonitor
+loaded its own detectors; ``shared`` uses the process-wide model registry.
+Each mode runs in a fresh interpreter so the measurements don't overlap.
+"""
+import argparse
+import json
+import subprocess
+import sys
+import time
+
+from benchmarks.common import current_rss, emit
+
+MONITOR_CONFIG = {
+    'ABSENCE_DURATION_THRESHOLD': 10,
+    'CHEATING_CONFIDENCE_THRESHOLD': 0.7,
+}
+
+
+def measure(mode, sessions, stub):
+    from ml_models.cheating_detection import model_registry
+    from ml_models.cheating_detection.activity_monitor import ActivityMonitor
+
+    if stub:
+        from benchmarks import stubs
+        stubs.install()
+
+    baseline = current_rss()
+    monitors = []
+    start = time.perf_counter()
+    for _ in range(sessions):
+        if mode == 'per_session':
+            model_registry.clear()
+        monitors.append(ActivityMonitor(MONITOR_CONFIG))
+    elapsed = time.perf_counter() - start
+    used = current_rss() - baseline
+
+    return {
+        'mode': mode,
+        'sessions': sessions,
+        'rss_delta_mb': round(used / 2**20, 2),
+        'rss_per_session_mb': round(used / sessions / 2**20, 3),
+        'session_start_ms': round(elapsed / sessions * 1000.0, 3),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sessions', type=int, default=20)
+    parser.add_argument('--stub', action='store_true',
+                        help='use stub detectors instead of loading model weights')
+    parser.add_argument('--mode', choices=['per_session', 'shared'],
+                        help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.mode:
+        emit(measure(args.mode, args.sessions, args.stub))
+        return
+
+    results = []
+    for mode in ('per_session', 'shared'):
+        cmd = [sys.executable, '-m', 'benchmarks.bench_session_memory',
+               '--mode', mode, '--sessions', str(args.sessions)]
+        if args.stub:
+            cmd.append('--stub')
+        output = subprocess.run(cmd, check=True, capture_output=True, text=True).stdout
+        results.append(json.loads(output))
+    emit({'results': results})
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+import json
+import sys
+import time
+
+import numpy as np
+
+
+def percentiles(samples, points=(50, 95, 99)):
+    """Return the requested percentiles of a list of samples in milliseconds"""
+    if not samples:
+        return {f'p{p}': None for p in points}
+    values = np.asarray(samples, dtype=np.float64) * 1000.0
+    return {f'p{p}': round(float(np.percentile(values, p)), 3) for p in points}
+
+
+def summarize(latencies, wall_time):
+    """Summarize per-call latencies (seconds) collected over wall_time"""
+    count = len(latencies)
+    summary = {
+        'count': count,
+        'wall_time_s': round(wall_time, 4),
+        'throughput_per_s': round(count / wall_time, 2) if wall_time > 0 else None,
+        'mean_ms': round(float(np.mean(latencies)) * 1000.0, 3) if count else None,
+    }
+    summary.update(percentiles(latencies))
+    return summary
+
+
+def time_calls(fn, args_iter):
+    """Call fn once per item of args_iter and return (latencies, wall_time)"""
+    latencies = []
+    start = time.perf_counter()
+    for args in args_iter:
+        t0 = time.perf_counter()
+        fn(*args)
+        latencies.append(time.perf_counter() - t0)
+    return latencies, time.perf_counter() - start
+
+
+def synthetic_frame(width=640, height=480, seed=0):
+    """Build a deterministic BGR test frame with some texture"""
+    rng = np.random.default_rng(seed)
+    y, x = np.mgrid[0:height, 0:width]
+    base = ((x + y) % 256).astype(np.uint8)
+    noise = rng.integers(0, 32, size=(height, width), dtype=np.uint8)
+    channel = base + noise
+    return np.dstack([channel, np.roll(channel, 7, axis=1), np.roll(channel, 13, axis=0)])
+
+
+def emit(result, stream=None):
+    """Write a benchmark result as JSON"""
+    stream = stream or sys.stdout
+    json.dump(result, stream, indent=2, default=str)
+    stream.write('\n')
+
+
+def current_rss():
+    """Resident set size of this process in bytes"""
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        import os
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+
+
+def peak_rss():
+    """Peak resident set size of this process in bytes"""
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in kilobytes on Linux and bytes on macOS
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+VIDEO_EXTENSIONS = ('.mp4', '.avi', '.mkv', '.webm', '.mov')
+
+
+def load_frames(path, limit=None):
+    """Load BGR frames from a video file or a directory of images"""
+    import os
+
+    import cv2
+
+    frames = []
+    if os.path.isdir(path):
+        names = sorted(n for n in os.listdir(path) if n.lower().endswith(IMAGE_EXTENSIONS))
+        for name in names[:limit]:
+            frame = cv2.imread(os.path.join(path, name))
+            if frame is not None:
+                frames.append(frame)
+    else:
+        capture = cv2.VideoCapture(path)
+        while limit is None or len(frames) < limit:
+            ok, frame = capture.read()
+            if not ok:
+                break
+            frames.append(frame)
+        capture.release()
+    return frames
+
+
+def synthetic_clip(length=120, width=640, height=480, seed=0):
+    """A mostly static clip with sensor noise and one burst of motion"""
+    rng = np.random.default_rng(seed)
+    background = synthetic_frame(width, height, seed)
+    frames = []
+    for i in range(length):
+        frame = background.copy()
+        noise = rng.integers(-2, 3, size=frame.shape, dtype=np.int16)
+        frame = np.clip(frame.astype(np.int16) + noise, 0, 255).astype(np.uint8)
+        if length // 3 <= i < length // 2:
+            x = (i - length // 3) * 12 % (width - 120)
+            frame[height // 3:height // 3 + 120, x:x + 120] = 255
+        frames.append(frame)
+    return frames
@@ -0,0 +1,395 @@
+"""Load test: simulated students streaming to a local server.
+
+Run from the repository root::
+
+    python -m benchmarks.load_test --steps 10,50,100,200 --step-duration 30 --stub
+
+Starts the app in a child process (``--serve``) with a throwaway SQLite
+database and seeded student accounts, then ramps up simulated students
+with asyncio. Each student logs in, calls ``/api/start_session``, joins
+its exam room over Socket.IO (long-polling transport) and, at the cadence
+of ``exam.html``, posts a frame to ``/api/submit_frame`` every two seconds
+and ``/api/submit_audio`` once per 2048-sample audio buffer, with an
+occasional ``tab_switch``. Tab switch latency is measured until the
+server's ``warning`` event comes back on the student's socket.
+
+Each ramp step reports throughput, error rate and latency percentiles per
+operation. ``--url`` targets a server already started with
+``--serve --students N --db path`` instead of spawning one.
+"""
+import argparse
+import asyncio
+import base64
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from urllib.parse import urlencode, urlsplit
+
+import cv2
+
+from benchmarks.common import emit, percentiles, synthetic_frame
+
+STUDENT_PASSWORD = 'load-test'
+FRAME_INTERVAL = 2.0
+AUDIO_BUFFER_SAMPLES = 2048
+
+
+def serve(args):
+    """Run the app with seeded students until killed"""
+    os.environ['TEST_DATABASE_URL'] = f'sqlite:///{args.db}'
+    os.environ.setdefault('STAGE_METRICS_ENABLED', 'true')
+
+    from app import create_app, db, socketio
+    from app.models.exam import Exam
+    from app.models.user import User
+    from werkzeug.security import generate_password_hash
+
+    if args.stub:
+        from benchmarks import stubs
+        stubs.install(face_ms=args.stub_face_ms, object_ms=args.stub_object_ms)
+
+    app = create_app('testing')
+    with app.app_context():
+        db.create_all()
+        # Hash once: every student shares the password
+        password_hash = generate_password_hash(STUDENT_PASSWORD)
+        db.session.add(Exam(title='Load test', duration_minutes=60))
+        db.session.add_all(
+            User(username=f'student{i}', email=f'student{i}@example.com',
+                 password_hash=password_hash, role='student')
+            for i in range(args.students)
+        )
+        db.session.commit()
+
+    socketio.run(app, host='127.0.0.1', port=args.port, allow_unsafe_werkzeug=True,
+                 log_output=False)
+
+
+def dechunk(payload):
+    """Decode a chunked transfer-encoded body"""
+    body = []
+    while payload:
+        size_line, _, payload = payload.partition(b'\r\n')
+        size = int(size_line.split(b';', 1)[0], 16)
+        if size == 0:
+            break
+        body.append(payload[:size])
+        payload = payload[size + 2:]
+    return b''.join(body)
+
+
+class HttpClient:
+    """Minimal cookie-keeping HTTP/1.1 client on asyncio streams"""
+
+    def __init__(self, host, port, timeout=30.0):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.cookies = {}
+
+    async def request(self, method, path, body=b'', content_type=None):
+        return await asyncio.wait_for(self._request(method, path, body, content_type), self.timeout)
+
+    async def _request(self, method, path, body, content_type):
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        try:
+            headers = [f'{method} {path} HTTP/1.1', f'Host: {self.host}:{self.port}',
+                       'Connection: close', f'Content-Length: {len(body)}']
+            if content_type:
+                headers.append(f'Content-Type: {content_type}')
+            if self.cookies:
+                headers.append('Cookie: ' + '; '.join(f'{k}={v}' for k, v in self.cookies.items()))
+            writer.write(('\r\n'.join(headers) + '\r\n\r\n').encode('latin-1') + body)
+            await writer.drain()
+            raw = await reader.read()
+        finally:
+            writer.close()
+
+        head, _, payload = raw.partition(b'\r\n\r\n')
+        lines = head.decode('latin-1').split('\r\n')
+        status = int(lines[0].split()[1])
+        chunked = False
+        for line in lines[1:]:
+            name, _, value = line.partition(':')
+            name = name.lower()
+            if name == 'set-cookie':
+                key, _, rest = value.strip().partition('=')
+                self.cookies[key] = rest.split(';', 1)[0]
+            elif name == 'transfer-encoding' and 'chunked' in value.lower():
+                chunked = True
+        return status, dechunk(payload) if chunked else payload
+
+    async def post_json(self, path, data):
+        return await self.request('POST', path, json.dumps(data).encode('utf-8'), 'application/json')
+
+
+class Stats:
+    """Latencies and errors per operation for the current ramp step"""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.latencies = {}
+        self.errors = {}
+        self.started = time.perf_counter()
+
+    def record(self, op, latency=None, error=False):
+        self.latencies.setdefault(op, [])
+        self.errors.setdefault(op, 0)
+        if error:
+            self.errors[op] += 1
+        else:
+            self.latencies[op].append(latency)
+
+    def report(self):
+        elapsed = time.perf_counter() - self.started
+        result = {}
+        for op in sorted(self.latencies):
+            ok = len(self.latencies[op])
+            total = ok + self.errors[op]
+            entry = {
+                'requests': total,
+                'throughput_per_s': round(ok / elapsed, 2) if elapsed > 0 else None,
+                'error_rate': round(self.errors[op] / total, 4) if total else 0.0,
+            }
+            entry.update(percentiles(self.latencies[op]))
+            result[op] = entry
+        return result
+
+
+class Student:
+    def __init__(self, index, args, stats, frame_body):
+        self.index = index
+        self.args = args
+        self.stats = stats
+        self.frame_body = frame_body
+        self.http = HttpClient(args.host, args.port, args.timeout)
+        self.session_id = None
+        self.sid = None
+        self.tab_switch_sent = None
+
+    async def timed(self, op, coro, ok_status=(200, 202)):
+        t0 = time.perf_counter()
+        try:
+            status, payload = await coro
+        except (OSError, asyncio.TimeoutError):
+            self.stats.record(op, error=True)
+            return None
+        if status not in ok_status:
+            self.stats.record(op, error=True)
+            return None
+        self.stats.record(op, time.perf_counter() - t0)
+        return payload
+
+    async def start(self):
+        form = urlencode({'username': f'student{self.index}', 'password': STUDENT_PASSWORD})
+        payload = await self.timed('login', self.http.request(
+            'POST', '/auth/login', form.encode('ascii'), 'application/x-www-form-urlencoded'),
+            ok_status=(302,))
+        if payload is None:
+            return False
+
+        payload = await self.timed('start_session', self.http.post_json(
+            '/api/start_session', {'exam_id': 1}))
+        if payload is None:
+            return False
+        self.session_id = json.loads(payload)['session_id']
+        self.frame = self.frame_body.replace(b'"session_id": 0', f'"session_id": {self.session_id}'.encode())
+
+        # Socket.IO over the long-polling transport: handshake, then connect
+        payload = await self.timed('socket_connect', self.http.request(
+            'GET', '/socket.io/?EIO=4&transport=polling'))
+        if payload is None:
+            return False
+        self.sid = json.loads(payload.decode('utf-8')[1:])['sid']
+        await self.socket_send('40')
+        await self.socket_send('42' + json.dumps(['join_exam', {'session_id': self.session_id}]))
+        return True
+
+    def socket_path(self):
+        return f'/socket.io/?EIO=4&transport=polling&sid={self.sid}'
+
+    async def socket_send(self, packet):
+        return await self.timed('socket_send', self.http.request(
+            'POST', self.socket_path(), packet.encode('utf-8'), 'text/plain;charset=UTF-8'))
+
+    async def poll(self):
+        """Long-poll for server packets, answering pings and timing warnings"""
+        poller = HttpClient(self.args.host, self.args.port, timeout=60.0)
+        poller.cookies = self.http.cookies
+        while True:
+            try:
+                status, payload = await poller.request('GET', self.socket_path())
+            except (OSError, asyncio.TimeoutError):
+                self.stats.record('socket_poll', error=True)
+                await asyncio.sleep(1.0)
+                continue
+            if status != 200:
+                self.stats.record('socket_poll', error=True)
+                return
+            for packet in payload.decode('utf-8', 'replace').split('\x1e'):
+                if packet == '2':
+                    await self.socket_send('3')
+                elif packet.startswith('42'):
+                    event = json.loads(packet[2:])
+                    if event[0] == 'warning' and event[1].get('type') == 'tab_switch' \
+                            and self.tab_switch_sent is not None:
+                        self.stats.record('tab_switch', time.perf_counter() - self.tab_switch_sent)
+                        self.tab_switch_sent = None
+
+    async def stream_frames(self):
+        while True:
+            await self.timed('submit_frame', self.http.request(
+                'POST', '/api/submit_frame', self.frame, 'application/json'))
+            await asyncio.sleep(FRAME_INTERVAL)
+
+    async def stream_audio(self):
+        interval = AUDIO_BUFFER_SAMPLES / self.args.audio_rate
+        while True:
+            level = random.uniform(0, 60)
+            await self.timed('submit_audio', self.http.post_json(
+                '/api/submit_audio', {'session_id': self.session_id, 'audio_level': level}))
+            await asyncio.sleep(interval)
+
+    async def switch_tabs(self):
+        while True:
+            await asyncio.sleep(random.expovariate(1.0 / self.args.tab_switch_interval))
+            if self.tab_switch_sent is not None:
+                # The previous warning never arrived
+                self.stats.record('tab_switch', error=True)
+            self.tab_switch_sent = time.perf_counter()
+            await self.socket_send('42' + json.dumps(['tab_switch', {'session_id': self.session_id}]))
+
+    async def run(self):
+        # Spread students over the frame interval like real page loads
+        await asyncio.sleep(random.uniform(0, FRAME_INTERVAL))
+        try:
+            if not await self.start():
+                return
+            await asyncio.gather(self.poll(), self.stream_frames(), self.stream_audio(),
+                                 self.switch_tabs())
+        except (ValueError, KeyError, IndexError) as e:
+            # Malformed response: count it and drop the student
+            print(f'student{self.index}: {type(e).__name__}: {e}', file=sys.stderr)
+            self.stats.record('protocol', error=True)
+
+
+def build_frame_body(args):
+    frame = synthetic_frame(args.width, args.height)
+    ok, encoded = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 70])
+    image = 'data:image/jpeg;base64,' + base64.b64encode(encoded.tobytes()).decode('ascii')
+    return json.dumps({'session_id': 0, 'frame': image}).encode('utf-8')
+
+
+async def wait_for_server(host, port, timeout=60.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            reader, writer = await asyncio.open_connection(host, port)
+            writer.close()
+            return
+        except OSError:
+            await asyncio.sleep(0.5)
+    raise RuntimeError(f'server on {host}:{port} did not start')
+
+
+async def ramp(args):
+    await wait_for_server(args.host, args.port)
+    stats = Stats()
+    frame_body = build_frame_body(args)
+    students = []
+    steps = []
+    for target in (int(s) for s in args.steps.split(',')):
+        while len(students) < target:
+            student = Student(len(students), args, stats, frame_body)
+            students.append(asyncio.ensure_future(student.run()))
+        # Let the new students log in before measuring the step
+        await asyncio.sleep(FRAME_INTERVAL + 1.0)
+        stats.reset()
+        await asyncio.sleep(args.step_duration)
+        steps.append({'sessions': target, 'operations': stats.report()})
+
+    for task in students:
+        task.cancel()
+    await asyncio.gather(*students, return_exceptions=True)
+    return steps
+
+
+def raise_fd_limit():
+    """Each simulated student holds several sockets open"""
+    try:
+        import resource
+        soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+    except (ImportError, ValueError, OSError):
+        pass
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--steps', default='10,50,100,200',
+                        help='comma separated concurrent session counts')
+    parser.add_argument('--step-duration', type=float, default=30.0, help='seconds measured per step')
+    parser.add_argument('--url', help='existing server started with --serve')
+    parser.add_argument('--port', type=int, default=5055)
+    parser.add_argument('--timeout', type=float, default=30.0, help='per-request timeout in seconds')
+    parser.add_argument('--audio-rate', type=int, default=48000,
+                        help='client sample rate; one audio post per 2048 samples')
+    parser.add_argument('--tab-switch-interval', type=float, default=60.0,
+                        help='mean seconds between tab switches per student')
+    parser.add_argument('--width', type=int, default=640)
+    parser.add_argument('--height', type=int, default=480)
+    parser.add_argument('--stub', action='store_true', help='serve with stand-in models')
+    parser.add_argument('--stub-face-ms', type=float, default=0.0)
+    parser.add_argument('--stub-object-ms', type=float, default=0.0)
+    parser.add_argument('--server-log', help='write the spawned server output to this file')
+    parser.add_argument('--serve', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--students', type=int, default=0, help=argparse.SUPPRESS)
+    parser.add_argument('--db', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.serve:
+        serve(args)
+        return
+
+    raise_fd_limit()
+    students = max(int(s) for s in args.steps.split(','))
+    server = None
+    if args.url:
+        parts = urlsplit(args.url)
+        args.host, args.port = parts.hostname, parts.port or 80
+    else:
+        args.host = '127.0.0.1'
+        db_file = tempfile.NamedTemporaryFile(suffix='.db', delete=False)
+        db_file.close()
+        command = [sys.executable, '-m', 'benchmarks.load_test', '--serve',
+                   '--port', str(args.port), '--students', str(students), '--db', db_file.name,
+                   '--stub-face-ms', str(args.stub_face_ms),
+                   '--stub-object-ms', str(args.stub_object_ms)]
+        if args.stub:
+            command.append('--stub')
+        log = open(args.server_log, 'w') if args.server_log else subprocess.DEVNULL
+        server = subprocess.Popen(command, stdout=log, stderr=subprocess.STDOUT)
+
+    try:
+        steps = asyncio.run(ramp(args))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+            os.unlink(db_file.name)
+
+    emit({
+        'frame_interval_s': FRAME_INTERVAL,
+        'audio_interval_s': round(AUDIO_BUFFER_SAMPLES / args.audio_rate, 4),
+        'steps': steps,
+    })
+
+
+if __name__ == '__main__':
+    main()
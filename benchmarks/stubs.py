@@ -0,0 +1,113 @@
+"""Stand-in detectors so benchmarks can run offline without model weights.
+
+Each stub holds a block of memory the size of the real model weights so
+memory benchmarks stay meaningful, and returns fixed detections.
+"""
+import time
+
+import numpy as np
+
+from ml_models.cheating_detection import model_registry
+
+
+def burn(ms):
+    """Busy-wait for ms milliseconds so the cost shows up as CPU time"""
+    if ms <= 0:
+        return
+    end = time.perf_counter() + ms / 1000.0
+    while time.perf_counter() < end:
+        pass
+
+
+class StubFaceDetector:
+    def __init__(self, method='mtcnn', weights_mb=5, cost_ms=0.0):
+        self.method = method
+        self.weights = np.ones(int(weights_mb * 1024 * 1024), dtype=np.uint8)
+        self.cost_ms = cost_ms
+
+    def detect_faces(self, frame, previous_count=None):
+        burn(self.cost_ms)
+        h, w = frame.shape[:2]
+        return [(w // 3, h // 4, 2 * w // 3, 3 * h // 4, 0.99)]
+
+    def get_face_landmarks(self, frame, face_box):
+        return None
+
+
+class StubObjectDetector:
+    """Fake YOLOv5 with a fixed per-call overhead plus a per-frame cost"""
+
+    def __init__(self, model_path=None, weights_mb=28, call_ms=0.0, frame_ms=0.0):
+        self.weights = np.ones(int(weights_mb * 1024 * 1024), dtype=np.uint8)
+        self.target_classes = ['cell phone', 'laptop', 'book', 'person']
+        self.call_ms = call_ms
+        self.frame_ms = frame_ms
+
+    def detect_objects(self, frame):
+        return self.detect_objects_batch([frame])[0]
+
+    def detect_objects_batch(self, frames):
+        burn(self.call_ms + self.frame_ms * len(frames))
+        return [[] for _ in frames]
+
+
+class StubPhoneDetector(StubObjectDetector):
+    """Reports a 'cell phone' wherever a saturated white block is in view
+
+    The moving square of benchmarks.common.synthetic_clip is such a block,
+    so alerts follow the clip's burst of motion.
+    """
+
+    min_pixels = 1000
+
+    def detect_objects_batch(self, frames):
+        burn(self.call_ms + self.frame_ms * len(frames))
+        return [self._phones(frame) for frame in frames]
+
+    def _phones(self, frame):
+        ys, xs = np.nonzero((frame >= 250).all(axis=2))
+        if len(xs) < self.min_pixels:
+            return []
+        box = [int(xs.min()), int(ys.min()), int(xs.max()) + 1, int(ys.max()) + 1]
+        return [{'class': 'cell phone', 'confidence': 0.9, 'bbox': box}]
+
+
+class StubAudioAnalyzer:
+    def __init__(self):
+        from ml_models.cheating_detection.vad import StreamingVAD
+        self.vad = StreamingVAD()
+
+    def extract_features(self, audio_data):
+        return dict(zip(('rms', 'zcr'), self.extract_feature_vector(audio_data)))
+
+    def extract_feature_vector(self, audio_data):
+        audio_data = np.asarray(audio_data, dtype=np.float32)
+        signs = np.signbit(audio_data)
+        return np.array([np.sqrt(np.mean(audio_data ** 2)), np.mean(signs[1:] != signs[:-1])])
+
+    def extract_feature_batch(self, chunks):
+        return np.stack([self.extract_feature_vector(chunk) for chunk in chunks])
+
+    def detect_voice_activity(self, audio_data, features=None):
+        return False
+
+    def detect_voice_segments(self, audio_data, timestamp=None):
+        return self.vad.process(audio_data, timestamp)
+
+    def flush_voice_segments(self, timestamp=None):
+        return self.vad.flush(timestamp)
+
+    def detect_anomaly(self, audio_data, features=None):
+        return False, 0.0
+
+
+def install(face_mb=5, object_mb=28, face_ms=0.0, object_ms=0.0,
+            object_detector=StubObjectDetector):
+    """Route the model registry to the stub detectors"""
+    model_registry.set_factory(
+        'face_detector',
+        lambda method, **options: StubFaceDetector(method, face_mb, face_ms))
+    model_registry.set_factory(
+        'object_detector',
+        lambda model_path, **options: object_detector(model_path, object_mb, call_ms=object_ms))
+    model_registry.set_factory('audio_analyzer', StubAudioAnalyzer)
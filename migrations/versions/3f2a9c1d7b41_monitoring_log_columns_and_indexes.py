@@ -0,0 +1,59 @@
+"""monitoring log columns and indexes
+
+Adds confidence_score, details and video_frame_path to monitoring_logs
+along with indexes for session timelines and time-range queries.
+
+Databases created with db.create_all() from a newer model may already
+have some of these, so only what is missing is added.
+
+Revision ID: 3f2a9c1d7b41
+Revises: 
+Create Date: 2026-10-17 21:40:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f2a9c1d7b41'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+COLUMNS = [
+    ('confidence_score', sa.Float()),
+    ('details', sa.Text()),
+    ('video_frame_path', sa.String(length=255)),
+]
+
+INDEXES = [
+    ('ix_monitoring_logs_session_timestamp', ['session_id', 'timestamp']),
+    ('ix_monitoring_logs_timestamp', ['timestamp']),
+    ('ix_monitoring_logs_session_activity', ['session_id', 'activity_type']),
+]
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table('monitoring_logs'):
+        # Fresh database: db.create_all() builds the full table
+        return
+    columns = {c['name'] for c in inspector.get_columns('monitoring_logs')}
+    indexes = {i['name'] for i in inspector.get_indexes('monitoring_logs')}
+
+    with op.batch_alter_table('monitoring_logs', schema=None) as batch_op:
+        for name, type_ in COLUMNS:
+            if name not in columns:
+                batch_op.add_column(sa.Column(name, type_, nullable=True))
+        for name, index_columns in INDEXES:
+            if name not in indexes:
+                batch_op.create_index(name, index_columns, unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('monitoring_logs', schema=None) as batch_op:
+        for name, _ in reversed(INDEXES):
+            batch_op.drop_index(name)
+        for name, _ in reversed(COLUMNS):
+            batch_op.drop_column(name)
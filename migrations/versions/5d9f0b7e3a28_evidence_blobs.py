@@ -0,0 +1,44 @@
+"""evidence blobs
+
+Content-addressed evidence images with a count of the monitoring logs
+that reference them. Existing per-event evidence files are left as they
+are; only new evidence is stored as blobs.
+
+Revision ID: 5d9f0b7e3a28
+Revises: e7a3c5f19d62
+Create Date: 2026-10-17 23:40:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5d9f0b7e3a28'
+down_revision = 'e7a3c5f19d62'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table('monitoring_logs'):
+        # Fresh database: db.create_all() builds the full schema
+        return
+    if inspector.has_table('evidence_blobs'):
+        return
+
+    op.create_table(
+        'evidence_blobs',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('sha256', sa.String(length=64), nullable=False),
+        sa.Column('path', sa.String(length=255), nullable=False),
+        sa.Column('refcount', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('sha256'),
+    )
+
+
+def downgrade():
+    op.drop_table('evidence_blobs')
@@ -0,0 +1,70 @@
+"""monitoring rollups
+
+Per-minute activity counts per session, maintained by the monitoring log
+writer so dashboards don't scan raw events.
+
+Revision ID: 8b5e2d4f6a13
+Revises: 3f2a9c1d7b41
+Create Date: 2026-10-17 22:05:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8b5e2d4f6a13'
+down_revision = '3f2a9c1d7b41'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table('monitoring_logs'):
+        # Fresh database: db.create_all() builds the full schema
+        return
+    if inspector.has_table('monitoring_rollups'):
+        return
+
+    op.create_table(
+        'monitoring_rollups',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('session_id', sa.Integer(), nullable=True),
+        sa.Column('minute', sa.DateTime(), nullable=False),
+        sa.Column('activity_type', sa.String(length=50), nullable=False),
+        sa.Column('event_count', sa.Integer(), nullable=False),
+        sa.Column('max_confidence', sa.Float(), nullable=True),
+        sa.ForeignKeyConstraint(['session_id'], ['exam_sessions.id']),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('session_id', 'minute', 'activity_type',
+                            name='uq_monitoring_rollups_session_minute_activity'),
+    )
+    with op.batch_alter_table('monitoring_rollups', schema=None) as batch_op:
+        batch_op.create_index('ix_monitoring_rollups_minute', ['minute'], unique=False)
+
+    # Backfill from the events already stored
+    op.execute("""
+        INSERT INTO monitoring_rollups
+            (session_id, minute, activity_type, event_count, max_confidence)
+        SELECT session_id,
+               strftime('%Y-%m-%d %H:%M:00.000000', timestamp),
+               activity_type, COUNT(*), MAX(confidence_score)
+        FROM monitoring_logs
+        WHERE timestamp IS NOT NULL AND activity_type IS NOT NULL
+        GROUP BY 1, 2, 3
+    """ if op.get_bind().dialect.name == 'sqlite' else """
+        INSERT INTO monitoring_rollups
+            (session_id, minute, activity_type, event_count, max_confidence)
+        SELECT session_id, date_trunc('minute', timestamp),
+               activity_type, COUNT(*), MAX(confidence_score)
+        FROM monitoring_logs
+        WHERE timestamp IS NOT NULL AND activity_type IS NOT NULL
+        GROUP BY 1, 2, 3
+    """)
+
+
+def downgrade():
+    with op.batch_alter_table('monitoring_rollups', schema=None) as batch_op:
+        batch_op.drop_index('ix_monitoring_rollups_minute')
+    op.drop_table('monitoring_rollups')
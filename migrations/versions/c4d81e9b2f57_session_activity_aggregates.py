@@ -0,0 +1,72 @@
+"""session activity aggregates
+
+Running totals per session and activity type, maintained by the
+monitoring log writer so session reports don't read every event.
+
+Revision ID: c4d81e9b2f57
+Revises: 8b5e2d4f6a13
+Create Date: 2026-10-17 22:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4d81e9b2f57'
+down_revision = '8b5e2d4f6a13'
+branch_labels = None
+depends_on = None
+
+# Suspicion weights at the time of this revision; other activity types count 1
+WEIGHTS = {
+    'multiple_faces': 10,
+    'phone_detected': 8,
+    'student_absent': 5,
+    'unauthorized_material': 7,
+    'voice_detected': 4,
+    'audio_anomaly': 3,
+    'suspicious_gaze': 2,
+}
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table('monitoring_logs'):
+        # Fresh database: db.create_all() builds the full schema
+        return
+    if inspector.has_table('session_activity_aggregates'):
+        return
+
+    op.create_table(
+        'session_activity_aggregates',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('session_id', sa.Integer(), nullable=False),
+        sa.Column('activity_type', sa.String(length=50), nullable=False),
+        sa.Column('event_count', sa.Integer(), nullable=False),
+        sa.Column('weighted_score', sa.Float(), nullable=False),
+        sa.Column('max_confidence', sa.Float(), nullable=True),
+        sa.Column('last_event_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['session_id'], ['exam_sessions.id']),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('session_id', 'activity_type',
+                            name='uq_session_activity_aggregates_session_activity'),
+    )
+
+    # Backfill from the events already stored
+    weight = 'CASE activity_type {} ELSE 1 END'.format(
+        ' '.join(f"WHEN '{name}' THEN {value}" for name, value in WEIGHTS.items()))
+    op.execute(f"""
+        INSERT INTO session_activity_aggregates
+            (session_id, activity_type, event_count, weighted_score,
+             max_confidence, last_event_at)
+        SELECT session_id, activity_type, COUNT(*), SUM({weight}),
+               MAX(confidence_score), MAX(timestamp)
+        FROM monitoring_logs
+        WHERE session_id IS NOT NULL AND activity_type IS NOT NULL
+        GROUP BY session_id, activity_type
+    """)
+
+
+def downgrade():
+    op.drop_table('session_activity_aggregates')
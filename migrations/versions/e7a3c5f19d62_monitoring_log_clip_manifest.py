@@ -0,0 +1,37 @@
+"""monitoring log clip manifest
+
+Adds clip_manifest_path to monitoring_logs, pointing at the manifest of
+the evidence clip recorded around an event.
+
+Revision ID: e7a3c5f19d62
+Revises: c4d81e9b2f57
+Create Date: 2026-10-17 23:10:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e7a3c5f19d62'
+down_revision = 'c4d81e9b2f57'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table('monitoring_logs'):
+        # Fresh database: db.create_all() builds the full table
+        return
+    columns = {c['name'] for c in inspector.get_columns('monitoring_logs')}
+    if 'clip_manifest_path' in columns:
+        return
+
+    with op.batch_alter_table('monitoring_logs', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('clip_manifest_path', sa.String(length=255), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('monitoring_logs', schema=None) as batch_op:
+        batch_op.drop_column('clip_manifest_path')
@@ -1,25 +1,74 @@
-import cv2
 import numpy as np
-from datetime import datetime, timedelta
-import json
+from datetime import datetime
 import logging
+import threading
 from collections import deque
 
+from .stage_timing import stage_timer
+
 logger = logging.getLogger(__name__)
 
+# Suspicion score contributed by each occurrence of an activity;
+# activity types not listed count 1
+ACTIVITY_WEIGHTS = {
+    'multiple_faces': 10,
+    'phone_detected': 8,
+    'student_absent': 5,
+    'unauthorized_material': 7,
+    'voice_detected': 4,
+    'audio_anomaly': 3,
+    'suspicious_gaze': 2
+}
+
 class ActivityMonitor:
     def __init__(self, config):
         """Initialize activity monitor with configuration"""
         self.config = config
         
-        # Initialize detectors
-        from .face_detector import FaceDetector
-        from .object_detector import ObjectDetector
-        from .audio_analyzer import AudioAnalyzer
+        # Detectors are loaded once per process and shared across sessions;
+        # only the audio analyzer carries per-session state
+        from . import model_registry
+        
+        # INT8 deployments run quantised ONNX models for both detectors
+        int8 = config.get('DETECTOR_PRECISION', 'fp32') == 'int8'
+        
+        face_method = config.get('FACE_DETECTOR_METHOD', 'mtcnn')
+        face_options = {'input_size': config.get('FACE_INPUT_SIZE')}
+        if face_method == 'cascade':
+            face_options.update({
+                'cascade_low': config.get('FACE_CASCADE_LOW', 0.3),
+                'cascade_high': config.get('FACE_CASCADE_HIGH', 0.8)
+            })
+        if face_method in ('opencv_dnn', 'cascade'):
+            face_options['dnn_model'] = config.get(
+                'FACE_DNN_INT8_MODEL' if int8 else 'FACE_DNN_MODEL'
+            )
+        self.face_detector = model_registry.get_face_detector(face_method, **face_options)
         
-        self.face_detector = FaceDetector(method='mtcnn')
-        self.object_detector = ObjectDetector()
-        self.audio_analyzer = AudioAnalyzer()
+        if int8:
+            object_backend = 'onnx'
+            object_model = config.get('OBJECT_DETECTION_INT8_MODEL')
+        else:
+            object_backend = config.get('OBJECT_DETECTOR_BACKEND', 'torch')
+            object_model = config.get(
+                'OBJECT_DETECTION_ONNX_MODEL' if object_backend == 'onnx' else 'OBJECT_DETECTION_MODEL'
+            )
+        object_options = {
+            'input_size': config.get('OBJECT_INPUT_SIZE', 640),
+            'backend': object_backend
+        }
+        if config.get('OBJECT_BATCH_SIZE', 1) > 1:
+            self.object_detector = model_registry.get_batching_object_detector(
+                object_model,
+                max_batch=config['OBJECT_BATCH_SIZE'],
+                window_ms=config.get('OBJECT_BATCH_WINDOW_MS', 50),
+                **object_options
+            )
+        else:
+            self.object_detector = model_registry.get_object_detector(
+                object_model, **object_options
+            )
+        self.audio_analyzer = model_registry.create_audio_analyzer()
         
         # Activity tracking
         self.activity_history = deque(maxlen=100)
@@ -27,17 +76,77 @@ class ActivityMonitor:
         self.absence_start_time = None
         self.suspicious_activities = []
         
-        # Frame buffer for saving evidence
-        self.frame_buffer = deque(maxlen=10)
+        # Summary totals, updated as activities are recorded. Video frames
+        # and audio chunks of a session run on different pipeline workers,
+        # so history and totals are only touched under this lock
+        self._lock = threading.Lock()
+        self.activity_counts = {}
+        self.suspicion_score = 0
+        self.total_frames = 0
+        self.high_confidence_alerts = deque(maxlen=100)
+        
+        # Last few frames as JPEG bytes, for evidence clips around an event
+        from .frame_ring import FrameRing
+        self.frame_buffer = FrameRing(
+            max_frames=config.get('EVIDENCE_RING_FRAMES', 15),
+            max_bytes=config.get('EVIDENCE_RING_BYTES', 4 * 1024 * 1024)
+        )
+        
+        # Skip detectors on frames that barely differ from the last analysed one
+        self.motion_gate = None
+        if config.get('MOTION_GATE_THRESHOLD', 0) > 0:
+            from .motion_gate import MotionGate
+            self.motion_gate = MotionGate(
+                threshold=config['MOTION_GATE_THRESHOLD'],
+                max_interval=config.get('MOTION_GATE_MAX_INTERVAL', 5)
+            )
+        self.last_faces = []
+        
+        # Track faces between detections; ids stay stable across frames
+        self.face_tracker = None
+        if config.get('FACE_TRACK_INTERVAL', 1) > 1:
+            from .face_tracker import FaceTracker
+            self.face_tracker = FaceTracker(
+                self.face_detector, detect_interval=config['FACE_TRACK_INTERVAL']
+            )
+        self.last_objects = []
     
-    def analyze_frame(self, frame, audio_data=None):
-        """Analyze a single frame for suspicious activities"""
+    def analyze_frame(self, frame, audio_data=None, jpeg_bytes=None):
+        """Analyze a single frame for suspicious activities
+        
+        ``jpeg_bytes``, the frame as the client encoded it, is kept in the
+        frame buffer so evidence clips can include frames before an event.
+        """
         timestamp = datetime.now()
+        if jpeg_bytes is not None:
+            self.frame_buffer.append(timestamp, jpeg_bytes)
         activities = []
         
-        # Face detection
-        faces = self.face_detector.detect_faces(frame)
+        # Face and object detection, reusing the last results when the
+        # scene hasn't changed
+        if self.motion_gate is None:
+            analyzed = True
+        else:
+            with stage_timer.span('motion_gate'):
+                analyzed = self.motion_gate.should_analyze(frame)
+        if analyzed:
+            with stage_timer.span('face_detect'):
+                if self.face_tracker is not None:
+                    self.last_faces = self.face_tracker.update(
+                        frame, previous_count=self.last_face_count
+                    )
+                else:
+                    self.last_faces = self.face_detector.detect_faces(
+                        frame, previous_count=self.last_face_count
+                    )
+            with stage_timer.span('object_detect'):
+                self.last_objects = self.object_detector.detect_objects(frame)
+        faces = self.last_faces
+        objects = self.last_objects
         face_count = len(faces)
+        self.last_face_count = face_count
+        
+        face_ids = self.face_tracker.track_ids if self.face_tracker is not None else None
         
         # Check for multiple faces
         if face_count > 1:
@@ -45,6 +154,7 @@ class ActivityMonitor:
                 'type': 'multiple_faces',
                 'confidence': 0.9,
                 'details': f'{face_count} faces detected',
+                'face_ids': face_ids,
                 'timestamp': timestamp
             })
         
@@ -62,9 +172,6 @@ class ActivityMonitor:
         else:
             self.absence_start_time = None
         
-        # Object detection
-        objects = self.object_detector.detect_objects(frame)
-        
         # Check for phone
         phones = [obj for obj in objects if obj['class'] == 'cell phone']
         if phones:
@@ -87,30 +194,15 @@ class ActivityMonitor:
         
         # Audio analysis
         if audio_data is not None:
-            is_voice = self.audio_analyzer.detect_voice_activity(audio_data)
-            is_anomaly, anomaly_conf = self.audio_analyzer.detect_anomaly(audio_data)
-            
-            if is_voice:
-                activities.append({
-                    'type': 'voice_detected',
-                    'confidence': 0.8,
-                    'details': 'Voice activity detected',
-                    'timestamp': timestamp
-                })
-            
-            if is_anomaly:
-                activities.append({
-                    'type': 'audio_anomaly',
-                    'confidence': anomaly_conf,
-                    'details': 'Unusual audio pattern detected',
-                    'timestamp': timestamp
-                })
+            activities.extend(self._audio_activities(audio_data, timestamp))
         
         # Eye movement analysis (if face detected)
-        if face_count == 1 and self.config.get('enable_gaze_tracking', False):
-            landmarks = self.face_detector.get_face_landmarks(frame, faces[0])
+        if analyzed and face_count == 1 and self.config.get('enable_gaze_tracking', False):
+            with stage_timer.span('landmarks'):
+                landmarks = self._face_landmarks(frame, faces[0])
             if landmarks:
-                gaze_info = self._analyze_gaze(landmarks, frame.shape)
+                with stage_timer.span('gaze'):
+                    gaze_info = self._analyze_gaze(landmarks, frame.shape)
                 if gaze_info['suspicious']:
                     activities.append({
                         'type': 'suspicious_gaze',
@@ -120,18 +212,111 @@ class ActivityMonitor:
                     })
         
         # Update history
-        self.activity_history.append({
+        self._record({
             'timestamp': timestamp,
             'face_count': face_count,
+            'face_ids': face_ids,
             'activities': activities
-        })
+        }, frame=True)
+        
+        return activities
+    
+    def analyze_audio(self, audio_data, final=False):
+        """Analyze an audio chunk received separately from video frames
+        
+        ``final`` marks the end of the stream: the (possibly short) chunk
+        only goes to voice detection and a voice segment still open is
+        reported.
+        """
+        timestamp = datetime.now()
+        if final:
+            with stage_timer.span('audio'):
+                segments = self.audio_analyzer.detect_voice_segments(audio_data, timestamp)
+                segments += self.audio_analyzer.flush_voice_segments(timestamp)
+            activities = self._voice_activities(segments)
+        else:
+            activities = self._audio_activities(audio_data, timestamp)
         
-        # Add frame to buffer if suspicious activity detected
         if activities:
-            self.frame_buffer.append((frame, timestamp))
+            self._record({
+                'timestamp': timestamp,
+                'face_count': None,
+                'activities': activities
+            })
+        
+        return activities
+    
+    def _record(self, record, frame=False):
+        """Add a record to the history and fold its activities into the totals"""
+        threshold = self.config['CHEATING_CONFIDENCE_THRESHOLD']
+        with self._lock:
+            self.activity_history.append(record)
+            if frame:
+                self.total_frames += 1
+            for activity in record['activities']:
+                activity_type = activity['type']
+                self.activity_counts[activity_type] = self.activity_counts.get(activity_type, 0) + 1
+                self.suspicion_score += ACTIVITY_WEIGHTS.get(activity_type, 1)
+                if activity['confidence'] > threshold:
+                    self.high_confidence_alerts.append(activity)
+    
+    def _audio_activities(self, audio_data, timestamp):
+        """Run voice and anomaly detection on an audio chunk
+        
+        Voice detection runs over the session's audio as one stream, so a
+        stretch of speech yields a single voice_detected activity, dated at
+        its start, once it has ended.
+        """
+        with stage_timer.span('audio'):
+            segments = self.audio_analyzer.detect_voice_segments(audio_data, timestamp)
+            is_anomaly, anomaly_conf = self.audio_analyzer.detect_anomaly(audio_data)
+        
+        activities = self._voice_activities(segments)
+        
+        if is_anomaly:
+            activities.append({
+                'type': 'audio_anomaly',
+                'confidence': anomaly_conf,
+                'details': 'Unusual audio pattern detected',
+                'timestamp': timestamp
+            })
         
         return activities
     
+    def _voice_activities(self, segments):
+        """One voice_detected activity per voice segment, dated at its start"""
+        return [{
+            'type': 'voice_detected',
+            'confidence': round(0.6 + 0.4 * segment['voiced_ratio'], 3),
+            'details': f"Voice activity for {segment['duration']:.1f}s "
+                       f"({segment['start']:%H:%M:%S}-{segment['end']:%H:%M:%S})",
+            'timestamp': segment['start']
+        } for segment in segments]
+    
+    def _face_landmarks(self, frame, face):
+        """Facial landmarks in frame coordinates
+        
+        With GAZE_ROI_MARGIN set, landmarks are computed on a crop around
+        the face box (grown by that fraction of its size) instead of the
+        full frame, then mapped back.
+        """
+        margin = self.config.get('GAZE_ROI_MARGIN')
+        if not margin:
+            return self.face_detector.get_face_landmarks(frame, face)
+        
+        h, w = frame.shape[:2]
+        x1, y1, x2, y2, conf = face
+        mx, my = int((x2 - x1) * margin), int((y2 - y1) * margin)
+        ox, oy = max(0, x1 - mx), max(0, y1 - my)
+        crop = frame[oy:min(h, y2 + my), ox:min(w, x2 + mx)]
+        
+        landmarks = self.face_detector.get_face_landmarks(
+            crop, (x1 - ox, y1 - oy, x2 - ox, y2 - oy, conf)
+        )
+        if not landmarks:
+            return landmarks
+        return [(x + ox, y + oy) for x, y in landmarks]
+    
     def _analyze_gaze(self, landmarks, frame_shape):
         """Analyze eye gaze from facial landmarks"""
         # Extract eye landmarks (simplified)
@@ -169,61 +354,24 @@ class ActivityMonitor:
     
     def get_summary(self):
         """Get summary of monitoring session"""
-        if not self.activity_history:
-            return {}
-        
-        # Count different types of activities
-        activity_counts = {}
-        for record in self.activity_history:
-            for activity in record['activities']:
-                activity_type = activity['type']
-                if activity_type not in activity_counts:
-                    activity_counts[activity_type] = 0
-                activity_counts[activity_type] += 1
-        
-        # Calculate suspicion score
-        weights = {
-            'multiple_faces': 10,
-            'phone_detected': 8,
-            'student_absent': 5,
-            'unauthorized_material': 7,
-            'voice_detected': 4,
-            'audio_anomaly': 3,
-            'suspicious_gaze': 2
-        }
+        with self._lock:
+            if not self.activity_history:
+                return {}
+            
+            summary = {
+                'activity_counts': dict(self.activity_counts),
+                'suspicion_score': self.suspicion_score,
+                'total_frames': self.total_frames,
+                'high_confidence_alerts': list(self.high_confidence_alerts)
+            }
+        summary.update({
+            'frame_buffer': self.frame_buffer.get_stats(),
+            'voice_activity': self.audio_analyzer.vad.get_stats()
+        })
         
-        total_score = sum(
-            counts * weights.get(activity, 1) 
-            for activity, counts in activity_counts.items()
-        )
+        if self.motion_gate is not None:
+            summary['motion_gate'] = self.motion_gate.get_stats()
+        if self.face_tracker is not None:
+            summary['face_tracking'] = self.face_tracker.get_stats()
         
-        return {
-            'activity_counts': activity_counts,
-            'suspicion_score': total_score,
-            'total_frames': len(self.activity_history),
-            'high_confidence_alerts': [
-                a for record in self.activity_history 
-                for a in record['activities'] 
-                if a['confidence'] > self.config['CHEATING_CONFIDENCE_THRESHOLD']
-            ]
-        }
-    
-    def save_evidence(self, session_id, activity):
-        """Save frame as evidence for suspicious activity"""
-        if not self.frame_buffer:
-            return None
-        
-        # Get the most recent frame
-        frame, timestamp = self.frame_buffer[-1]
-        
-        # Create filename
-        filename = f"{session_id}_{activity['type']}_{timestamp.strftime('%Y%m%d_%H%M%S')}.jpg"
-        filepath = f"app/static/uploads/evidence/{filename}"
-        
-        # Save frame
-        try:
-            cv2.imwrite(filepath, frame)
-            return filename
-        except Exception as e:
-            logger.error(f"Failed to save evidence: {str(e)}")
-            return None
\ No newline at end of file
+        return summary
@@ -1,18 +1,26 @@
 import numpy as np
-import librosa
 import soundfile as sf
 from collections import deque
 import logging
 from sklearn.ensemble import IsolationForest
+from .audio_features import FEATURE_NAMES, AudioFeatureExtractor
+from .vad import StreamingVAD
 
 logger = logging.getLogger(__name__)
 
+# Positions in the feature vector
+RMS = FEATURE_NAMES.index('rms')
+ZCR = FEATURE_NAMES.index('zcr')
+
 class AudioAnalyzer:
     def __init__(self, sample_rate=16000, frame_length=2048):
         """Initialize audio analyzer for anomaly detection"""
         self.sample_rate = sample_rate
         self.frame_length = frame_length
         self.hop_length = frame_length // 2
+        self.feature_extractor = AudioFeatureExtractor(
+            sample_rate=sample_rate, n_fft=frame_length, hop_length=self.hop_length
+        )
         
         # Buffer for audio features
         self.feature_buffer = deque(maxlen=50)
@@ -27,67 +35,68 @@ class AudioAnalyzer:
         # Voice activity detection parameters
         self.energy_threshold = 0.02
         self.zcr_threshold = 0.1
+        
+        # Debounced voice segments over the session's continuous audio stream
+        self.vad = StreamingVAD(sample_rate=sample_rate)
     
     def extract_features(self, audio_data):
-        """Extract audio features for analysis"""
-        features = {}
-        
+        """Extract audio features for analysis, as a dict keyed by FEATURE_NAMES"""
+        vector = self.extract_feature_vector(audio_data)
+        if vector is None:
+            return None
+        return dict(zip(FEATURE_NAMES, vector))
+    
+    def extract_feature_vector(self, audio_data):
+        """Features of one chunk as a vector in FEATURE_NAMES order"""
         try:
-            # Convert to float32 if needed
-            if audio_data.dtype != np.float32:
-                audio_data = audio_data.astype(np.float32)
-            
-            # Time domain features
-            features['rms'] = np.sqrt(np.mean(audio_data**2))
-            features['zcr'] = np.mean(librosa.zero_crossings(audio_data))
-            
-            # Frequency domain features
-            stft = librosa.stft(audio_data, n_fft=self.frame_length, 
-                               hop_length=self.hop_length)
-            magnitude = np.abs(stft)
-            
-            # Spectral features
-            features['spectral_centroid'] = np.mean(
-                librosa.feature.spectral_centroid(S=magnitude, sr=self.sample_rate)
-            )
-            features['spectral_rolloff'] = np.mean(
-                librosa.feature.spectral_rolloff(S=magnitude, sr=self.sample_rate)
-            )
-            features['spectral_bandwidth'] = np.mean(
-                librosa.feature.spectral_bandwidth(S=magnitude, sr=self.sample_rate)
-            )
-            
-            # MFCC features
-            mfccs = librosa.feature.mfcc(y=audio_data, sr=self.sample_rate, n_mfcc=13)
-            for i in range(13):
-                features[f'mfcc_{i}'] = np.mean(mfccs[i])
-            
+            return self.feature_extractor.extract(audio_data)
         except Exception as e:
             logger.error(f"Feature extraction error: {str(e)}")
             return None
-        
-        return features
     
-    def detect_voice_activity(self, audio_data):
-        """Detect if there's voice activity in the audio"""
-        features = self.extract_features(audio_data)
+    def extract_feature_batch(self, chunks):
+        """Feature matrix for equal-length chunks, e.g. from many sessions at once"""
+        return self.feature_extractor.extract_batch(chunks)
+    
+    def detect_voice_activity(self, audio_data, features=None):
+        """Detect if there's voice activity in the audio
+        
+        ``features`` is a vector already computed for this chunk.
+        """
+        if features is None:
+            features = self.extract_feature_vector(audio_data)
         if features is None:
             return False
         
         # Simple VAD based on energy and ZCR
-        is_voice = (features['rms'] > self.energy_threshold and 
-                   features['zcr'] > self.zcr_threshold)
+        is_voice = (features[RMS] > self.energy_threshold and 
+                   features[ZCR] > self.zcr_threshold)
         
         return is_voice
     
-    def detect_anomaly(self, audio_data):
-        """Detect audio anomalies"""
-        features = self.extract_features(audio_data)
+    def detect_voice_segments(self, audio_data, timestamp=None):
+        """Feed a chunk of the audio stream; returns the voice segments that ended
+        
+        Unlike detect_voice_activity, state carries across chunks, so one
+        stretch of speech is reported once with its start and end time.
+        """
+        return self.vad.process(audio_data, timestamp)
+    
+    def flush_voice_segments(self, timestamp=None):
+        """End the audio stream, returning a voice segment still open"""
+        return self.vad.flush(timestamp)
+    
+    def detect_anomaly(self, audio_data, features=None):
+        """Detect audio anomalies
+        
+        ``features`` is a vector already computed for this chunk.
+        """
+        if features is None:
+            features = self.extract_feature_vector(audio_data)
         if features is None:
             return False, 0.0
         
-        # Convert features to array
-        feature_vector = np.array(list(features.values())).reshape(1, -1)
+        feature_vector = np.asarray(features).reshape(1, -1)
         
         # Add to buffer for training
         self.feature_buffer.append(feature_vector[0])
@@ -0,0 +1,136 @@
+import numpy as np
+
+N_MFCC = 13
+
+# Order of the values in a feature vector
+FEATURE_NAMES = (
+    'rms', 'zcr', 'spectral_centroid', 'spectral_rolloff', 'spectral_bandwidth',
+) + tuple(f'mfcc_{i}' for i in range(N_MFCC))
+
+
+def _hz_to_mel(frequencies):
+    """Slaney mel scale: linear below 1 kHz, logarithmic above"""
+    frequencies = np.asarray(frequencies, dtype=np.float64)
+    mels = frequencies / (200.0 / 3)
+    log_region = frequencies >= 1000.0
+    mels[log_region] = 15.0 + np.log(frequencies[log_region] / 1000.0) / (np.log(6.4) / 27.0)
+    return mels
+
+
+def _mel_to_hz(mels):
+    mels = np.asarray(mels, dtype=np.float64)
+    frequencies = mels * (200.0 / 3)
+    log_region = mels >= 15.0
+    frequencies[log_region] = 1000.0 * np.exp((np.log(6.4) / 27.0) * (mels[log_region] - 15.0))
+    return frequencies
+
+
+def mel_filterbank(sample_rate, n_fft, n_mels=128):
+    """Slaney-normalised triangular mel filters, as librosa.filters.mel builds them"""
+    fft_freqs = np.fft.rfftfreq(n_fft, 1.0 / sample_rate)
+    mel_points = _mel_to_hz(np.linspace(_hz_to_mel([0.0])[0], _hz_to_mel([sample_rate / 2.0])[0],
+                                         n_mels + 2))
+    widths = np.diff(mel_points)
+    ramps = mel_points[:, None] - fft_freqs[None, :]
+    lower = -ramps[:-2] / widths[:-1, None]
+    upper = ramps[2:] / widths[1:, None]
+    weights = np.maximum(0, np.minimum(lower, upper))
+    weights *= (2.0 / (mel_points[2:] - mel_points[:-2]))[:, None]
+    return weights
+
+
+def dct_basis(n_out, n_in):
+    """Orthonormal DCT-II matrix, the transform librosa applies for MFCCs"""
+    k = np.arange(n_out)[:, None]
+    n = np.arange(n_in)[None, :]
+    basis = np.cos(np.pi * k * (2 * n + 1) / (2.0 * n_in)) * np.sqrt(2.0 / n_in)
+    basis[0] /= np.sqrt(2.0)
+    return basis
+
+
+class AudioFeatureExtractor:
+    """Single-pass audio features for one chunk or a batch of chunks.
+
+    One STFT per chunk feeds the MFCCs from a mel spectrogram of its power,
+    and the spectral centroid, rolloff and bandwidth from the magnitude of
+    every (hop_length // mfcc_hop_length)-th frame, instead of each librosa
+    feature recomputing a spectrogram from the samples. The values match
+    the librosa features the anomaly model was fit on: spectral features
+    at hop_length, MFCCs at librosa.feature.mfcc's default hop of 512.
+    Features are the per-chunk means over STFT frames, returned in
+    FEATURE_NAMES order. Chunks in a batch must have the same length.
+    """
+
+    def __init__(self, sample_rate=16000, n_fft=2048, hop_length=1024, n_mels=128,
+                 rolloff_percent=0.85, mfcc_hop_length=512):
+        if hop_length % mfcc_hop_length:
+            raise ValueError('hop_length must be a multiple of mfcc_hop_length')
+        self.sample_rate = sample_rate
+        self.n_fft = n_fft
+        self.hop_length = hop_length
+        self.mfcc_hop_length = mfcc_hop_length
+        self.rolloff_percent = rolloff_percent
+
+        # Periodic Hann window, filters and DCT are built once
+        self.window = (0.5 - 0.5 * np.cos(2 * np.pi * np.arange(n_fft) / n_fft)).astype(np.float32)
+        self.freqs = np.fft.rfftfreq(n_fft, 1.0 / sample_rate)
+        self.mel_basis = mel_filterbank(sample_rate, n_fft, n_mels)
+        self.dct = dct_basis(N_MFCC, n_mels)
+
+    def extract(self, audio_data):
+        """Feature vector of one chunk"""
+        return self.extract_batch(np.asarray(audio_data)[None, :])[0]
+
+    def extract_batch(self, chunks):
+        """Feature matrix with one row per chunk, for a (chunks, samples) array"""
+        chunks = np.asarray(chunks, dtype=np.float32)
+        if chunks.ndim != 2:
+            raise ValueError('expected a (chunks, samples) array')
+        count = len(chunks)
+        features = np.empty((count, len(FEATURE_NAMES)), dtype=np.float64)
+
+        # Time domain; zero crossings as librosa.zero_crossings counts them:
+        # samples within 1e-10 of zero count as positive and the first
+        # sample counts as a crossing
+        features[:, 0] = np.sqrt(np.mean(chunks ** 2, axis=1))
+        signs = np.signbit(chunks) & (np.abs(chunks) > 1e-10)
+        crossings = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) + 1
+        features[:, 1] = crossings / chunks.shape[1]
+
+        # One STFT, centred with zero padding like librosa.stft; frames at
+        # hop_length are every step-th frame at mfcc_hop_length
+        spectrum = self._stft_magnitude(chunks)  # (chunks, frames, bins)
+        magnitude = spectrum[:, ::self.hop_length // self.mfcc_hop_length]
+
+        total = magnitude.sum(axis=2)
+        safe_total = np.where(total > 0, total, 1.0)
+        centroid = magnitude @ self.freqs / safe_total
+        features[:, 2] = centroid.mean(axis=1)
+
+        cumulative = np.cumsum(magnitude, axis=2)
+        threshold = self.rolloff_percent * cumulative[:, :, -1:]
+        rolloff_bin = np.argmax(cumulative >= threshold, axis=2)
+        features[:, 3] = self.freqs[rolloff_bin].mean(axis=1)
+
+        deviation = (self.freqs[None, None, :] - centroid[:, :, None]) ** 2
+        bandwidth = np.sqrt(np.sum(magnitude * deviation, axis=2) / safe_total)
+        features[:, 4] = bandwidth.mean(axis=1)
+
+        # MFCCs from the same spectrum: mel power in dB (80 dB range per chunk), then DCT
+        mel = (spectrum ** 2) @ self.mel_basis.T  # (chunks, frames, mels)
+        mel_db = 10.0 * np.log10(np.maximum(mel, 1e-10))
+        mel_db = np.maximum(mel_db, mel_db.max(axis=(1, 2), keepdims=True) - 80.0)
+        mfccs = mel_db @ self.dct.T  # (chunks, frames, N_MFCC)
+        features[:, 5:] = mfccs.mean(axis=1)
+
+        return features
+
+    def _stft_magnitude(self, chunks):
+        pad = self.n_fft // 2
+        padded = np.pad(chunks, ((0, 0), (pad, pad)))
+        frames = 1 + (padded.shape[1] - self.n_fft) // self.mfcc_hop_length
+        shape = (len(chunks), frames, self.n_fft)
+        strides = (padded.strides[0], padded.strides[1] * self.mfcc_hop_length, padded.strides[1])
+        windows = np.lib.stride_tricks.as_strided(padded, shape=shape, strides=strides,
+                                                  writeable=False)
+        return np.abs(np.fft.rfft(windows * self.window, axis=2))
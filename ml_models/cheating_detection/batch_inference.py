@@ -0,0 +1,104 @@
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+logger = logging.getLogger(__name__)
+
+
+class BatchingObjectDetector:
+    """Collect frames from many sessions and run them as one batch.
+
+    Callers use the same ``detect_objects`` interface as ObjectDetector and
+    block until their own detections are ready. A background thread groups
+    pending frames for up to ``window_ms`` or ``max_batch`` frames,
+    whichever comes first, and runs one batched forward pass.
+    """
+
+    def __init__(self, detector, max_batch=8, window_ms=50, timeout=10.0):
+        self.detector = detector
+        self.max_batch = max(1, int(max_batch))
+        self.window = window_ms / 1000.0
+        self.timeout = timeout
+
+        self._queue = queue.Queue()
+        self._worker = None
+        self._start_lock = threading.Lock()
+
+        # Statistics
+        self.batches = 0
+        self.frames = 0
+
+    def __getattr__(self, name):
+        # Expose the wrapped detector's attributes (target_classes, model, ...)
+        return getattr(self.detector, name)
+
+    def detect_objects(self, frame):
+        """Queue a frame for the next batch and wait for its detections"""
+        self._ensure_worker()
+        future = Future()
+        self._queue.put((frame, future))
+        try:
+            return future.result(timeout=self.timeout)
+        except Exception as e:
+            logger.error(f"Batched object detection error: {str(e)}")
+            return []
+
+    def detect_phone(self, frame):
+        """Specifically detect cell phones in frame"""
+        return [d for d in self.detect_objects(frame) if d['class'] == 'cell phone']
+
+    def detect_multiple_persons(self, frame):
+        """Detect if multiple persons are in frame"""
+        persons = [d for d in self.detect_objects(frame) if d['class'] == 'person']
+        return len(persons), persons
+
+    def get_stats(self):
+        """Report batching statistics"""
+        return {
+            'batches': self.batches,
+            'frames': self.frames,
+            'mean_batch_size': self.frames / self.batches if self.batches else 0.0,
+            'pending': self._queue.qsize(),
+        }
+
+    def _ensure_worker(self):
+        if self._worker is not None and self._worker.is_alive():
+            return
+        with self._start_lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(
+                    target=self._run, name='object-detector-batcher', daemon=True
+                )
+                self._worker.start()
+
+    def _collect(self):
+        """Block for the first frame, then gather more until the window closes"""
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.window
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            frames = [frame for frame, _ in batch]
+            try:
+                results = self.detector.detect_objects_batch(frames)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            self.batches += 1
+            self.frames += len(batch)
+            for (_, future), detections in zip(batch, results):
+                future.set_result(detections)
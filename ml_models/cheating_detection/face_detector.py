@@ -3,68 +3,183 @@ import numpy as np
 import dlib
 from mtcnn import MTCNN
 import logging
+import os
+import threading
 
 logger = logging.getLogger(__name__)
 
+DNN_PROTOTXT = 'ml_models/weights/deploy.prototxt'
+DNN_WEIGHTS = 'ml_models/weights/res10_300x300_ssd_iter_140000.caffemodel'
+
+def resize_to(frame, input_size):
+    """Shrink a frame so its longest side is at most input_size
+    
+    Returns the image to run inference on and the scale applied to it.
+    """
+    if not input_size:
+        return frame, 1.0
+    h, w = frame.shape[:2]
+    scale = input_size / max(h, w)
+    if scale >= 1.0:
+        return frame, 1.0
+    size = (max(1, int(round(w * scale))), max(1, int(round(h * scale))))
+    return cv2.resize(frame, size, interpolation=cv2.INTER_AREA), scale
+
+def scale_boxes(faces, factor):
+    """Map (x1, y1, x2, y2, confidence) boxes back by a scale factor"""
+    return [(int(round(x1 * factor)), int(round(y1 * factor)),
+             int(round(x2 * factor)), int(round(y2 * factor)), conf)
+            for x1, y1, x2, y2, conf in faces]
+
+def dnn_blob(frame):
+    """Input blob for the res10 SSD face model"""
+    return cv2.dnn.blobFromImage(frame, 1.0, (300, 300), (104.0, 177.0, 123.0))
+
 class FaceDetector:
-    def __init__(self, method='mtcnn'):
+    def __init__(self, method='mtcnn', cascade_low=0.3, cascade_high=0.8, input_size=None,
+                 dnn_model=None):
         """
         Initialize face detector with specified method.
-        Methods: 'mtcnn', 'dlib', 'opencv_dnn', 'haar'
+        Methods: 'mtcnn', 'dlib', 'opencv_dnn', 'haar', 'cascade'
+        
+        'cascade' runs the OpenCV DNN detector (Haar if its weights are
+        missing) and escalates to MTCNN only when a detection scores between
+        cascade_low and cascade_high or the face count changes.
+        
+        input_size caps the longest side of the image given to the detector;
+        boxes are always returned in original frame coordinates.
+        
+        dnn_model replaces the Caffe SSD used by 'opencv_dnn' (and the
+        cascade's first stage) with an ONNX export of it, e.g. the INT8
+        model built by ml_models.cheating_detection.quantize, which is run
+        with ONNX Runtime.
         """
         self.method = method
+        self.dnn_threshold = 0.5
+        self.input_size = input_size
         
-        if method == 'mtcnn':
+        # Detector instances are shared between sessions
+        self._lock = threading.Lock()
+        
+        if method == 'cascade':
+            primary = 'opencv_dnn' if os.path.exists(dnn_model or DNN_WEIGHTS) else 'haar'
+            self.primary = FaceDetector(method=primary, input_size=input_size,
+                                        dnn_model=dnn_model)
+            self.primary.dnn_threshold = cascade_low
+            self.fallback = None
+            self.cascade_low = cascade_low
+            self.cascade_high = cascade_high
+            
+            # Statistics
+            self.calls = 0
+            self.escalations = 0
+        elif method == 'mtcnn':
             self.detector = MTCNN()
         elif method == 'dlib':
             self.detector = dlib.get_frontal_face_detector()
             self.predictor = dlib.shape_predictor('ml_models/weights/shape_predictor_68_face_landmarks.dat')
         elif method == 'opencv_dnn':
-            self.net = cv2.dnn.readNetFromCaffe(
-                'ml_models/weights/deploy.prototxt',
-                'ml_models/weights/res10_300x300_ssd_iter_140000.caffemodel'
-            )
+            self.session = None
+            if dnn_model:
+                import onnxruntime as ort
+                self.session = ort.InferenceSession(
+                    dnn_model, providers=['CPUExecutionProvider']
+                )
+                self.input_name = self.session.get_inputs()[0].name
+            else:
+                self.net = cv2.dnn.readNetFromCaffe(DNN_PROTOTXT, DNN_WEIGHTS)
         elif method == 'haar':
             self.detector = cv2.CascadeClassifier(
                 cv2.data.haarcascades + 'haarcascade_frontalface_default.xml'
             )
     
-    def detect_faces(self, frame):
-        """Detect faces in a frame and return bounding boxes"""
+    def detect_faces(self, frame, previous_count=None):
+        """Detect faces in a frame and return bounding boxes
+        
+        previous_count is the caller's face count on its previous frame;
+        the cascade method escalates to MTCNN when it changes.
+        """
         faces = []
         
         try:
-            if self.method == 'mtcnn':
-                detections = self.detector.detect_faces(frame)
-                faces = [(d['box'][0], d['box'][1], 
-                         d['box'][0] + d['box'][2], 
-                         d['box'][1] + d['box'][3], 
-                         d['confidence']) for d in detections]
-            
-            elif self.method == 'dlib':
-                gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-                dets = self.detector(gray, 1)
-                faces = [(d.left(), d.top(), d.right(), d.bottom(), 1.0) for d in dets]
-            
-            elif self.method == 'opencv_dnn':
-                h, w = frame.shape[:2]
-                blob = cv2.dnn.blobFromImage(frame, 1.0, (300, 300), (104.0, 177.0, 123.0))
+            if self.method == 'cascade':
+                faces = self._detect_cascade(frame, previous_count)
+            else:
+                small, scale = resize_to(frame, self.input_size)
+                with self._lock:
+                    faces = self._detect(small)
+                if scale != 1.0:
+                    faces = scale_boxes(faces, 1.0 / scale)
+        except Exception as e:
+            logger.error(f"Face detection error: {str(e)}")
+        
+        return faces
+    
+    def _detect_cascade(self, frame, previous_count):
+        """Fast detector first, MTCNN only when the result is ambiguous"""
+        with self._lock:
+            self.calls += 1
+        candidates = self.primary.detect_faces(frame)
+        
+        borderline = any(f[4] < self.cascade_high for f in candidates)
+        faces = [f for f in candidates if f[4] >= self.cascade_high]
+        count_changed = previous_count is not None and len(faces) != previous_count
+        
+        if not borderline and not count_changed:
+            return faces
+        
+        with self._lock:
+            self.escalations += 1
+            if self.fallback is None:
+                self.fallback = FaceDetector(method='mtcnn', input_size=self.input_size)
+        return self.fallback.detect_faces(frame)
+    
+    def get_stats(self):
+        """Escalation counts for the cascade method"""
+        if self.method != 'cascade':
+            return {}
+        with self._lock:
+            calls, escalations = self.calls, self.escalations
+        return {
+            'calls': calls,
+            'escalations': escalations,
+            'escalation_rate': escalations / calls if calls else 0.0
+        }
+    
+    def _detect(self, frame):
+        faces = []
+        
+        if self.method == 'mtcnn':
+            detections = self.detector.detect_faces(frame)
+            faces = [(d['box'][0], d['box'][1], 
+                     d['box'][0] + d['box'][2], 
+                     d['box'][1] + d['box'][3], 
+                     d['confidence']) for d in detections]
+        
+        elif self.method == 'dlib':
+            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+            dets = self.detector(gray, 1)
+            faces = [(d.left(), d.top(), d.right(), d.bottom(), 1.0) for d in dets]
+        
+        elif self.method == 'opencv_dnn':
+            h, w = frame.shape[:2]
+            blob = dnn_blob(frame)
+            if self.session is not None:
+                detections = self.session.run(None, {self.input_name: blob})[0]
+            else:
                 self.net.setInput(blob)
                 detections = self.net.forward()
-                
-                for i in range(detections.shape[2]):
-                    confidence = detections[0, 0, i, 2]
-                    if confidence > 0.5:
-                        box = detections[0, 0, i, 3:7] * np.array([w, h, w, h])
-                        faces.append((*box.astype(int), confidence))
             
-            elif self.method == 'haar':
-                gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-                dets = self.detector.detectMultiScale(gray, 1.3, 5)
-                faces = [(x, y, x+w, y+h, 1.0) for (x, y, w, h) in dets]
+            for i in range(detections.shape[2]):
+                confidence = detections[0, 0, i, 2]
+                if confidence > self.dnn_threshold:
+                    box = detections[0, 0, i, 3:7] * np.array([w, h, w, h])
+                    faces.append((*box.astype(int), confidence))
         
-        except Exception as e:
-            logger.error(f"Face detection error: {str(e)}")
+        elif self.method == 'haar':
+            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+            dets = self.detector.detectMultiScale(gray, 1.3, 5)
+            faces = [(x, y, x+w, y+h, 1.0) for (x, y, w, h) in dets]
         
         return faces
     
@@ -78,7 +193,8 @@ class FaceDetector:
         x1, y1, x2, y2, _ = face_box
         rect = dlib.rectangle(x1, y1, x2, y2)
         
-        landmarks = self.predictor(gray, rect)
+        with self._lock:
+            landmarks = self.predictor(gray, rect)
         points = [(p.x, p.y) for p in landmarks.parts()]
         
         return points
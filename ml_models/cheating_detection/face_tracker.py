@@ -0,0 +1,135 @@
+import cv2
+import numpy as np
+
+
+def box_iou(a, b):
+    """Intersection over union of two (x1, y1, x2, y2, ...) boxes"""
+    ix1, iy1 = max(a[0], b[0]), max(a[1], b[1])
+    ix2, iy2 = min(a[2], b[2]), min(a[3], b[3])
+    inter = max(0, ix2 - ix1) * max(0, iy2 - iy1)
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter
+    return inter / union if union > 0 else 0.0
+
+
+class FaceTracker:
+    """Propagate face boxes between detections with template matching.
+
+    Full detection runs every ``detect_interval`` frames, whenever no face
+    is being tracked, when a track is lost, or after a detection returned a
+    face too small to track. In between, each face is
+    located by normalised cross-correlation of its last appearance inside
+    a window around its previous box; the template is taken at detection
+    and refreshed from every frame the face is matched in, so it follows
+    gradual changes in pose and lighting. Faces keep a stable id across
+    frames: detections are matched to existing tracks by IoU.
+
+    One tracker belongs to one session; the wrapped detector may be shared.
+    """
+
+    def __init__(self, detector, detect_interval=5, iou_threshold=0.3,
+                 match_threshold=0.6, search_margin=0.5):
+        self.detector = detector
+        self.detect_interval = detect_interval
+        self.iou_threshold = iou_threshold
+        self.match_threshold = match_threshold
+        self.search_margin = search_margin
+
+        self.tracks = []
+        self.next_id = 1
+        self.since_detection = 0
+
+        # Statistics
+        self.detections = 0
+        self.tracked = 0
+        self.failures = 0
+
+    @property
+    def track_ids(self):
+        return [t['id'] for t in self.tracks]
+
+    def update(self, frame, previous_count=None):
+        """Return face boxes for this frame, detecting only when needed"""
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+
+        if self.tracks and self.since_detection < self.detect_interval - 1:
+            boxes = self._propagate(gray)
+            if boxes is not None:
+                self.since_detection += 1
+                self.tracked += 1
+                return boxes
+            self.failures += 1
+
+        return self._detect(frame, gray, previous_count)
+
+    def get_stats(self):
+        total = self.detections + self.tracked
+        return {
+            'detections': self.detections,
+            'tracked_frames': self.tracked,
+            'track_failures': self.failures,
+            'detection_ratio': self.detections / total if total else 0.0,
+        }
+
+    def _detect(self, frame, gray, previous_count):
+        faces = self.detector.detect_faces(frame, previous_count=previous_count)
+        self.detections += 1
+        self.since_detection = 0
+
+        # Greedy IoU matching keeps ids stable across detections
+        unmatched = list(self.tracks)
+        tracks = []
+        for face in sorted(faces, key=lambda f: -f[4]):
+            best = max(unmatched, key=lambda t: box_iou(t['box'], face), default=None)
+            if best is not None and box_iou(best['box'], face) >= self.iou_threshold:
+                unmatched.remove(best)
+                track_id = best['id']
+            else:
+                track_id = self.next_id
+                self.next_id += 1
+            tracks.append(self._make_track(track_id, face, gray))
+
+        self.tracks = [t for t in tracks if t['template'] is not None]
+        if len(self.tracks) < len(tracks):
+            # Faces too small to track are still reported, and the next
+            # frame is detected again so tracking never changes the count
+            self.since_detection = self.detect_interval
+        return [t['box'] for t in tracks]
+
+    def _make_track(self, track_id, face, gray):
+        h, w = gray.shape[:2]
+        x1, y1 = max(0, int(face[0])), max(0, int(face[1]))
+        x2, y2 = min(w, int(face[2])), min(h, int(face[3]))
+        template = gray[y1:y2, x1:x2].copy() if x2 - x1 > 4 and y2 - y1 > 4 else None
+        return {
+            'id': track_id,
+            'box': (x1, y1, x2, y2, face[4]),
+            'template': template,
+        }
+
+    def _propagate(self, gray):
+        """Move every track to its best match; None if any track is lost"""
+        h, w = gray.shape[:2]
+        boxes = []
+        for track in self.tracks:
+            x1, y1, x2, y2, conf = track['box']
+            bw, bh = x2 - x1, y2 - y1
+            mx, my = int(bw * self.search_margin), int(bh * self.search_margin)
+            sx1, sy1 = max(0, x1 - mx), max(0, y1 - my)
+            sx2, sy2 = min(w, x2 + mx), min(h, y2 + my)
+
+            window = gray[sy1:sy2, sx1:sx2]
+            template = track['template']
+            if window.shape[0] < template.shape[0] or window.shape[1] < template.shape[1]:
+                return None
+
+            scores = cv2.matchTemplate(window, template, cv2.TM_CCOEFF_NORMED)
+            _, score, _, (dx, dy) = cv2.minMaxLoc(scores)
+            if not np.isfinite(score) or score < self.match_threshold:
+                return None
+
+            nx1, ny1 = sx1 + dx, sy1 + dy
+            track['box'] = (nx1, ny1, nx1 + bw, ny1 + bh, conf)
+            th, tw = template.shape[:2]
+            track['template'] = gray[ny1:ny1 + th, nx1:nx1 + tw].copy()
+            boxes.append(track['box'])
+        return boxes
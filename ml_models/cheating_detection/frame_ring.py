@@ -0,0 +1,57 @@
+from collections import deque
+
+
+class FrameRing:
+    """Most recent frames of a session, kept as encoded JPEG bytes.
+
+    Holds at most ``max_frames`` frames and ``max_bytes`` of JPEG data;
+    the oldest frames are evicted first when either limit is reached. A
+    720p frame takes roughly 50-100 KB this way instead of 2.7 MB as a
+    decoded BGR array.
+    """
+
+    def __init__(self, max_frames=15, max_bytes=4 * 1024 * 1024):
+        self.max_frames = max_frames
+        self.max_bytes = max_bytes
+        self.frames = deque()
+        self.bytes = 0
+
+        # Statistics
+        self.appended = 0
+        self.evicted = 0
+
+    def __len__(self):
+        return len(self.frames)
+
+    def append(self, timestamp, jpeg_bytes):
+        """Add a frame, evicting old ones to stay within the limits"""
+        jpeg_bytes = bytes(jpeg_bytes)
+        self.frames.append((timestamp, jpeg_bytes))
+        self.bytes += len(jpeg_bytes)
+        self.appended += 1
+        while self.frames and (len(self.frames) > self.max_frames or self.bytes > self.max_bytes):
+            _, evicted = self.frames.popleft()
+            self.bytes -= len(evicted)
+            self.evicted += 1
+
+    def latest(self):
+        """The newest (timestamp, jpeg_bytes) pair, or None when empty"""
+        return self.frames[-1] if self.frames else None
+
+    def since(self, start):
+        """Frames with a timestamp at or after ``start``, oldest first"""
+        return [(ts, data) for ts, data in self.frames if ts >= start]
+
+    def clear(self):
+        self.frames.clear()
+        self.bytes = 0
+
+    def get_stats(self):
+        return {
+            'frames': len(self.frames),
+            'bytes': self.bytes,
+            'max_frames': self.max_frames,
+            'max_bytes': self.max_bytes,
+            'appended': self.appended,
+            'evicted': self.evicted,
+        }
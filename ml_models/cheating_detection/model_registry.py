@@ -0,0 +1,101 @@
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+def _default_face_detector(method, **options):
+    from .face_detector import FaceDetector
+    return FaceDetector(method=method, **options)
+
+
+def _default_object_detector(model_path, **options):
+    from .object_detector import ObjectDetector
+    if model_path is None:
+        return ObjectDetector(**options)
+    return ObjectDetector(model_path=model_path, **options)
+
+
+def _default_object_batcher(model_path, max_batch, window_ms, **options):
+    from .batch_inference import BatchingObjectDetector
+    return BatchingObjectDetector(
+        get_object_detector(model_path, **options), max_batch=max_batch, window_ms=window_ms
+    )
+
+
+def _default_audio_analyzer():
+    from .audio_analyzer import AudioAnalyzer
+    return AudioAnalyzer()
+
+
+# Factories build the detectors; they can be swapped (e.g. by the
+# benchmarks) to run without model weights or network access.
+_factories = {
+    'face_detector': _default_face_detector,
+    'object_detector': _default_object_detector,
+    'object_batcher': _default_object_batcher,
+    'audio_analyzer': _default_audio_analyzer,
+}
+
+# Shared detector instances, one per (kind, options) per process
+_instances = {}
+# Re-entrant: the batcher factory fetches the shared object detector
+_lock = threading.RLock()
+
+
+def _get_shared(kind, *options, **kwoptions):
+    key = (kind,) + options + tuple(sorted(kwoptions.items()))
+    instance = _instances.get(key)
+    if instance is None:
+        with _lock:
+            instance = _instances.get(key)
+            if instance is None:
+                logger.info(f"Loading shared {kind} {key[1:]}")
+                instance = _factories[kind](*options, **kwoptions)
+                _instances[key] = instance
+    return instance
+
+
+def get_face_detector(method='mtcnn', **options):
+    """Get the process-wide face detector for a detection method"""
+    return _get_shared('face_detector', method, **options)
+
+
+def get_object_detector(model_path=None, **options):
+    """Get the process-wide object detector for a model file"""
+    return _get_shared('object_detector', model_path, **options)
+
+
+def get_batching_object_detector(model_path=None, max_batch=8, window_ms=50, **options):
+    """Get the process-wide micro-batching front end for an object detector"""
+    return _get_shared('object_batcher', model_path, max_batch, window_ms, **options)
+
+
+def create_audio_analyzer():
+    """Create a per-session audio analyzer
+
+    Audio analyzers keep a per-session feature buffer and anomaly model,
+    so they are never shared.
+    """
+    return _factories['audio_analyzer']()
+
+
+def set_factory(kind, factory):
+    """Replace the factory for a detector kind and drop cached instances"""
+    if kind not in _factories:
+        raise ValueError(f"Unknown detector kind: {kind}")
+    with _lock:
+        _factories[kind] = factory
+        for key in [k for k in _instances if k[0] == kind]:
+            del _instances[key]
+
+
+def loaded_models():
+    """List the keys of the detectors loaded in this process"""
+    return list(_instances)
+
+
+def clear():
+    """Drop all shared detector instances"""
+    with _lock:
+        _instances.clear()
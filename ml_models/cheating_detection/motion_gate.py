@@ -0,0 +1,60 @@
+import cv2
+import numpy as np
+
+
+class MotionGate:
+    """Cheap scene-change filter used to skip redundant detector runs.
+
+    Frames are reduced to a small grayscale thumbnail and compared with the
+    thumbnail of the last analysed frame. Detection is only needed when
+    the mean absolute difference exceeds ``threshold`` (in 0-255 gray
+    levels) or when ``max_interval`` frames have been skipped in a row.
+    """
+
+    def __init__(self, threshold=4.0, max_interval=5, size=(64, 48)):
+        self.threshold = threshold
+        self.max_interval = max_interval
+        self.size = size
+
+        self.reference = None
+        self.since_analysis = 0
+
+        # Statistics
+        self.analyzed = 0
+        self.skipped = 0
+        self.last_score = None
+
+    def thumbnail(self, frame):
+        """Downscaled grayscale version of a BGR frame"""
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+        return cv2.resize(gray, self.size, interpolation=cv2.INTER_AREA)
+
+    def should_analyze(self, frame):
+        """Return True if the detectors should run on this frame"""
+        thumb = self.thumbnail(frame)
+
+        if self.reference is None or self.since_analysis >= self.max_interval:
+            changed = True
+            self.last_score = None
+        else:
+            self.last_score = float(np.mean(cv2.absdiff(thumb, self.reference)))
+            changed = self.last_score > self.threshold
+
+        if changed:
+            self.reference = thumb
+            self.since_analysis = 0
+            self.analyzed += 1
+        else:
+            self.since_analysis += 1
+            self.skipped += 1
+
+        return changed
+
+    def get_stats(self):
+        """Counts of analysed and skipped frames"""
+        total = self.analyzed + self.skipped
+        return {
+            'frames_analyzed': self.analyzed,
+            'frames_skipped': self.skipped,
+            'skip_ratio': self.skipped / total if total else 0.0,
+        }
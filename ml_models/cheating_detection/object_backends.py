@@ -0,0 +1,200 @@
+import ast
+import logging
+
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+COCO_NAMES = [
+    'person', 'bicycle', 'car', 'motorcycle', 'airplane', 'bus', 'train', 'truck', 'boat',
+    'traffic light', 'fire hydrant', 'stop sign', 'parking meter', 'bench', 'bird', 'cat',
+    'dog', 'horse', 'sheep', 'cow', 'elephant', 'bear', 'zebra', 'giraffe', 'backpack',
+    'umbrella', 'handbag', 'tie', 'suitcase', 'frisbee', 'skis', 'snowboard', 'sports ball',
+    'kite', 'baseball bat', 'baseball glove', 'skateboard', 'surfboard', 'tennis racket',
+    'bottle', 'wine glass', 'cup', 'fork', 'knife', 'spoon', 'bowl', 'banana', 'apple',
+    'sandwich', 'orange', 'broccoli', 'carrot', 'hot dog', 'pizza', 'donut', 'cake', 'chair',
+    'couch', 'potted plant', 'bed', 'dining table', 'toilet', 'tv', 'laptop', 'mouse',
+    'remote', 'keyboard', 'cell phone', 'microwave', 'oven', 'toaster', 'sink',
+    'refrigerator', 'book', 'clock', 'vase', 'scissors', 'teddy bear', 'hair drier',
+    'toothbrush'
+]
+
+
+class TorchBackend:
+    """YOLOv5 through torch.hub with eager PyTorch inference"""
+
+    def __init__(self, model_path, input_size=640, conf=0.45, iou=0.45, target_classes=None):
+        import torch
+
+        self.input_size = input_size
+        self.model = torch.hub.load('ultralytics/yolov5', 'custom',
+                                    path=model_path, force_reload=False)
+        self.model.conf = conf  # Confidence threshold
+        self.model.iou = iou    # IOU threshold for NMS
+        self.names = self.model.names
+
+        # YOLOv5 drops other classes before NMS when model.classes is set
+        if target_classes:
+            names = self.names.items() if isinstance(self.names, dict) else enumerate(self.names)
+            self.model.classes = [i for i, name in names if name in target_classes]
+
+    def infer(self, frames):
+        """Run frames through the model; one (N, 6) xyxy/conf/cls array per frame"""
+        # The hub model's AutoShape wrapper takes numpy images as RGB
+        rgb = [cv2.cvtColor(frame, cv2.COLOR_BGR2RGB) for frame in frames]
+        results = self.model(rgb, size=self.input_size)
+        return [pred.cpu().numpy() for pred in results.xyxy]
+
+
+class OnnxBackend:
+    """Exported YOLOv5 ONNX model on ONNX Runtime's CPU provider
+
+    Letterboxing, confidence filtering, NMS and target-class filtering are
+    done here in NumPy, so neither PyTorch nor hub access is needed.
+    """
+
+    def __init__(self, model_path, input_size=640, conf=0.45, iou=0.45, target_classes=None,
+                 intra_op_threads=0):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.intra_op_num_threads = intra_op_threads  # 0 lets ONNX Runtime decide
+        self.session = ort.InferenceSession(
+            model_path, options, providers=['CPUExecutionProvider']
+        )
+        model_input = self.session.get_inputs()[0]
+        self.input_name = model_input.name
+
+        # Exported models usually have a fixed input size and batch of 1
+        height, width = model_input.shape[2:4]
+        self.input_shape = (
+            height if isinstance(height, int) else input_size,
+            width if isinstance(width, int) else input_size,
+        )
+        batch = model_input.shape[0]
+        self.max_batch = batch if isinstance(batch, int) else None
+
+        self.conf = conf
+        self.iou = iou
+        self.names = self._read_names()
+        self.class_ids = None
+        if target_classes:
+            self.class_ids = np.array(
+                [i for i, name in enumerate(self.names) if name in target_classes]
+            )
+
+    def _read_names(self):
+        metadata = self.session.get_modelmeta().custom_metadata_map
+        if 'names' in metadata:
+            names = ast.literal_eval(metadata['names'])
+            if isinstance(names, dict):
+                return [names[i] for i in sorted(names)]
+            return list(names)
+        return COCO_NAMES
+
+    def infer(self, frames):
+        """Run frames through the model; one (N, 6) xyxy/conf/cls array per frame"""
+        frames = list(frames)
+        step = self.max_batch or len(frames)
+        outputs = []
+        for start in range(0, len(frames), step):
+            chunk = frames[start:start + step]
+            blobs, transforms = zip(*(letterbox(f, self.input_shape) for f in chunk))
+            pred = self.session.run(None, {self.input_name: np.stack(blobs)})[0]
+            for frame_pred, (ratio, pad), frame in zip(pred, transforms, chunk):
+                outputs.append(decode_predictions(
+                    frame_pred, ratio, pad, frame.shape[:2],
+                    self.conf, self.iou, self.class_ids
+                ))
+        return outputs
+
+
+def letterbox(frame, shape, color=114):
+    """Resize keeping aspect ratio and pad to shape; returns a CHW float blob"""
+    h, w = frame.shape[:2]
+    ratio = min(shape[0] / h, shape[1] / w)
+    nh, nw = int(round(h * ratio)), int(round(w * ratio))
+    pad_y, pad_x = (shape[0] - nh) / 2, (shape[1] - nw) / 2
+
+    resized = cv2.resize(frame, (nw, nh), interpolation=cv2.INTER_LINEAR)
+    top, left = int(round(pad_y - 0.1)), int(round(pad_x - 0.1))
+    canvas = np.full((shape[0], shape[1], 3), color, dtype=np.uint8)
+    canvas[top:top + nh, left:left + nw] = resized
+
+    # BGR HWC uint8 -> RGB CHW float32 in [0, 1]
+    blob = canvas[:, :, ::-1].transpose(2, 0, 1).astype(np.float32) / 255.0
+    return np.ascontiguousarray(blob), (ratio, (left, top))
+
+
+def nms(boxes, scores, iou_threshold):
+    """Greedy non-maximum suppression; returns kept indices by score"""
+    x1, y1, x2, y2 = boxes.T
+    areas = (x2 - x1) * (y2 - y1)
+    order = scores.argsort()[::-1]
+    keep = []
+    while order.size:
+        i = order[0]
+        keep.append(i)
+        xx1 = np.maximum(x1[i], x1[order[1:]])
+        yy1 = np.maximum(y1[i], y1[order[1:]])
+        xx2 = np.minimum(x2[i], x2[order[1:]])
+        yy2 = np.minimum(y2[i], y2[order[1:]])
+        inter = np.clip(xx2 - xx1, 0, None) * np.clip(yy2 - yy1, 0, None)
+        iou = inter / (areas[i] + areas[order[1:]] - inter + 1e-9)
+        order = order[1:][iou <= iou_threshold]
+    return np.array(keep, dtype=np.int64)
+
+
+def decode_predictions(pred, ratio, pad, frame_shape, conf, iou, class_ids=None):
+    """Decode raw YOLOv5 output rows (xywh, objectness, class scores)
+
+    Only class_ids are considered (all classes when None); they are
+    filtered before NMS. Boxes are mapped back from the letterboxed input
+    to frame coordinates.
+    """
+    pred = pred[pred[:, 4] > conf]
+    class_scores = pred[:, 5:] * pred[:, 4:5]
+    if class_ids is not None:
+        class_scores = class_scores[:, class_ids]
+
+    best = class_scores.argmax(axis=1)
+    scores = class_scores[np.arange(len(best)), best]
+    mask = scores > conf
+    pred, best, scores = pred[mask], best[mask], scores[mask]
+    classes = class_ids[best] if class_ids is not None else best
+
+    if not len(pred):
+        return np.zeros((0, 6), dtype=np.float32)
+
+    xy, wh = pred[:, :2], pred[:, 2:4] / 2
+    boxes = np.concatenate([xy - wh, xy + wh], axis=1)
+
+    # Offset boxes per class so NMS never suppresses across classes
+    offsets = classes[:, None].astype(np.float32) * 4096.0
+    keep = nms(boxes + offsets, scores, iou)
+    boxes, scores, classes = boxes[keep], scores[keep], classes[keep]
+
+    boxes -= np.array([pad[0], pad[1], pad[0], pad[1]], dtype=np.float32)
+    boxes /= ratio
+    h, w = frame_shape
+    boxes[:, [0, 2]] = boxes[:, [0, 2]].clip(0, w)
+    boxes[:, [1, 3]] = boxes[:, [1, 3]].clip(0, h)
+
+    return np.concatenate(
+        [boxes, scores[:, None], classes[:, None].astype(np.float32)], axis=1
+    ).astype(np.float32)
+
+
+BACKENDS = {
+    'torch': TorchBackend,
+    'onnx': OnnxBackend,
+}
+
+
+def load_backend(name, model_path, **options):
+    """Create an object detection backend by name"""
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown object detector backend: {name}")
+    return BACKENDS[name](model_path, **options)
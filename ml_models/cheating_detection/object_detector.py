@@ -1,23 +1,67 @@
-import torch
-import cv2
 import numpy as np
 import logging
-from pathlib import Path
+import threading
+from .object_backends import load_backend
 
 logger = logging.getLogger(__name__)
 
+def parse_detections(pred, class_names, target_ids):
+    """Turn an (N, 6) x1/y1/x2/y2/conf/cls array into detection dicts
+    
+    Filtering to target classes and coordinate conversion are vectorised;
+    only building the result dicts touches each box in Python.
+    """
+    pred = np.asarray(pred)
+    if not len(pred):
+        return []
+    
+    cls = pred[:, 5].astype(np.int64)
+    keep = np.isin(cls, target_ids)
+    pred, cls = pred[keep], cls[keep]
+    
+    boxes = pred[:, :4].astype(np.int64).tolist()
+    confidences = pred[:, 4].astype(float).tolist()
+    return [
+        {'class': name, 'confidence': conf, 'bbox': box}
+        for name, conf, box in zip(class_names[cls], confidences, boxes)
+    ]
+
 class ObjectDetector:
-    def __init__(self, model_path='ml_models/yolov5/yolov5s.pt'):
-        """Initialize YOLOv5 object detector"""
+    def __init__(self, model_path='ml_models/yolov5/yolov5s.pt', input_size=640, backend='torch'):
+        """Initialize YOLOv5 object detector
+        
+        input_size is the inference resolution (longest side); detections
+        are returned in original frame coordinates.
+        
+        backend selects the runtime: 'torch' loads model_path through
+        torch.hub, 'onnx' runs an exported .onnx model with ONNX Runtime.
+        """
+        self.input_size = input_size
+        self.backend = backend
+        
+        # Detector instances are shared between sessions
+        self._lock = threading.Lock()
+        
+        # Classes we're interested in detecting
+        self.target_classes = ['cell phone', 'laptop', 'book', 'person']
+        
         try:
             # Load YOLOv5 model
-            self.model = torch.hub.load('ultralytics/yolov5', 'custom', 
-                                       path=model_path, force_reload=False)
-            self.model.conf = 0.45  # Confidence threshold
-            self.model.iou = 0.45   # IOU threshold for NMS
+            self.model = load_backend(
+                backend, model_path,
+                input_size=input_size,
+                conf=0.45,  # Confidence threshold
+                iou=0.45,   # IOU threshold for NMS
+                target_classes=self.target_classes
+            )
             
-            # Classes we're interested in detecting
-            self.target_classes = ['cell phone', 'laptop', 'book', 'person']
+            names = self.model.names
+            if isinstance(names, dict):
+                names = [names[i] for i in sorted(names)]
+            self.class_names = np.array(names, dtype=object)
+            self.target_ids = np.array(
+                [i for i, name in enumerate(names) if name in self.target_classes]
+            )
             
         except Exception as e:
             logger.error(f"Failed to load object detection model: {str(e)}")
@@ -30,25 +74,34 @@ class ObjectDetector:
         
         try:
             # Run inference
-            results = self.model(frame)
+            with self._lock:
+                preds = self.model.infer([frame])
             
-            # Parse results
-            detections = []
-            for *box, conf, cls in results.xyxy[0]:  # xyxy format
-                class_name = self.model.names[int(cls)]
-                if class_name in self.target_classes:
-                    detections.append({
-                        'class': class_name,
-                        'confidence': float(conf),
-                        'bbox': [int(x) for x in box]
-                    })
-            
-            return detections
+            return self._parse(preds[0])
         
         except Exception as e:
             logger.error(f"Object detection error: {str(e)}")
             return []
     
+    def detect_objects_batch(self, frames):
+        """Detect objects in several frames with one forward pass"""
+        if self.model is None:
+            return [[] for _ in frames]
+        
+        try:
+            with self._lock:
+                preds = self.model.infer(frames)
+            
+            return [self._parse(pred) for pred in preds]
+        
+        except Exception as e:
+            logger.error(f"Batched object detection error: {str(e)}")
+            return [[] for _ in frames]
+    
+    def _parse(self, pred):
+        """Convert one image's xyxy predictions into detection dicts"""
+        return parse_detections(pred, self.class_names, self.target_ids)
+    
     def detect_phone(self, frame):
         """Specifically detect cell phones in frame"""
         detections = self.detect_objects(frame)
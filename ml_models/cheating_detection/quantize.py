@@ -0,0 +1,123 @@
+"""Build INT8 detector models from a folder of sample frames.
+
+Usage (from the repository root)::
+
+    python -m ml_models.cheating_detection.quantize --frames samples/ \\
+        --yolo ml_models/yolov5/yolov5s.onnx --yolo-out ml_models/yolov5/yolov5s.int8.onnx \\
+        --face ml_models/weights/res10_300x300_ssd.onnx \\
+        --face-out ml_models/weights/res10_300x300_ssd.int8.onnx
+
+Inputs are FP32 ONNX exports: YOLOv5's ``export.py --include onnx`` for
+the object detector, and an ONNX conversion of the res10 SSD used by
+FaceDetector's 'opencv_dnn' method. Static QDQ quantisation is calibrated
+on the sample frames with the same preprocessing the detectors use at
+inference time.
+"""
+import argparse
+import logging
+import os
+
+import cv2
+import numpy as np
+
+from .face_detector import dnn_blob
+from .object_backends import letterbox
+
+logger = logging.getLogger(__name__)
+
+
+class FrameCalibrationReader:
+    """Feed preprocessed sample frames to ONNX Runtime's calibrator"""
+
+    def __init__(self, model_path, frames, preprocess):
+        import onnxruntime as ort
+
+        session = ort.InferenceSession(model_path, providers=['CPUExecutionProvider'])
+        model_input = session.get_inputs()[0]
+        self.input_name = model_input.name
+        self.input_shape = model_input.shape
+        self.frames = frames
+        self.preprocess = preprocess
+        self._iter = None
+
+    def get_next(self):
+        if self._iter is None:
+            self._iter = ({self.input_name: self.preprocess(f, self.input_shape)}
+                          for f in self.frames)
+        return next(self._iter, None)
+
+    def rewind(self):
+        self._iter = None
+
+
+def yolo_input(frame, input_shape):
+    height, width = input_shape[2:4]
+    shape = (height if isinstance(height, int) else 640, width if isinstance(width, int) else 640)
+    blob, _ = letterbox(frame, shape)
+    return blob[None]
+
+
+def face_input(frame, input_shape):
+    return dnn_blob(frame).astype(np.float32)
+
+
+def load_sample_frames(path, limit):
+    names = sorted(n for n in os.listdir(path) if n.lower().endswith(('.jpg', '.jpeg', '.png')))
+    frames = [cv2.imread(os.path.join(path, n)) for n in names[:limit]]
+    return [f for f in frames if f is not None]
+
+
+def quantize_model(model_path, output_path, frames, preprocess, per_channel=True,
+                   exclude_nodes=None):
+    """Statically quantize an FP32 ONNX model to INT8 (QDQ format)"""
+    from onnxruntime.quantization import (CalibrationMethod, QuantFormat, QuantType,
+                                          quantize_static)
+    from onnxruntime.quantization.shape_inference import quant_pre_process
+
+    prepared = output_path + '.prep.onnx'
+    quant_pre_process(model_path, prepared)
+    try:
+        quantize_static(
+            prepared, output_path,
+            FrameCalibrationReader(prepared, frames, preprocess),
+            quant_format=QuantFormat.QDQ,
+            activation_type=QuantType.QUInt8,
+            weight_type=QuantType.QInt8,
+            per_channel=per_channel,
+            calibrate_method=CalibrationMethod.MinMax,
+            nodes_to_exclude=exclude_nodes or [],
+        )
+    finally:
+        os.remove(prepared)
+    logger.info(f"Wrote {output_path}")
+    return output_path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--frames', required=True, help='directory of sample frames')
+    parser.add_argument('--limit', type=int, default=200, help='calibration frames to use')
+    parser.add_argument('--yolo', help='FP32 YOLOv5 ONNX model')
+    parser.add_argument('--yolo-out', help='INT8 YOLOv5 output path')
+    parser.add_argument('--yolo-exclude', default='',
+                        help='comma separated node names to keep in FP32 (e.g. the Detect head)')
+    parser.add_argument('--face', help='FP32 res10 SSD ONNX model')
+    parser.add_argument('--face-out', help='INT8 face model output path')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    frames = load_sample_frames(args.frames, args.limit)
+    if not frames:
+        parser.error(f"No frames found in {args.frames}")
+
+    if args.yolo:
+        exclude = [n for n in args.yolo_exclude.split(',') if n]
+        quantize_model(args.yolo, args.yolo_out or args.yolo.replace('.onnx', '.int8.onnx'),
+                       frames, yolo_input, exclude_nodes=exclude)
+    if args.face:
+        quantize_model(args.face, args.face_out or args.face.replace('.onnx', '.int8.onnx'),
+                       frames, face_input)
+
+
+if __name__ == '__main__':
+    main()
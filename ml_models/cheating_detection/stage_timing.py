@@ -0,0 +1,116 @@
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+
+class _NullSpan:
+    """Span used while timing is disabled; does nothing"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ('timer', 'stage', 'start')
+
+    def __init__(self, timer, stage):
+        self.timer = timer
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.timer.observe(self.stage, time.perf_counter() - self.start)
+        return False
+
+
+class StageTimer:
+    """Per-stage latency histograms for the monitoring pipeline.
+
+    ``with stage_timer.span('face_detect'): ...`` records the time spent in
+    a stage. While disabled, span() returns a shared no-op context manager
+    so instrumented code pays only for the call. Quantiles are computed
+    over the most recent ``window`` samples of each stage; counts and sums
+    cover the whole process lifetime.
+    """
+
+    QUANTILES = (0.5, 0.95, 0.99)
+
+    def __init__(self, window=2048):
+        self.enabled = False
+        self.window = window
+        self._samples = {}
+        self._counts = {}
+        self._sums = {}
+        self._lock = threading.Lock()
+
+    def enable(self, enabled=True):
+        self.enabled = enabled
+
+    def span(self, stage):
+        """Context manager timing one execution of a stage"""
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, stage)
+
+    def observe(self, stage, seconds):
+        """Record a duration for a stage"""
+        if not self.enabled:
+            return
+        with self._lock:
+            samples = self._samples.get(stage)
+            if samples is None:
+                samples = self._samples[stage] = deque(maxlen=self.window)
+                self._counts[stage] = 0
+                self._sums[stage] = 0.0
+            samples.append(seconds)
+            self._counts[stage] += 1
+            self._sums[stage] += seconds
+
+    def snapshot(self):
+        """Count, sum and p50/p95/p99 (seconds) for every stage"""
+        with self._lock:
+            data = {stage: (list(samples), self._counts[stage], self._sums[stage])
+                    for stage, samples in self._samples.items()}
+        result = {}
+        for stage, (samples, count, total) in data.items():
+            quantiles = np.quantile(samples, self.QUANTILES) if samples else [0.0] * len(self.QUANTILES)
+            result[stage] = {
+                'count': count,
+                'sum': total,
+                'quantiles': dict(zip(self.QUANTILES, (float(q) for q in quantiles))),
+            }
+        return result
+
+    def reset(self):
+        with self._lock:
+            self._samples.clear()
+            self._counts.clear()
+            self._sums.clear()
+
+    def prometheus(self, name='exam_monitor_stage_seconds'):
+        """Render the stage histograms in Prometheus text exposition format"""
+        lines = [
+            f'# HELP {name} Time spent in each frame monitoring stage.',
+            f'# TYPE {name} summary',
+        ]
+        for stage, data in sorted(self.snapshot().items()):
+            for q, value in data['quantiles'].items():
+                lines.append(f'{name}{{stage="{stage}",quantile="{q}"}} {value:.6f}')
+            lines.append(f'{name}_sum{{stage="{stage}"}} {data["sum"]:.6f}')
+            lines.append(f'{name}_count{{stage="{stage}"}} {data["count"]}')
+        return '\n'.join(lines) + '\n'
+
+
+# Process-wide timer shared by the detectors and the web app
+stage_timer = StageTimer()
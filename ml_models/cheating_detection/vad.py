@@ -0,0 +1,149 @@
+from collections import deque
+from datetime import datetime, timedelta
+
+import numpy as np
+
+
+class StreamingVAD:
+    """Energy-based voice activity detection over a continuous PCM stream.
+
+    Audio is cut into ``frame_ms`` frames; a frame is voiced when its RMS
+    is ``energy_ratio`` times above the tracked noise floor (and at least
+    ``min_energy``). Speech starts once ``start_ratio`` of the last
+    ``window_ms`` of frames are voiced and ends after ``hangover_ms`` of
+    unvoiced frames, so short clicks and pauses between words don't open
+    or close a segment. Segments longer than ``max_segment_s`` are split
+    so long conversations are still reported while they go on.
+
+    process() returns the segments that ended within the chunk, each with
+    wall-clock start and end times.
+    """
+
+    def __init__(self, sample_rate=16000, frame_ms=30, window_ms=300, start_ratio=0.6,
+                 hangover_ms=800, energy_ratio=3.0, min_energy=0.01, max_segment_s=30.0):
+        self.sample_rate = sample_rate
+        self.frame_length = int(sample_rate * frame_ms / 1000)
+        self.frame_seconds = self.frame_length / sample_rate
+        self.window_frames = max(1, int(window_ms / frame_ms))
+        self.start_frames = max(1, int(round(self.window_frames * start_ratio)))
+        self.hangover_frames = max(1, int(hangover_ms / frame_ms))
+        self.energy_ratio = energy_ratio
+        self.min_energy = min_energy
+        self.max_segment_frames = int(max_segment_s / self.frame_seconds)
+
+        self.noise_floor = None
+        self.window = deque(maxlen=self.window_frames)
+        self.remainder = np.zeros(0, dtype=np.float32)
+        # Frames seen so far; the stream's own clock
+        self.position = 0
+
+        self.active = False
+        self.segment_start = None
+        self.last_voiced = None
+        self.voiced_in_segment = 0
+
+        # Statistics
+        self.frames = 0
+        self.voiced_frames = 0
+        self.segments = 0
+
+    def process(self, samples, timestamp=None):
+        """Feed float PCM samples; returns the voice segments that ended
+
+        ``timestamp`` is the wall-clock time of the last sample, used to
+        place frame positions in time (defaults to now).
+        """
+        timestamp = timestamp or datetime.now()
+        samples = np.concatenate([self.remainder, np.asarray(samples, dtype=np.float32)])
+        count = len(samples) // self.frame_length
+        self.remainder = samples[count * self.frame_length:]
+        if count == 0:
+            return []
+
+        # Frame positions are mapped to wall time relative to the chunk end
+        end_position = self.position + count + len(self.remainder) / self.frame_length
+        origin = timestamp - timedelta(seconds=end_position * self.frame_seconds)
+
+        frames = samples[:count * self.frame_length].reshape(count, self.frame_length)
+        energies = np.sqrt(np.mean(frames ** 2, axis=1))
+
+        segments = []
+        for energy in energies:
+            segment = self._step(float(energy), origin)
+            if segment is not None:
+                segments.append(segment)
+        return segments
+
+    def flush(self, timestamp=None):
+        """End an open segment, e.g. when the stream stops"""
+        if not self.active:
+            return []
+        origin = (timestamp or datetime.now()) - timedelta(seconds=self.position * self.frame_seconds)
+        segment = self._close(origin)
+        return [segment] if segment is not None else []
+
+    def get_stats(self):
+        return {
+            'frames': self.frames,
+            'voiced_frames': self.voiced_frames,
+            'segments': self.segments,
+            'active': self.active,
+            'noise_floor': round(self.noise_floor, 5) if self.noise_floor is not None else None,
+        }
+
+    def _step(self, energy, origin):
+        if self.noise_floor is None:
+            self.noise_floor = energy
+        voiced = energy > max(self.min_energy, self.noise_floor * self.energy_ratio)
+        if not voiced:
+            # Follow drops in background noise quickly and rises slowly
+            self.noise_floor = min(energy, 0.95 * self.noise_floor + 0.05 * energy)
+
+        index = self.position
+        self.position += 1
+        self.frames += 1
+        self.window.append(voiced)
+        if voiced:
+            self.voiced_frames += 1
+            self.last_voiced = index
+
+        if not self.active:
+            if sum(self.window) >= self.start_frames:
+                self.active = True
+                self.segment_start = index - len(self.window) + 1
+                self.voiced_in_segment = sum(self.window)
+            return None
+
+        self.voiced_in_segment += voiced
+        if index - self.last_voiced >= self.hangover_frames:
+            self.window.clear()
+            return self._close(origin)
+        if index - self.segment_start + 1 >= self.max_segment_frames:
+            # Report long speech in pieces; the next piece starts here
+            segment = self._close(origin, end=index)
+            self.active = True
+            self.segment_start = index + 1
+            self.voiced_in_segment = 0
+            return segment
+        return None
+
+    def _close(self, origin, end=None):
+        end = self.last_voiced if end is None else end
+        frames = end - self.segment_start + 1
+        if frames <= 0:
+            # Nothing voiced since the last split
+            self.active = False
+            self.segment_start = None
+            self.voiced_in_segment = 0
+            return None
+        segment = {
+            'start': origin + timedelta(seconds=self.segment_start * self.frame_seconds),
+            'end': origin + timedelta(seconds=(end + 1) * self.frame_seconds),
+            'duration': round(frames * self.frame_seconds, 3),
+            'voiced_ratio': round(min(1.0, self.voiced_in_segment / max(frames, 1)), 3),
+        }
+        self.active = False
+        self.segment_start = None
+        self.voiced_in_segment = 0
+        self.segments += 1
+        return segment
@@ -0,0 +1,210 @@
+from datetime import datetime
+
+import cv2
+import numpy as np
+import pytest
+
+from app import create_app, db, evidence_writer, frame_pipeline
+from app.models.exam import ExamSession
+from app.models.user import User
+from app.routes import api
+from ml_models.cheating_detection.frame_ring import FrameRing
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = create_app('testing')
+    app.config['UPLOAD_FOLDER'] = str(tmp_path)
+    evidence_writer.init_app(app)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+    api.active_monitors.clear()
+    api.session_exams.clear()
+    api.session_students.clear()
+
+
+class StubMonitor:
+    """Keeps frames like ActivityMonitor but detects nothing"""
+
+    def __init__(self, frame_buffer):
+        self.frame_buffer = frame_buffer
+
+    def analyze_frame(self, frame, audio_data=None, jpeg_bytes=None):
+        if jpeg_bytes is not None:
+            self.frame_buffer.append(datetime.now(), jpeg_bytes)
+        return []
+
+
+def encoded_frame():
+    frame = np.full((48, 64, 3), 127, dtype=np.uint8)
+    return frame, cv2.imencode('.jpg', frame)[1].tobytes()
+
+
+def test_process_frame_with_ring_smaller_than_a_frame(app):
+    frame, jpeg = encoded_frame()
+    evidence_writer.clip_activities = ('phone_detected',)
+    opened = FrameRing()
+    opened.append(datetime.now(), b'earlier')
+    evidence_writer.start_clip(1, 1, 'phone_detected', datetime.now(), opened)
+    monitor = StubMonitor(FrameRing(max_bytes=len(jpeg) - 1))
+    api.active_monitors[1] = monitor
+
+    assert api._process_frame(1, frame, 1, 'student', frame_bytes=jpeg) == []
+
+    assert len(monitor.frame_buffer) == 0
+    clip, = evidence_writer._clips[1]
+    assert clip['frames'][-1][1] == jpeg
+    evidence_writer.end_session(1)
+
+
+def test_end_session_streams_releases_session_state(app):
+    monitor = StubMonitor(FrameRing())
+    monitor.frame_buffer.append(datetime.now(), b'frame')
+    api.active_monitors[1] = monitor
+    api.session_exams[1] = 7
+
+    # Disconnect: the student may come back
+    api.end_session_streams(1)
+
+    assert api.active_monitors[1] is monitor
+    assert len(monitor.frame_buffer) == 0
+
+    # Submit: the session is over
+    monitor.frame_buffer.append(datetime.now(), b'frame')
+    api.end_session_streams(1, finished=True)
+
+    assert 1 not in api.active_monitors
+    assert 1 not in api.session_exams
+    assert len(monitor.frame_buffer) == 0
+
+
+@pytest.fixture
+def audio_socket(app):
+    from app import socketio
+
+    client = socketio.test_client(app)
+    sid = socketio.server.manager.sid_from_eio_sid(client.eio_sid, '/')
+    api.socket_sessions[sid] = {'session_id': 1, 'student_id': 1, 'student_name': 'student'}
+    yield client, sid
+    api.socket_sessions.pop(sid, None)
+    api.audio_buffers.pop(sid, None)
+    client.disconnect()
+
+
+def buffered_samples(sid):
+    return sum(len(chunk) for chunk in api.audio_buffers.get(sid, []))
+
+
+def test_audio_s16le_with_odd_byte_count(audio_socket):
+    client, sid = audio_socket
+    pcm = np.array([1000, -1000, 2000], dtype='<i2').tobytes() + b'\x01'
+
+    client.emit('audio_data', {'pcm': pcm, 'format': 's16le', 'sample_rate': 16000})
+
+    buffer, = api.audio_buffers[sid]
+    np.testing.assert_allclose(buffer, np.array([1000, -1000, 2000]) / 32768.0)
+
+
+def test_audio_f32_with_partial_sample(audio_socket):
+    client, sid = audio_socket
+    pcm = np.array([0.25, -0.5], dtype='<f4').tobytes() + b'\x00\x01\x02'
+
+    client.emit('audio_data', {'pcm': pcm, 'sample_rate': 16000})
+
+    buffer, = api.audio_buffers[sid]
+    assert buffer.tolist() == [0.25, -0.5]
+
+
+def test_empty_audio_at_other_rate_is_ignored(audio_socket):
+    client, sid = audio_socket
+
+    client.emit('audio_data', {'pcm': b'', 'format': 's16le', 'sample_rate': 48000})
+    client.emit('audio_data', {'pcm': b'\x01', 'format': 's16le', 'sample_rate': 48000})
+
+    assert buffered_samples(sid) == 0
+    assert client.get_received() == []
+
+
+@pytest.mark.parametrize('sample_rate', [-16000, 1, 10 ** 9, 'fast'])
+def test_audio_with_unsupported_sample_rate_is_rejected(audio_socket, sample_rate):
+    client, sid = audio_socket
+    pcm = np.zeros(160, dtype='<i2').tobytes()
+
+    client.emit('audio_data', {'pcm': pcm, 'format': 's16le', 'sample_rate': sample_rate})
+
+    assert buffered_samples(sid) == 0
+    received, = client.get_received()
+    assert received['name'] == 'error'
+
+
+def test_audio_at_other_rate_is_resampled(audio_socket):
+    client, sid = audio_socket
+    pcm = np.zeros(4800, dtype='<i2').tobytes()
+
+    client.emit('audio_data', {'pcm': pcm, 'format': 's16le', 'sample_rate': 48000})
+
+    assert buffered_samples(sid) == 1600
+
+
+def add_user(username):
+    user = User(username=username, email=f'{username}@example.com')
+    user.set_password(username)
+    db.session.add(user)
+    return user
+
+
+def logged_in_client(app, username):
+    client = app.test_client()
+    client.post('/auth/login', data={'username': username, 'password': username})
+    return client
+
+
+@pytest.fixture
+def sessions(tmp_path):
+    """A monitored session of one student and clients for them and another
+
+    Requests run outside the setup's app context, so each gets its own
+    logged-in user.
+    """
+    app = create_app('testing')
+    app.config['UPLOAD_FOLDER'] = str(tmp_path)
+    with app.app_context():
+        db.create_all()
+        owner = add_user('owner')
+        add_user('other')
+        db.session.commit()
+        session = ExamSession(exam_id=1, student_id=owner.id)
+        db.session.add(session)
+        db.session.commit()
+        session_id = session.id
+    api.active_monitors[session_id] = StubMonitor(FrameRing())
+    yield session_id, logged_in_client(app, 'owner'), logged_in_client(app, 'other')
+    frame_pipeline.drain([session_id], timeout=5.0)
+    api.active_monitors.clear()
+    api.session_students.clear()
+
+
+def test_binary_frames_only_from_the_session_student(sessions):
+    session_id, owner_client, other_client = sessions
+    _, jpeg = encoded_frame()
+
+    def post(client):
+        return client.post('/api/submit_frame/binary', data=jpeg, content_type='image/jpeg',
+                           headers={'X-Session-Id': str(session_id)})
+
+    assert post(other_client).status_code == 400
+    assert post(owner_client).status_code == 202
+
+
+def test_json_frames_only_from_the_session_student(sessions):
+    import base64
+
+    session_id, owner_client, other_client = sessions
+    _, jpeg = encoded_frame()
+    body = {'session_id': session_id,
+            'frame': 'data:image/jpeg;base64,' + base64.b64encode(jpeg).decode()}
+
+    assert other_client.post('/api/submit_frame', json=body).status_code == 400
+    assert owner_client.post('/api/submit_frame', json=body).status_code == 202
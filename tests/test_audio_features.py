@@ -0,0 +1,101 @@
+"""AudioFeatureExtractor against the librosa features the anomaly model was fit on.
+
+The reference values in data/librosa_audio_features.json were computed with
+librosa 0.10.1 by reference_features(), the extraction code AudioAnalyzer
+used before AudioFeatureExtractor. Regenerate them with librosa installed::
+
+    python -m tests.test_audio_features
+"""
+import json
+import os
+
+import numpy as np
+import pytest
+
+from ml_models.cheating_detection.audio_features import FEATURE_NAMES, AudioFeatureExtractor
+
+SAMPLE_RATE = 16000
+FRAME_LENGTH = 2048
+REFERENCE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data',
+                         'librosa_audio_features.json')
+
+
+def make_signals():
+    """Deterministic test chunks by name"""
+    rng = np.random.default_rng(25)
+    t = np.arange(SAMPLE_RATE) / SAMPLE_RATE
+    envelope = 0.5 + 0.5 * np.sin(2 * np.pi * 3 * t)
+    voiced = sum(np.sin(2 * np.pi * 150 * k * t) / k for k in range(1, 8))
+    signals = {
+        'silence': np.zeros(SAMPLE_RATE),
+        'noise': 0.1 * rng.standard_normal(SAMPLE_RATE),
+        'tone': 0.5 * np.sin(2 * np.pi * 440 * t) + 0.01 * rng.standard_normal(SAMPLE_RATE),
+        'speech_like': 0.2 * envelope * voiced + 0.02 * rng.standard_normal(SAMPLE_RATE),
+        # Mostly within librosa's zero-crossing threshold of 1e-10
+        'near_zero': 1e-10 * rng.standard_normal(SAMPLE_RATE),
+        'short_noise': 0.05 * rng.standard_normal(12000),
+    }
+    return {name: signal.astype(np.float32) for name, signal in signals.items()}
+
+
+def reference_features(audio_data):
+    """Features as AudioAnalyzer computed them with librosa"""
+    import librosa
+
+    hop_length = FRAME_LENGTH // 2
+    stft = librosa.stft(audio_data, n_fft=FRAME_LENGTH, hop_length=hop_length)
+    magnitude = np.abs(stft)
+    mfccs = librosa.feature.mfcc(y=audio_data, sr=SAMPLE_RATE, n_mfcc=13)
+    values = [
+        np.sqrt(np.mean(audio_data ** 2)),
+        np.mean(librosa.zero_crossings(audio_data)),
+        np.mean(librosa.feature.spectral_centroid(S=magnitude, sr=SAMPLE_RATE)),
+        np.mean(librosa.feature.spectral_rolloff(S=magnitude, sr=SAMPLE_RATE)),
+        np.mean(librosa.feature.spectral_bandwidth(S=magnitude, sr=SAMPLE_RATE)),
+    ] + [np.mean(mfcc) for mfcc in mfccs]
+    return [float(value) for value in values]
+
+
+@pytest.fixture(scope='module')
+def reference():
+    with open(REFERENCE) as f:
+        return json.load(f)
+
+
+@pytest.fixture(scope='module')
+def extractor():
+    return AudioFeatureExtractor(sample_rate=SAMPLE_RATE, n_fft=FRAME_LENGTH,
+                                 hop_length=FRAME_LENGTH // 2)
+
+
+@pytest.mark.parametrize('name', sorted(make_signals()))
+def test_features_match_librosa(reference, extractor, name):
+    expected = dict(zip(reference['feature_names'], reference['features'][name]))
+    actual = dict(zip(FEATURE_NAMES, extractor.extract(make_signals()[name])))
+
+    for feature in FEATURE_NAMES:
+        # librosa works in float32; allow its rounding
+        tolerance = 1e-3 if feature.startswith('mfcc') else 1e-4 * max(1.0, abs(expected[feature]))
+        assert actual[feature] == pytest.approx(expected[feature], abs=tolerance), feature
+
+
+def test_batch_matches_single_chunks(extractor):
+    signals = make_signals()
+    names = [name for name in sorted(signals) if len(signals[name]) == SAMPLE_RATE]
+
+    batch = extractor.extract_batch(np.stack([signals[name] for name in names]))
+
+    for row, name in zip(batch, names):
+        np.testing.assert_allclose(row, extractor.extract(signals[name]), rtol=1e-6, atol=1e-6)
+
+
+if __name__ == '__main__':
+    import librosa
+
+    data = {
+        'librosa_version': librosa.__version__,
+        'feature_names': list(FEATURE_NAMES),
+        'features': {name: reference_features(signal) for name, signal in make_signals().items()},
+    }
+    with open(REFERENCE, 'w') as f:
+        json.dump(data, f, indent=2)
@@ -0,0 +1,45 @@
+import numpy as np
+
+from ml_models.cheating_detection.face_tracker import FaceTracker
+
+
+class StubDetector:
+    """Returns the same faces on every call and counts the calls"""
+
+    def __init__(self, faces):
+        self.faces = faces
+        self.calls = 0
+
+    def detect_faces(self, frame, previous_count=None):
+        self.calls += 1
+        return list(self.faces)
+
+
+def textured_frame():
+    rng = np.random.default_rng(8)
+    return rng.integers(0, 255, size=(240, 320, 3), dtype=np.uint8)
+
+
+def test_faces_too_small_to_track_are_still_counted():
+    frame = textured_frame()
+    detector = StubDetector([(40, 40, 120, 120, 0.99), (300, 200, 303, 203, 0.9)])
+    tracker = FaceTracker(detector, detect_interval=5)
+
+    first = tracker.update(frame)
+    second = tracker.update(frame)
+
+    assert len(first) == 2
+    assert len(second) == 2
+    # The small face forced a full detection instead of tracking
+    assert detector.calls == 2
+
+
+def test_trackable_faces_are_tracked_between_detections():
+    frame = textured_frame()
+    detector = StubDetector([(40, 40, 120, 120, 0.99)])
+    tracker = FaceTracker(detector, detect_interval=5)
+
+    boxes = [tracker.update(frame) for _ in range(5)]
+
+    assert all(len(b) == 1 for b in boxes)
+    assert detector.calls == 1
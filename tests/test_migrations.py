@@ -0,0 +1,82 @@
+import os
+from datetime import datetime
+
+import pytest
+import sqlalchemy as sa
+from alembic.script import ScriptDirectory
+from flask_migrate import upgrade
+
+from app import create_app, db
+
+MIGRATIONS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'migrations')
+
+
+@pytest.fixture
+def app():
+    # In-memory SQLite; every app gets its own empty database
+    app = create_app('testing')
+    with app.app_context():
+        yield app
+        db.session.remove()
+
+
+def head_revision():
+    return ScriptDirectory(MIGRATIONS).get_current_head()
+
+
+def current_revision():
+    return db.session.execute(sa.text('SELECT version_num FROM alembic_version')).scalar()
+
+
+def test_upgrade_empty_database_to_head(app):
+    upgrade(directory=MIGRATIONS)
+
+    assert current_revision() == head_revision()
+    # No revision creates tables on its own; the schema itself comes from
+    # db.create_all() afterwards
+    assert set(sa.inspect(db.engine).get_table_names()) == {'alembic_version'}
+    db.create_all()
+    tables = set(sa.inspect(db.engine).get_table_names())
+    assert {'monitoring_logs', 'monitoring_rollups', 'session_activity_aggregates',
+            'evidence_blobs'} <= tables
+
+
+def test_upgrade_database_built_by_create_all(app):
+    db.create_all()
+
+    upgrade(directory=MIGRATIONS)
+
+    assert current_revision() == head_revision()
+
+
+def test_upgrade_backfills_totals_from_existing_events(app):
+    # The monitoring tables as they were before the first revision
+    db.session.execute(sa.text('CREATE TABLE exam_sessions (id INTEGER PRIMARY KEY)'))
+    db.session.execute(sa.text(
+        'CREATE TABLE monitoring_logs (id INTEGER PRIMARY KEY, session_id INTEGER, '
+        'timestamp DATETIME, activity_type VARCHAR(50))'
+    ))
+    db.session.execute(sa.text('INSERT INTO exam_sessions (id) VALUES (1)'))
+    for second, activity_type in ((5, 'phone_detected'), (20, 'phone_detected'), (30, 'tab_switch')):
+        db.session.execute(
+            sa.text('INSERT INTO monitoring_logs (session_id, timestamp, activity_type) '
+                    'VALUES (1, :timestamp, :activity_type)'),
+            {'timestamp': datetime(2026, 1, 1, 9, 0, second), 'activity_type': activity_type}
+        )
+    db.session.commit()
+
+    upgrade(directory=MIGRATIONS)
+
+    assert current_revision() == head_revision()
+    columns = {c['name'] for c in sa.inspect(db.engine).get_columns('monitoring_logs')}
+    assert {'confidence_score', 'details', 'video_frame_path', 'clip_manifest_path'} <= columns
+    assert sa.inspect(db.engine).has_table('evidence_blobs')
+    rollups = db.session.execute(sa.text(
+        'SELECT activity_type, event_count FROM monitoring_rollups ORDER BY activity_type'
+    )).all()
+    assert [tuple(r) for r in rollups] == [('phone_detected', 2), ('tab_switch', 1)]
+    aggregates = db.session.execute(sa.text(
+        'SELECT activity_type, event_count, weighted_score FROM session_activity_aggregates '
+        'ORDER BY activity_type'
+    )).all()
+    assert [tuple(r) for r in aggregates] == [('phone_detected', 2, 16.0), ('tab_switch', 1, 1.0)]
@@ -0,0 +1,102 @@
+import numpy as np
+import pytest
+
+from ml_models.cheating_detection.object_backends import decode_predictions, letterbox, nms
+
+CONF = 0.45
+IOU = 0.45
+FRAME_SHAPE = (480, 960)
+INPUT_SHAPE = (640, 640)
+
+
+def row(cx, cy, w, h, objectness, class_scores):
+    """One raw YOLOv5 output row: xywh, objectness, per-class scores"""
+    return [cx, cy, w, h, objectness] + list(class_scores)
+
+
+def decode(rows, class_ids=None, ratio=1.0, pad=(0, 0), frame_shape=INPUT_SHAPE):
+    pred = np.array(rows, dtype=np.float32)
+    if class_ids is not None:
+        class_ids = np.array(class_ids)
+    return decode_predictions(pred, ratio, pad, frame_shape, CONF, IOU, class_ids)
+
+
+def test_letterbox_ratio_and_padding():
+    frame = np.zeros(FRAME_SHAPE + (3,), dtype=np.uint8)
+
+    blob, (ratio, pad) = letterbox(frame, INPUT_SHAPE)
+
+    assert blob.shape == (3, 640, 640)
+    assert ratio == pytest.approx(2 / 3)
+    assert pad == (0, 160)
+    # Padding rows are grey, the resized frame is black
+    assert blob[0, 159, 0] == pytest.approx(114 / 255)
+    assert blob[0, 160, 0] == 0.0
+
+
+def test_confidence_threshold():
+    rows = [
+        row(100, 100, 20, 20, 0.3, [1.0, 0.0, 0.0]),   # objectness too low
+        row(300, 300, 20, 20, 0.9, [0.4, 0.0, 0.0]),   # 0.9 * 0.4 = 0.36
+        row(500, 500, 20, 20, 0.9, [0.0, 0.6, 0.0]),   # 0.54
+    ]
+
+    result = decode(rows)
+
+    assert result[:, 5].tolist() == [1.0]
+    assert result[0, 4] == pytest.approx(0.54)
+
+
+def test_class_filter_runs_before_nms():
+    rows = [
+        row(100, 100, 50, 50, 0.95, [1.0, 0.0, 0.0]),  # stronger, other class
+        row(102, 102, 50, 50, 0.90, [0.0, 0.0, 0.8]),  # target class, overlapping
+    ]
+
+    result = decode(rows, class_ids=[2])
+
+    assert result[:, 5].tolist() == [2.0]
+    assert result[0, 4] == pytest.approx(0.72)
+
+
+def test_nms_is_per_class():
+    rows = [
+        row(100, 100, 50, 50, 0.9, [0.9, 0.0, 0.0]),
+        row(102, 102, 50, 50, 0.9, [0.8, 0.0, 0.0]),   # suppressed by the row above
+        row(101, 101, 50, 50, 0.9, [0.0, 0.7, 0.0]),   # other class, kept
+    ]
+
+    result = decode(rows)
+
+    assert sorted(result[:, 5].tolist()) == [0.0, 1.0]
+    class_0 = result[result[:, 5] == 0]
+    assert class_0[0, 4] == pytest.approx(0.81)
+
+
+def test_boxes_map_back_through_letterbox():
+    frame = np.zeros(FRAME_SHAPE + (3,), dtype=np.uint8)
+    _, (ratio, pad) = letterbox(frame, INPUT_SHAPE)
+    rows = [
+        # Centre of the letterboxed input, 64 x 32 there
+        row(320, 320, 64, 32, 0.9, [0.0, 0.9, 0.0]),
+        # Reaches into the bottom padding; clipped to the frame
+        row(320, 470, 64, 40, 0.9, [0.9, 0.0, 0.0]),
+    ]
+
+    result = decode(rows, ratio=ratio, pad=pad, frame_shape=FRAME_SHAPE)
+    result = result[np.argsort(result[:, 5])]
+
+    # (x - pad_x) / ratio, (y - pad_y) / ratio
+    np.testing.assert_allclose(result[1, :4], [432, 216, 528, 264], atol=1e-3)
+    np.testing.assert_allclose(result[0, :4], [432, 435, 528, 480], atol=1e-3)
+
+
+def test_no_detections():
+    assert decode([row(100, 100, 20, 20, 0.1, [0.1, 0.1, 0.1])]).shape == (0, 6)
+
+
+def test_nms_keeps_highest_score_first():
+    boxes = np.array([[0, 0, 10, 10], [1, 1, 11, 11], [50, 50, 60, 60]], dtype=np.float32)
+    scores = np.array([0.5, 0.9, 0.7], dtype=np.float32)
+
+    assert nms(boxes, scores, IOU).tolist() == [1, 2]
@@ -0,0 +1,120 @@
+import os
+from datetime import datetime, timedelta
+
+import pytest
+
+from app import create_app, db
+from app import tasks
+from app.evidence import blob_path
+from app.models.exam import ExamSession
+from app.models.monitoring import EvidenceBlob, MonitoringLog
+from app.tasks import cleanup_old_sessions, purge_raw_monitoring_logs
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = create_app('testing')
+    app.config['UPLOAD_FOLDER'] = str(tmp_path)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+
+
+def write_evidence(app, path):
+    path = os.path.join(app.config['UPLOAD_FOLDER'], 'evidence', path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(b'evidence')
+    return path
+
+
+def add_log(timestamp, video_frame_path=None, clip_manifest_path=None, session_id=1):
+    db.session.add(MonitoringLog(session_id=session_id, activity_type='phone_detected',
+                                 timestamp=timestamp, video_frame_path=video_frame_path,
+                                 clip_manifest_path=clip_manifest_path))
+
+
+def add_shared_blob(app, events):
+    """A blob referenced by the given (session id, count) pairs of events"""
+    path = blob_path('ab' * 32)
+    full_path = write_evidence(app, path)
+    now = datetime.utcnow()
+    for session_id, count in events:
+        for _ in range(count):
+            add_log(now, video_frame_path=path, session_id=session_id)
+    db.session.add(EvidenceBlob(sha256='ab' * 32, path=path,
+                                refcount=sum(count for _, count in events)))
+    return path, full_path
+
+
+def add_sessions():
+    ended = datetime.utcnow() - timedelta(days=40)
+    db.session.add(ExamSession(id=1, exam_id=1, student_id=1, start_time=ended,
+                               end_time=ended, status='completed'))
+    db.session.add(ExamSession(id=2, exam_id=1, student_id=2, start_time=datetime.utcnow()))
+
+
+def test_purge_removes_files_only_purged_events_used(app):
+    old = datetime.utcnow() - timedelta(days=40)
+    legacy = write_evidence(app, '1/1/old.jpg')
+    old_clip = write_evidence(app, '1/1/clips/old/manifest.json')
+    write_evidence(app, '1/1/clips/old/000.jpg')
+    shared_clip = write_evidence(app, '1/1/clips/shared/manifest.json')
+    add_log(old, video_frame_path='1/1/old.jpg', clip_manifest_path='1/1/clips/old/manifest.json')
+    add_log(old, clip_manifest_path='1/1/clips/shared/manifest.json')
+    add_log(datetime.utcnow(), clip_manifest_path='1/1/clips/shared/manifest.json')
+    db.session.commit()
+
+    result = purge_raw_monitoring_logs()
+
+    assert result == {'deleted': 2, 'evidence_files': 1, 'evidence_clips': 1}
+    assert not os.path.exists(legacy)
+    assert not os.path.exists(os.path.dirname(old_clip))
+    assert os.path.exists(shared_clip)
+    assert MonitoringLog.query.count() == 1
+
+
+def test_purge_is_scheduled():
+    schedule = create_app('testing').config['CELERYBEAT_SCHEDULE']
+
+    assert schedule['purge-raw-monitoring-logs']['task'] == purge_raw_monitoring_logs.name
+
+
+def test_cleanup_keeps_blobs_shared_with_other_sessions(app):
+    add_sessions()
+    path, full_path = add_shared_blob(app, [(1, 1), (2, 1)])
+    db.session.commit()
+
+    result = cleanup_old_sessions()
+
+    assert result['sessions'] == 1
+    assert result['monitoring_logs'] == 1
+    assert os.path.exists(full_path)
+    assert EvidenceBlob.query.one().refcount == 1
+    assert MonitoringLog.query.one().session_id == 2
+
+
+def test_cleanup_failure_leaves_refcounts_matching_rows(app, monkeypatch):
+    app.config['RETENTION_CHUNK_SIZE'] = 1
+    add_sessions()
+    path, full_path = add_shared_blob(app, [(1, 2), (2, 1)])
+    db.session.commit()
+    release_blobs = tasks.release_blobs
+    calls = []
+
+    def fail_second_chunk(condition):
+        calls.append(condition)
+        if len(calls) == 2:
+            raise RuntimeError('connection lost')
+        return release_blobs(condition)
+
+    monkeypatch.setattr(tasks, 'release_blobs', fail_second_chunk)
+
+    result = cleanup_old_sessions()
+
+    assert 'error' in result
+    referencing = MonitoringLog.query.filter_by(video_frame_path=path).count()
+    assert referencing == 2
+    assert EvidenceBlob.query.one().refcount == referencing
+    assert os.path.exists(full_path)